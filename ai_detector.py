@@ -3,59 +3,82 @@ import cv2
 from sklearn.cluster import DBSCAN
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import IsolationForest
-from sklearn.decomposition import PCA
 import logging
 from scipy.spatial.distance import cdist
+from scipy.optimize import linear_sum_assignment
 from skimage.feature import hog, local_binary_pattern
 from skimage.segmentation import slic
-from skimage.measure import regionprops
+from skimage.measure import regionprops_table
 import pickle
 import os
+import time
+import copy
+import threading
+
+# Segmentation scaling: n_segments is the count for a 1920x1080 page and scales with page area
+SEGMENTATION_REFERENCE_AREA = 1920 * 1080
+DEFAULT_TILE_HEIGHT = 2048          # Full-resolution rows per tile in 'tiled' and 'proxy' modes
+DEFAULT_PROXY_PIXELS = 2_000_000    # Pixel budget of the downscaled proxy in 'proxy' mode
+MIN_SEGMENTATION_SCALE = 0.125      # Lowest scale used when falling behind the time budget
+
+# Feature extraction works on a fixed-size proxy so vectors are comparable across page sizes
+FEATURE_PROXY_SIZE = 128            # Proxy is FEATURE_PROXY_SIZE x FEATURE_PROXY_SIZE pixels
+FEATURE_HOG_CELL = 32               # 4x4 pooled HOG grid on the proxy
+
+# Historical anomaly model settings
+MIN_HISTORY_SAMPLES = 5             # Accepted captures needed before a page model is used
+MAX_HISTORY_SAMPLES = 500           # Most recent accepted captures kept per page
+MODEL_FORMAT_VERSION = 1
+
+# Models loaded by load_model, cached per process and keyed by (path, mtime)
+_loaded_models = {}
+# Serializes model file updates and cache access across threads
+_model_lock = threading.RLock()
 
 class AIDetector:
     def __init__(self):
         self.setup_logging()
-        self.anomaly_detector = IsolationForest(contamination=0.1, random_state=42)
-        self.scaler = StandardScaler()
-        self.pca = PCA(n_components=50)
+        # Per-page anomaly models trained from accepted captures (see add_accepted_captures).
+        # Entries are replaced, never mutated, so concurrent readers always see a consistent model.
+        self.page_models = {}
         
     def setup_logging(self):
         """Setup logging for AI detector"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
         self.logger = logging.getLogger(__name__)
     
     def extract_features(self, image):
-        """Extract comprehensive features from image for AI analysis"""
+        """Extract a fixed-length feature vector from an image for AI analysis.
+        
+        Features are computed on a FEATURE_PROXY_SIZE square proxy of the page, so
+        the vector has the same length (263 values) for any image size and is
+        comparable across pages.
+        """
         try:
             features = []
             
-            # Convert to grayscale if needed
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-            else:
-                gray = image.copy()
+            # Normalize to a fixed-size RGB proxy
+            if len(image.shape) == 2:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+            proxy = cv2.resize(image, (FEATURE_PROXY_SIZE, FEATURE_PROXY_SIZE), interpolation=cv2.INTER_AREA)
+            gray = cv2.cvtColor(proxy, cv2.COLOR_RGB2GRAY)
             
-            # 1. HOG Features (Histogram of Oriented Gradients)
-            hog_features = hog(gray, orientations=9, pixels_per_cell=(8, 8),
-                              cells_per_block=(2, 2), block_norm='L2-Hys')
-            features.extend(hog_features[:100])  # Limit to first 100 features
+            # 1. HOG Features pooled over a 4x4 grid (144 values)
+            hog_features = hog(gray, orientations=9, pixels_per_cell=(FEATURE_HOG_CELL, FEATURE_HOG_CELL),
+                              cells_per_block=(1, 1), block_norm='L2-Hys', feature_vector=True)
+            features.extend(hog_features)
             
-            # 2. LBP Features (Local Binary Pattern)
-            radius = 3
+            # 2. LBP Features (Local Binary Pattern, 10 values)
+            radius = 1
             n_points = 8 * radius
             lbp = local_binary_pattern(gray, n_points, radius, method='uniform')
             lbp_hist, _ = np.histogram(lbp.ravel(), bins=n_points + 2, 
                                      range=(0, n_points + 2), density=True)
             features.extend(lbp_hist)
             
-            # 3. Color histogram features
-            if len(image.shape) == 3:
-                for i in range(3):  # RGB channels
-                    hist = cv2.calcHist([image], [i], None, [32], [0, 256])
-                    features.extend(hist.flatten() / hist.sum())
+            # 3. Color histogram features (96 values)
+            for i in range(3):  # RGB channels
+                hist = cv2.calcHist([proxy], [i], None, [32], [0, 256])
+                features.extend(hist.flatten() / hist.sum())
             
             # 4. Edge density features
             edges = cv2.Canny(gray, 50, 150)
@@ -66,11 +89,11 @@ class AIDetector:
             texture_features = self._extract_texture_features(gray)
             features.extend(texture_features)
             
-            # 6. Shape features using contours
-            shape_features = self._extract_shape_features(gray)
+            # 6. Shape features using contours of the edge map
+            shape_features = self._extract_shape_features(edges)
             features.extend(shape_features)
             
-            return np.array(features)
+            return np.array(features, dtype=np.float64)
             
         except Exception as e:
             self.logger.error(f"Failed to extract features: {str(e)}")
@@ -105,34 +128,44 @@ class AIDetector:
             self.logger.error(f"Failed to extract texture features: {str(e)}")
             return [0] * 6
     
-    def _extract_shape_features(self, gray_image):
-        """Extract shape-based features"""
+    def _extract_shape_features(self, edge_image):
+        """Extract shape-based features from a binary edge map.
+        
+        Areas are relative to the image area and perimeters to its diagonal,
+        so the values do not depend on image size.
+        """
         try:
             features = []
             
             # Find contours
-            contours, _ = cv2.findContours(gray_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            contours, _ = cv2.findContours(edge_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
             if contours:
+                image_area = float(edge_image.shape[0] * edge_image.shape[1])
+                image_diagonal = float(np.hypot(edge_image.shape[0], edge_image.shape[1]))
+                
                 # Number of contours
                 features.append(len(contours))
                 
+                # Contours with a meaningful area
+                areas = np.array([cv2.contourArea(c) for c in contours])
+                significant = [c for c, area in zip(contours, areas) if area > 10]
+                areas = areas[areas > 10] / image_area
+                
                 # Average contour area
-                areas = [cv2.contourArea(c) for c in contours if cv2.contourArea(c) > 10]
-                features.append(np.mean(areas) if areas else 0)
-                features.append(np.std(areas) if areas else 0)
+                features.append(np.mean(areas) if len(areas) else 0)
+                features.append(np.std(areas) if len(areas) else 0)
                 
                 # Average perimeter
-                perimeters = [cv2.arcLength(c, True) for c in contours if cv2.contourArea(c) > 10]
+                perimeters = [cv2.arcLength(c, True) / image_diagonal for c in significant]
                 features.append(np.mean(perimeters) if perimeters else 0)
                 
                 # Aspect ratios
                 aspect_ratios = []
-                for contour in contours:
-                    if cv2.contourArea(contour) > 10:
-                        rect = cv2.boundingRect(contour)
-                        aspect_ratio = rect[2] / rect[3] if rect[3] > 0 else 0
-                        aspect_ratios.append(aspect_ratio)
+                for contour in significant:
+                    rect = cv2.boundingRect(contour)
+                    aspect_ratio = rect[2] / rect[3] if rect[3] > 0 else 0
+                    aspect_ratios.append(aspect_ratio)
                 
                 features.append(np.mean(aspect_ratios) if aspect_ratios else 0)
                 features.append(np.std(aspect_ratios) if aspect_ratios else 0)
@@ -145,44 +178,156 @@ class AIDetector:
             self.logger.error(f"Failed to extract shape features: {str(e)}")
             return [0] * 6
     
-    def segment_image(self, image, n_segments=100):
-        """Segment image using SLIC superpixels for region analysis"""
+    def segment_image(self, image, n_segments=100, mode='full', time_budget=None):
+        """Segment image using SLIC superpixels for region analysis.
+        
+        Returns the label image and a columnar region table: a dict of arrays
+        ('label', 'area', 'centroid', 'bbox', 'eccentricity', 'mean_color',
+        'std_color') with one row per region.
+        
+        mode='full' segments the full-resolution image with n_segments regions.
+        mode='proxy' segments a downscaled proxy and mode='tiled' segments
+        fixed-height full-resolution tiles; both scale the segment count with
+        page area, map centroids and bboxes back to full-resolution coordinates,
+        honour time_budget (seconds) by lowering the resolution of the remaining
+        tiles when behind schedule, and return None for the label image.
+        """
         try:
-            # Apply SLIC segmentation
-            segments = slic(image, n_segments=n_segments, compactness=10, sigma=1)
-            
-            # Extract properties of each segment
-            segment_properties = []
-            
-            for region in regionprops(segments):
-                # Skip small regions
-                if region.area < 10:
-                    continue
-                
-                # Extract region from original image
-                min_row, min_col, max_row, max_col = region.bbox
-                region_image = image[min_row:max_row, min_col:max_col]
-                
-                # Calculate region properties
-                properties = {
-                    'area': region.area,
-                    'centroid': region.centroid,
-                    'bbox': region.bbox,
-                    'perimeter': region.perimeter,
-                    'eccentricity': region.eccentricity,
-                    'solidity': region.solidity,
-                    'mean_color': np.mean(region_image.reshape(-1, region_image.shape[-1]), axis=0) if len(region_image.shape) == 3 else np.mean(region_image),
-                    'std_color': np.std(region_image.reshape(-1, region_image.shape[-1]), axis=0) if len(region_image.shape) == 3 else np.std(region_image)
-                }
-                
-                segment_properties.append(properties)
+            if mode in ('proxy', 'tiled'):
+                segments = None
+                region_table = self._segment_tiled(image, n_segments, mode, time_budget)
+            else:
+                # Apply SLIC segmentation
+                segments = slic(image, n_segments=n_segments, compactness=10, sigma=1,
+                               channel_axis=-1 if image.ndim == 3 else None)
+                region_table = self._build_region_table(image, segments)
             
-            self.logger.info(f"Segmented image into {len(segment_properties)} regions")
-            return segments, segment_properties
+            self.logger.info(f"Segmented image into {self._region_count(region_table)} regions ({mode} mode)")
+            return segments, region_table
             
         except Exception as e:
             self.logger.error(f"Failed to segment image: {str(e)}")
-            return None, []
+            return None, self._empty_region_table()
+    
+    def _segment_tiled(self, image, n_segments, mode, time_budget=None, tile_height=DEFAULT_TILE_HEIGHT,
+                       max_proxy_pixels=DEFAULT_PROXY_PIXELS):
+        """Segment an image tile by tile, optionally on a downscaled proxy, and merge the region tables"""
+        height, width = image.shape[:2]
+        
+        # Segment density follows page area instead of a fixed count per page
+        segments_per_pixel = n_segments / SEGMENTATION_REFERENCE_AREA
+        scale = 1.0
+        if mode == 'proxy':
+            scale = min(1.0, np.sqrt(max_proxy_pixels / float(height * width)))
+        
+        tile_starts = list(range(0, height, tile_height))
+        tables = []
+        label_offset = 0
+        start_time = time.time()
+        
+        for tile_index, y0 in enumerate(tile_starts):
+            # Behind schedule: halve the resolution for the remaining tiles
+            if time_budget and tile_index > 0:
+                elapsed = time.time() - start_time
+                if elapsed > time_budget * tile_index / len(tile_starts) and scale > MIN_SEGMENTATION_SCALE:
+                    scale = max(MIN_SEGMENTATION_SCALE, scale / 2)
+                    self.logger.info(f"Segmentation behind time budget, lowering scale to {scale:.3f}")
+            
+            tile = image[y0:y0 + tile_height]
+            tile_h, tile_w = tile.shape[:2]
+            if scale < 1.0:
+                proxy_w = max(1, int(round(tile_w * scale)))
+                proxy_h = max(1, int(round(tile_h * scale)))
+                tile = cv2.resize(tile, (proxy_w, proxy_h), interpolation=cv2.INTER_AREA)
+            scale_y = tile_h / tile.shape[0]
+            scale_x = tile_w / tile.shape[1]
+            
+            tile_segments = slic(tile, n_segments=max(1, int(round(segments_per_pixel * tile_h * tile_w))),
+                                 compactness=10, sigma=1, channel_axis=-1 if tile.ndim == 3 else None)
+            table = self._build_region_table(tile, tile_segments, min_area=max(1, 10 / (scale_x * scale_y)))
+            
+            # Map back to full-resolution page coordinates
+            table['label'] = table['label'] + label_offset
+            table['area'] = table['area'] * scale_x * scale_y
+            table['centroid'] = table['centroid'] * [scale_y, scale_x] + [y0, 0]
+            bbox = table['bbox'].astype(np.float64)
+            table['bbox'] = np.column_stack([
+                np.floor(bbox[:, 0] * scale_y) + y0,
+                np.floor(bbox[:, 1] * scale_x),
+                np.minimum(np.ceil(bbox[:, 2] * scale_y), tile_h) + y0,
+                np.minimum(np.ceil(bbox[:, 3] * scale_x), tile_w)
+            ]).astype(np.int64)
+            
+            label_offset = int(tile_segments.max()) + label_offset + 1
+            tables.append(table)
+        
+        if time_budget and time.time() - start_time > time_budget:
+            self.logger.warning(f"Segmentation exceeded time budget of {time_budget:.1f}s")
+        
+        return {key: np.concatenate([t[key] for t in tables]) for key in tables[0]}
+    
+    def _build_region_table(self, image, segments, min_area=10):
+        """Extract the region properties used by the matcher in one vectorized pass"""
+        table = regionprops_table(segments, properties=('label', 'area', 'centroid', 'bbox', 'eccentricity'))
+        labels = table['label']
+        
+        # Mean and std colors via label-indexed reductions over the whole image
+        flat_labels = segments.ravel()
+        counts = np.bincount(flat_labels, minlength=labels.max() + 1 if len(labels) else 1).astype(np.float64)
+        pixels = image.reshape(-1, image.shape[-1]) if image.ndim == 3 else image.reshape(-1, 1)
+        means = np.empty((len(labels), pixels.shape[1]))
+        stds = np.empty((len(labels), pixels.shape[1]))
+        for channel in range(pixels.shape[1]):
+            values = pixels[:, channel].astype(np.float64)
+            sums = np.bincount(flat_labels, weights=values, minlength=len(counts))
+            sq_sums = np.bincount(flat_labels, weights=values * values, minlength=len(counts))
+            mean = sums[labels] / counts[labels]
+            means[:, channel] = mean
+            stds[:, channel] = np.sqrt(np.maximum(sq_sums[labels] / counts[labels] - mean * mean, 0))
+        
+        # Skip small regions
+        keep = table['area'] >= min_area
+        region_table = {
+            'label': labels[keep],
+            'area': table['area'][keep].astype(np.float64),
+            'centroid': np.column_stack([table['centroid-0'], table['centroid-1']])[keep],
+            'bbox': np.column_stack([table['bbox-0'], table['bbox-1'], table['bbox-2'], table['bbox-3']])[keep],
+            'eccentricity': table['eccentricity'][keep],
+            # Grayscale images keep a single 1-D color column, as color comparisons only apply to RGB
+            'mean_color': means[keep] if image.ndim == 3 else means[keep, 0],
+            'std_color': stds[keep] if image.ndim == 3 else stds[keep, 0]
+        }
+        return region_table
+    
+    def _empty_region_table(self):
+        """Region table with no rows"""
+        return {
+            'label': np.empty(0, dtype=np.int64),
+            'area': np.empty(0),
+            'centroid': np.empty((0, 2)),
+            'bbox': np.empty((0, 4), dtype=np.int64),
+            'eccentricity': np.empty(0),
+            'mean_color': np.empty(0),
+            'std_color': np.empty(0)
+        }
+    
+    def _region_count(self, region_table):
+        """Number of regions in a region table"""
+        return len(region_table['area'])
+    
+    def _region_record(self, region_table, index):
+        """Build the per-region dict used in analysis results for one row of a region table"""
+        mean_color = region_table['mean_color'][index]
+        std_color = region_table['std_color'][index]
+        return {
+            'label': int(region_table['label'][index]),
+            'area': float(region_table['area'][index]),
+            'centroid': tuple(region_table['centroid'][index]),
+            'bbox': tuple(int(v) for v in region_table['bbox'][index]),
+            'eccentricity': float(region_table['eccentricity'][index]),
+            'mean_color': mean_color if isinstance(mean_color, np.ndarray) else float(mean_color),
+            'std_color': std_color if isinstance(std_color, np.ndarray) else float(std_color)
+        }
     
     def detect_anomalies_clustering(self, features1, features2, eps=0.5, min_samples=5):
         """Detect anomalies using clustering techniques"""
@@ -190,8 +335,8 @@ class AIDetector:
             # Combine features
             all_features = np.vstack([features1.reshape(1, -1), features2.reshape(1, -1)])
             
-            # Normalize features
-            normalized_features = self.scaler.fit_transform(all_features)
+            # Normalize features (scaler is local to the call; nothing is fitted on the detector)
+            normalized_features = StandardScaler().fit_transform(all_features)
             
             # Apply DBSCAN clustering
             clustering = DBSCAN(eps=eps, min_samples=min_samples)
@@ -217,8 +362,99 @@ class AIDetector:
             self.logger.error(f"Failed to detect anomalies: {str(e)}")
             return {'anomaly_detected': False, 'feature_distance': 0, 'confidence': 0}
     
-    def analyze_semantic_differences(self, img1, img2):
-        """Analyze semantic differences between images using AI techniques"""
+    def add_accepted_captures(self, page_key, features_batch):
+        """Train the page's anomaly model incrementally with the features of accepted captures.
+        
+        features_batch is a single feature vector or a 2-D array of them. The
+        scaler is updated with partial_fit and the IsolationForest is refit on
+        the bounded capture history, so scoring never refits anything.
+        """
+        try:
+            features_batch = np.atleast_2d(np.asarray(features_batch, dtype=np.float64))
+            
+            with _model_lock:
+                previous = self.page_models.get(page_key)
+                if previous is None or previous['history'].shape[1] != features_batch.shape[1]:
+                    scaler = StandardScaler()
+                    history = np.empty((0, features_batch.shape[1]))
+                    model = None
+                else:
+                    scaler = copy.deepcopy(previous['scaler'])
+                    history = previous['history']
+                    model = previous['model']
+                
+                scaler.partial_fit(features_batch)
+                history = np.vstack([history, features_batch])[-MAX_HISTORY_SAMPLES:]
+                
+                if len(history) >= MIN_HISTORY_SAMPLES:
+                    model = IsolationForest(contamination='auto', random_state=42)
+                    model.fit(scaler.transform(history))
+                
+                # Copy-on-write: the models dict may be shared with the load cache and other runs
+                page_model = {'scaler': scaler, 'history': history, 'model': model}
+                self.page_models = {**self.page_models, page_key: page_model}
+            
+            self.logger.info(f"Anomaly model for '{page_key}' trained on {len(history)} captures")
+            return len(history)
+            
+        except Exception as e:
+            self.logger.error(f"Failed to train anomaly model for '{page_key}': {str(e)}")
+            return 0
+    
+    def has_page_model(self, page_key):
+        """Check whether a trained anomaly model exists for the page"""
+        page_model = self.page_models.get(page_key)
+        return page_model is not None and page_model['model'] is not None
+    
+    def score_captures(self, page_key, features_batch):
+        """Score a batch of captures against the page's historical model.
+        
+        Runs a single transform and predict call over the batch. Returns a dict
+        of arrays: 'anomaly_detected' (bool), 'anomaly_score' (higher is more
+        anomalous) and 'feature_distance' (distance to the history mean in
+        standardized units).
+        """
+        page_model = self.page_models[page_key]
+        features_batch = np.atleast_2d(np.asarray(features_batch, dtype=np.float64))
+        
+        normalized = page_model['scaler'].transform(features_batch)
+        predictions = page_model['model'].predict(normalized)
+        scores = -page_model['model'].decision_function(normalized)
+        
+        return {
+            'anomaly_detected': predictions == -1,
+            'anomaly_score': scores,
+            'feature_distance': np.linalg.norm(normalized, axis=1) / np.sqrt(normalized.shape[1])
+        }
+    
+    def detect_anomalies_history(self, page_key, features):
+        """Detect whether a capture is anomalous compared to the page's accepted history"""
+        try:
+            history_size = len(self.page_models[page_key]['history'])
+            scores = self.score_captures(page_key, features)
+            anomaly_score = float(scores['anomaly_score'][0])
+            result = {
+                'anomaly_detected': bool(scores['anomaly_detected'][0]),
+                'feature_distance': float(scores['feature_distance'][0]),
+                'anomaly_score': anomaly_score,
+                'confidence': float(min(max(anomaly_score + 0.5, 0.0), 1.0)),  # decision_function offset is -0.5
+                'model': 'history',
+                'history_size': history_size
+            }
+            
+            self.logger.info(f"Historical anomaly detection: {result['anomaly_detected']}, score: {anomaly_score:.4f}")
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"Failed to detect anomalies from history: {str(e)}")
+            return {'anomaly_detected': False, 'feature_distance': 0, 'confidence': 0}
+    
+    def analyze_semantic_differences(self, img1, img2, segmentation_mode='full', time_budget=None):
+        """Analyze semantic differences between images using AI techniques.
+        
+        segmentation_mode and time_budget (seconds, shared by both images) are
+        passed to segment_image.
+        """
         try:
             results = {
                 'layout_changes': [],
@@ -228,10 +464,11 @@ class AIDetector:
             }
             
             # 1. Segment both images
-            segments1, props1 = self.segment_image(img1)
-            segments2, props2 = self.segment_image(img2)
+            image_budget = time_budget / 2 if time_budget else None
+            segments1, props1 = self.segment_image(img1, mode=segmentation_mode, time_budget=image_budget)
+            segments2, props2 = self.segment_image(img2, mode=segmentation_mode, time_budget=image_budget)
             
-            if not props1 or not props2:
+            if not self._region_count(props1) or not self._region_count(props2):
                 return results
             
             # 2. Match regions between images
@@ -250,8 +487,10 @@ class AIDetector:
                         results['style_changes'].append(changes)
             
             # 4. Detect new/missing regions
-            unmatched1 = [p for i, p in enumerate(props1) if i not in [m['idx1'] for m in region_matches]]
-            unmatched2 = [p for i, p in enumerate(props2) if i not in [m['idx2'] for m in region_matches]]
+            matched1 = {m['idx1'] for m in region_matches}
+            matched2 = {m['idx2'] for m in region_matches}
+            unmatched1 = [self._region_record(props1, i) for i in range(self._region_count(props1)) if i not in matched1]
+            unmatched2 = [self._region_record(props2, i) for i in range(self._region_count(props2)) if i not in matched2]
             
             for region in unmatched1:
                 results['structural_changes'].append({
@@ -278,65 +517,65 @@ class AIDetector:
             return {'layout_changes': [], 'content_changes': [], 'style_changes': [], 'structural_changes': []}
     
     def _match_regions(self, props1, props2, threshold=0.5):
-        """Match regions between two images based on similarity"""
-        matches = []
+        """Match regions one-to-one between two images by solving an assignment problem on region similarity"""
+        if not self._region_count(props1) or not self._region_count(props2):
+            return []
         
-        for i, region1 in enumerate(props1):
-            best_match = None
-            best_score = 0
-            
-            for j, region2 in enumerate(props2):
-                # Calculate similarity score
-                score = self._calculate_region_similarity(region1, region2)
-                
-                if score > best_score and score > threshold:
-                    best_score = score
-                    best_match = j
-            
-            if best_match is not None:
-                matches.append({
-                    'idx1': i,
-                    'idx2': best_match,
-                    'region1': region1,
-                    'region2': props2[best_match],
-                    'confidence': best_score
-                })
-        
-        return matches
-    
-    def _calculate_region_similarity(self, region1, region2):
-        """Calculate similarity between two regions"""
         try:
-            # Size similarity
-            area_ratio = min(region1['area'], region2['area']) / max(region1['area'], region2['area'])
-            
-            # Position similarity
-            centroid_distance = np.sqrt((region1['centroid'][0] - region2['centroid'][0])**2 + 
-                                       (region1['centroid'][1] - region2['centroid'][1])**2)
-            max_distance = np.sqrt(region1['centroid'][0]**2 + region1['centroid'][1]**2) + \
-                          np.sqrt(region2['centroid'][0]**2 + region2['centroid'][1]**2)
-            position_similarity = 1 - (centroid_distance / max_distance) if max_distance > 0 else 0
-            
-            # Shape similarity
-            shape_similarity = min(region1['eccentricity'], region2['eccentricity']) / \
-                              max(region1['eccentricity'], region2['eccentricity']) if \
-                              max(region1['eccentricity'], region2['eccentricity']) > 0 else 0
-            
-            # Color similarity (if available)
-            color_similarity = 1.0
-            if isinstance(region1['mean_color'], np.ndarray) and isinstance(region2['mean_color'], np.ndarray):
-                color_distance = np.linalg.norm(region1['mean_color'] - region2['mean_color'])
-                color_similarity = 1 / (1 + color_distance / 100)  # Normalize
+            similarity = self._region_similarity_matrix(props1, props2)
+            
+            # Maximise total similarity; each region is used at most once
+            rows, cols = linear_sum_assignment(similarity, maximize=True)
             
-            # Combined similarity score
-            similarity = (area_ratio * 0.3 + position_similarity * 0.4 + 
-                         shape_similarity * 0.2 + color_similarity * 0.1)
+            matches = []
+            for i, j in zip(rows, cols):
+                score = similarity[i, j]
+                if score > threshold:
+                    matches.append({
+                        'idx1': int(i),
+                        'idx2': int(j),
+                        'region1': self._region_record(props1, i),
+                        'region2': self._region_record(props2, j),
+                        'confidence': float(score)
+                    })
             
-            return similarity
+            return matches
             
         except Exception as e:
-            self.logger.error(f"Failed to calculate region similarity: {str(e)}")
-            return 0.0
+            self.logger.error(f"Failed to match regions: {str(e)}")
+            return []
+    
+    def _region_similarity_matrix(self, props1, props2):
+        """Calculate the similarity between every pair of regions in two region tables.
+        
+        Weights size 0.3, position 0.4, shape 0.2 and color 0.1, returning a
+        (len(props1), len(props2)) matrix.
+        """
+        areas1, areas2 = props1['area'], props2['area']
+        centroids1, centroids2 = props1['centroid'], props2['centroid']
+        ecc1, ecc2 = props1['eccentricity'], props2['eccentricity']
+        
+        # Size similarity
+        area_ratio = np.minimum.outer(areas1, areas2) / np.maximum.outer(areas1, areas2)
+        
+        # Position similarity
+        centroid_distance = cdist(centroids1, centroids2)
+        max_distance = np.add.outer(np.linalg.norm(centroids1, axis=1), np.linalg.norm(centroids2, axis=1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            position_similarity = np.where(max_distance > 0, 1 - centroid_distance / max_distance, 0.0)
+        
+        # Shape similarity
+        ecc_max = np.maximum.outer(ecc1, ecc2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shape_similarity = np.where(ecc_max > 0, np.minimum.outer(ecc1, ecc2) / ecc_max, 0.0)
+        
+        # Color similarity (only for multi-channel regions)
+        color_similarity = 1.0
+        if props1['mean_color'].ndim == 2 and props2['mean_color'].ndim == 2:
+            color_similarity = 1 / (1 + cdist(props1['mean_color'], props2['mean_color']) / 100)
+        
+        return (area_ratio * 0.3 + position_similarity * 0.4 +
+                shape_similarity * 0.2 + color_similarity * 0.1)
     
     def _analyze_region_changes(self, region1, region2):
         """Analyze changes between two matched regions"""
@@ -377,27 +616,41 @@ class AIDetector:
             return changes
     
     def save_model(self, filepath):
-        """Save the trained model and scaler"""
+        """Save the per-page anomaly models"""
         try:
+            page_models = self.page_models
             model_data = {
-                'scaler': self.scaler,
-                'model': self.model
+                'version': MODEL_FORMAT_VERSION,
+                'page_models': page_models
             }
-            with open(filepath, 'wb') as f:
-                pickle.dump(model_data, f)
+            directory = os.path.dirname(filepath)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with _model_lock:
+                # Write to a temporary file first so readers never see a partial model
+                temp_path = f"{filepath}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    pickle.dump(model_data, f)
+                os.replace(temp_path, filepath)
+                _loaded_models[filepath] = (os.path.getmtime(filepath), page_models)
             self.logger.info(f"Model saved to {filepath}")
         except Exception as e:
             self.logger.error(f"Failed to save model: {str(e)}")
     
     def load_model(self, filepath):
-        """Load a trained model and scaler"""
+        """Load the per-page anomaly models; files are read once per process unless they change"""
         try:
             if os.path.exists(filepath):
-                with open(filepath, 'rb') as f:
-                    model_data = pickle.load(f)
-                self.scaler = model_data['scaler']
-                self.model = model_data['model']
-                self.logger.info(f"Model loaded from {filepath}")
+                with _model_lock:
+                    mtime = os.path.getmtime(filepath)
+                    cached = _loaded_models.get(filepath)
+                    if cached is None or cached[0] != mtime:
+                        with open(filepath, 'rb') as f:
+                            model_data = pickle.load(f)
+                        cached = (mtime, model_data.get('page_models', {}))
+                        _loaded_models[filepath] = cached
+                        self.logger.info(f"Model loaded from {filepath}")
+                self.page_models = cached[1]
                 return True
             else:
                 self.logger.warning(f"Model file not found: {filepath}")
@@ -405,9 +658,36 @@ class AIDetector:
         except Exception as e:
             self.logger.error(f"Failed to load model: {str(e)}")
             return False
+    
+    def with_model(self, filepath):
+        """Return a run-scoped view of this detector that uses the page models stored at filepath.
+        
+        The view shares everything else with this detector, so concurrent runs with
+        different model files do not see each other's models.
+        """
+        view = copy.copy(self)
+        view.page_models = {}
+        view.load_model(filepath)
+        return view
+    
+    def update_model_file(self, filepath, page_key, features_batch):
+        """Add accepted captures to the page model stored at filepath and save it.
+        
+        Reloading, training and saving happen under one lock, so concurrent runs
+        training the same model file do not drop each other's captures.
+        """
+        with _model_lock:
+            view = self.with_model(filepath)
+            history_size = view.add_accepted_captures(page_key, features_batch)
+            view.save_model(filepath)
+        return history_size
 
 # Example usage
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
     detector = AIDetector()
     
     # Example with dummy images
@@ -1,6 +1,7 @@
 import streamlit as st
 import os
 import uuid
+import logging
 from visual_ai_regression import VisualAIRegression
 from werkzeug.utils import secure_filename
 from datetime import datetime
@@ -14,6 +15,18 @@ RESULTS_FOLDER = 'results'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(RESULTS_FOLDER, exist_ok=True)
 
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+@st.cache_resource
+def get_regression_module():
+    """One shared analysis engine per process; runs keep their state in run-scoped contexts"""
+    return VisualAIRegression()
+
+
 st.set_page_config(page_title="Visual AI Regression", layout="wide")
 st.title("Visual AI Regression Testing (Streamlit)")
 st.markdown("Upload a baseline and current image to compare. Configure analysis options and view/download results.")
@@ -62,7 +75,7 @@ if baseline_file and current_file:
                 'output_dir': os.path.join(RESULTS_FOLDER, session_id)
             }
             os.makedirs(config['output_dir'], exist_ok=True)
-            regression_module = VisualAIRegression()
+            regression_module = get_regression_module()
             try:
                 results = regression_module.run_image_analysis(config)
                 st.success("Analysis completed!")
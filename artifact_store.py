@@ -0,0 +1,189 @@
+"""
+Artifact Store Module
+Content-addressed blob store that deduplicates screenshots and report images across runs
+"""
+
+import os
+import shutil
+import hashlib
+import logging
+import threading
+
+# Linux ioctl that clones a file's extents (reflink) on copy-on-write filesystems
+FICLONE = 0x40049409
+
+# Bytes read at a time while hashing
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path):
+    """SHA-256 of a file's content"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _reflink(source, destination):
+    import fcntl
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+class ArtifactStore:
+    """Stores artifact files once by content hash and links them where they are needed.
+
+    Blobs live in <store_dir>/objects/<2 hex>/<62 hex>. Files are materialized
+    as hard links to the blob where the filesystem allows it, as reflinks
+    (copy-on-write clones) otherwise, and copied as a last resort. A blob's
+    hard-link count is its reference count: gc() removes blobs that no file
+    outside the store links to any more. Linked files share their content, so
+    artifacts are always written as new files, never modified in place.
+    """
+
+    def __init__(self, store_dir=os.path.join("cache", "artifacts")):
+        self.setup_logging()
+        self.store_dir = store_dir
+        # Digests of files already hashed, by (device, inode, size, mtime)
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def setup_logging(self):
+        """Setup logging for the artifact store"""
+        self.logger = logging.getLogger(__name__)
+
+    def blob_path(self, digest):
+        return os.path.join(self.store_dir, 'objects', digest[:2], digest[2:])
+
+    def digest(self, path):
+        """Content hash of a file (cached while the file is unchanged)"""
+        info = os.stat(path)
+        key = (info.st_dev, info.st_ino, info.st_size, info.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            digest = file_digest(path)
+            with self._lock:
+                self._digests[key] = digest
+        return digest
+
+    def _temp_path(self, path):
+        return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def _clone(self, source, destination, link=True, copy=True):
+        """Link (if link), reflink or (if copy) copy source to destination; returns the method used or None"""
+        if link:
+            try:
+                os.link(source, destination)
+                return 'link'
+            except OSError:
+                pass
+        try:
+            _reflink(source, destination)
+            return 'reflink'
+        except (OSError, ImportError):
+            if os.path.exists(destination):
+                os.remove(destination)
+        if not copy:
+            return None
+        shutil.copyfile(source, destination)
+        return 'copy'
+
+    def put(self, path, link_source=False):
+        """Add a file to the store; returns (digest, blob path).
+
+        With link_source the blob becomes a hard link to the file itself (for files
+        this module owns); otherwise the content is cloned, so later changes to the
+        file cannot reach the blob.
+        """
+        digest = self.digest(path)
+        blob = self.blob_path(digest)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            temp_path = self._temp_path(blob)
+            self._clone(path, temp_path, link=link_source)
+            # A concurrent put of the same content leaves an identical blob
+            os.replace(temp_path, blob)
+        return digest, blob
+
+    def materialize(self, source, destination):
+        """Place the content of source at destination through the store; returns the digest"""
+        digest, blob = self.put(source)
+        if os.path.exists(destination) and os.path.samefile(destination, blob):
+            return digest
+        directory = os.path.dirname(destination)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self._temp_path(destination)
+        method = self._clone(blob, temp_path)
+        os.replace(temp_path, destination)
+        self.logger.info(f"Materialized {os.path.basename(destination)} ({method}, {digest[:12]})")
+        return digest
+
+    def intern(self, path):
+        """Replace a file by a link to its blob, so identical files share storage; returns the digest.
+
+        The file is left alone when the filesystem can neither link nor reflink.
+        """
+        digest, blob = self.put(path, link_source=True)
+        if not os.path.samefile(path, blob):
+            temp_path = self._temp_path(path)
+            if self._clone(blob, temp_path, copy=False):
+                os.replace(temp_path, path)
+        return digest
+
+    def detach(self, path):
+        """Remove path if it shares its content through links, so it can be rewritten safely"""
+        try:
+            if os.stat(path).st_nlink > 1:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def refcount(self, digest):
+        """Number of hard links to a blob outside the store (0 when it is not stored)"""
+        try:
+            return os.stat(self.blob_path(digest)).st_nlink - 1
+        except FileNotFoundError:
+            return 0
+
+    def gc(self):
+        """Remove blobs nothing links to any more; returns {'removed': count, 'bytes': freed}"""
+        removed = 0
+        freed = 0
+        objects_dir = os.path.join(self.store_dir, 'objects')
+        if not os.path.isdir(objects_dir):
+            return {'removed': 0, 'bytes': 0}
+        for prefix in os.listdir(objects_dir):
+            prefix_dir = os.path.join(objects_dir, prefix)
+            for name in os.listdir(prefix_dir):
+                blob = os.path.join(prefix_dir, name)
+                try:
+                    info = os.stat(blob)
+                    if name.endswith('.tmp') or info.st_nlink > 1:
+                        continue
+                    os.remove(blob)
+                    removed += 1
+                    freed += info.st_size
+                except OSError as e:
+                    self.logger.warning(f"Could not remove blob {blob}: {e}")
+        self.logger.info(f"Artifact store gc removed {removed} blobs ({freed} bytes)")
+        return {'removed': removed, 'bytes': freed}
+
+    def stats(self):
+        """Blob count, stored bytes and the bytes the links save"""
+        blobs = 0
+        stored = 0
+        saved = 0
+        objects_dir = os.path.join(self.store_dir, 'objects')
+        if os.path.isdir(objects_dir):
+            for prefix in os.listdir(objects_dir):
+                for name in os.listdir(os.path.join(objects_dir, prefix)):
+                    if name.endswith('.tmp'):
+                        continue
+                    info = os.stat(os.path.join(objects_dir, prefix, name))
+                    blobs += 1
+                    stored += info.st_size
+                    saved += info.st_size * max(0, info.st_nlink - 2)
+        return {'blobs': blobs, 'bytes': stored, 'saved_bytes': saved}
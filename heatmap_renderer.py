@@ -0,0 +1,87 @@
+"""
+Heatmap Renderer Module
+Renders uint8 difference maps through a 256-entry color lookup table, with a legend strip
+"""
+
+import logging
+import cv2
+import numpy as np
+
+# Colormap stops from no difference to the largest difference (navy, blue, cyan, yellow, orange, red)
+HEATMAP_COLORS = ['#000080', '#0000FF', '#00FFFF', '#FFFF00', '#FF8000', '#FF0000']
+
+# Height of the legend strip below the heatmap, in pixels
+LEGEND_HEIGHT = 24
+LEGEND_BACKGROUND = (248, 249, 250)
+LEGEND_TEXT_COLOR = (87, 80, 73)
+
+
+def heatmap_lut(colors=HEATMAP_COLORS):
+    """256x1 BGR lookup table interpolating the colors linearly over equally spaced stops"""
+    stops = np.array([[int(color[i:i + 2], 16) for i in (5, 3, 1)] for color in colors], dtype=np.float64)
+    positions = np.linspace(0, 255, len(colors))
+    levels = np.arange(256)
+    lut = np.stack([np.interp(levels, positions, stops[:, channel]) for channel in range(3)], axis=1)
+    return np.round(lut).astype(np.uint8).reshape(256, 1, 3)
+
+
+class HeatmapRenderer:
+    """Colors a difference map (0 = identical, 255 = largest difference) at its native resolution.
+
+    The colormap is applied with cv2.applyColorMap and a user lookup table, so
+    rendering costs one table lookup per pixel; the legend is a small strip
+    composited below the image instead of a plotted colorbar.
+    """
+
+    def __init__(self, colors=HEATMAP_COLORS, legend=True):
+        self.setup_logging()
+        self.lut = heatmap_lut(colors)
+        self.legend = legend
+
+    def setup_logging(self):
+        """Setup logging for the heatmap renderer"""
+        self.logger = logging.getLogger(__name__)
+
+    def render(self, diff, base=None, base_weight=0.7):
+        """BGR heatmap of a uint8 difference map, optionally blended over base (BGR, same size)"""
+        if diff.ndim == 3:
+            diff = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
+        heatmap = cv2.applyColorMap(np.ascontiguousarray(diff, dtype=np.uint8), self.lut)
+        if base is not None:
+            heatmap = cv2.addWeighted(base, base_weight, heatmap, 1 - base_weight, 0)
+        if self.legend:
+            heatmap = np.vstack([heatmap, self.legend_strip(heatmap.shape[1])])
+        return heatmap
+
+    def legend_strip(self, width):
+        """Legend strip of the given width: 'Similar', the color gradient, 'Different'"""
+        strip = np.empty((LEGEND_HEIGHT, width, 3), dtype=np.uint8)
+        strip[:] = LEGEND_BACKGROUND
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        scale = 0.4
+        margin = 6
+        (left_width, text_height), _ = cv2.getTextSize("Similar", font, scale, 1)
+        (right_width, _), _ = cv2.getTextSize("Different", font, scale, 1)
+        bar_start = left_width + 2 * margin
+        bar_end = width - right_width - 2 * margin
+        baseline = (LEGEND_HEIGHT + text_height) // 2
+
+        # Narrow images get the gradient alone
+        if bar_end - bar_start < 32:
+            bar_start, bar_end = margin, width - margin
+        else:
+            cv2.putText(strip, "Similar", (margin, baseline), font, scale, LEGEND_TEXT_COLOR, 1, cv2.LINE_AA)
+            cv2.putText(strip, "Different", (bar_end + margin, baseline), font, scale, LEGEND_TEXT_COLOR, 1,
+                        cv2.LINE_AA)
+        if bar_end > bar_start:
+            levels = np.linspace(0, 255, bar_end - bar_start).astype(np.uint8)
+            strip[6:LEGEND_HEIGHT - 6, bar_start:bar_end] = self.lut[levels, 0]
+        return strip
+
+    def save(self, diff, output_path, base=None, base_weight=0.7):
+        """Render the heatmap and write it to output_path"""
+        heatmap = self.render(diff, base, base_weight)
+        if not cv2.imwrite(output_path, heatmap):
+            raise IOError(f"Could not write heatmap: {output_path}")
+        self.logger.info(f"Difference heatmap saved to: {output_path} ({heatmap.shape[1]}x{heatmap.shape[0]})")
+        return output_path
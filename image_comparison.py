@@ -8,7 +8,9 @@ from skimage.color import rgb2gray
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from scipy import ndimage
+from sklearn.neighbors import KDTree
 import logging
+from heatmap_renderer import HeatmapRenderer
 
 class ImageComparison:
     def __init__(self):
@@ -16,10 +18,6 @@ class ImageComparison:
         
     def setup_logging(self):
         """Setup logging for image comparison"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
         self.logger = logging.getLogger(__name__)
     
     def load_images(self, image1_path, image2_path):
@@ -102,17 +100,19 @@ class ImageComparison:
             self.logger.error(f"Failed to calculate MSE: {str(e)}")
             raise
     
-    def calculate_pixel_difference(self, img1, img2):
-        """Calculate pixel-wise differences between two images"""
+    def difference_map(self, img1, img2):
+        """Grayscale absolute difference of two RGB images (uint8, 0 = identical)"""
+        return cv2.cvtColor(cv2.absdiff(img1, img2), cv2.COLOR_RGB2GRAY)
+    
+    def calculate_pixel_difference(self, img1, img2, diff_gray=None):
+        """Calculate pixel-wise differences between two images (diff_gray: precomputed difference_map)"""
         try:
-            # Calculate absolute difference
-            diff = cv2.absdiff(img1, img2)
-            
             # Calculate different metrics
             total_pixels = img1.shape[0] * img1.shape[1]
             
             # Count pixels with any difference
-            diff_gray = cv2.cvtColor(diff, cv2.COLOR_RGB2GRAY)
+            if diff_gray is None:
+                diff_gray = self.difference_map(img1, img2)
             different_pixels = np.count_nonzero(diff_gray > 5)  # threshold of 5 for noise tolerance
             pixel_difference_percentage = (different_pixels / total_pixels) * 100
             
@@ -194,6 +194,273 @@ class ImageComparison:
             self.logger.error(f"Failed to detect layout shifts: {str(e)}")
             raise
     
+    def detect_moved_components(self, img1, img2, cell_size=16, min_shift=64, diff_threshold=8,
+                                min_patch_std=6, max_candidates=16, match_threshold=0.9,
+                                ambiguity_margin=0.05, max_patches=1000, min_component_patches=4):
+        """Detect components that moved or were duplicated anywhere on the page.
+        
+        The baseline is indexed as 2x2-cell HOG patch descriptors (one per cell
+        step, computed on a half-resolution proxy) in a KD-tree. Changed patches
+        of the current image are first explained locally: by the baseline at
+        the same position (within min_shift) or at the page's dominant shift
+        when the whole layout was pushed. Only the remaining patches (at most
+        max_patches) are queried against the index. Candidates are verified and
+        aligned at full resolution with template matching and rejected when
+        another copy matches within ambiguity_margin (repeated text, icons).
+        Matching patches are grouped into explicit "moved from / to" records of
+        at least min_component_patches patches.
+        """
+        try:
+            gray1 = cv2.cvtColor(img1, cv2.COLOR_RGB2GRAY)
+            gray2 = cv2.cvtColor(img2, cv2.COLOR_RGB2GRAY)
+            patch_size = 2 * cell_size
+            height, width = gray1.shape
+            if height < 2 * patch_size or width < 2 * patch_size:
+                return []
+            
+            # Grid statistics and descriptors are computed on a half-resolution proxy
+            proxy_size = (width // 2, height // 2)
+            proxy1 = cv2.resize(gray1, proxy_size, interpolation=cv2.INTER_AREA)
+            proxy2 = cv2.resize(gray2, proxy_size, interpolation=cv2.INTER_AREA)
+            proxy_cell = cell_size // 2
+            
+            desc1 = self._patch_hog_descriptors(proxy1, proxy_cell)
+            desc2 = self._patch_hog_descriptors(proxy2, proxy_cell)
+            rows, cols = desc1.shape[:2]
+            std1 = self._patch_grid_stats(proxy1, proxy_cell, rows, cols, std=True)
+            std2 = self._patch_grid_stats(proxy2, proxy_cell, rows, cols, std=True)
+            changed = self._patch_grid_stats(cv2.absdiff(proxy1, proxy2), proxy_cell, rows, cols) > diff_threshold
+            queried = changed & (std2 > min_patch_std)
+            
+            # Content pushed by one page-wide shift (e.g. a taller header) is a layout shift, not a move
+            page_shift = self._dominant_page_shift(gray1, gray2, proxy1, proxy2, queried, std1 > min_patch_std,
+                                                   cell_size, rows, cols, diff_threshold)
+            if page_shift is not None:
+                queried &= self._shifted_patch_diff(gray1, gray2, page_shift, cell_size, rows, cols) > diff_threshold
+            
+            # Index the baseline's non-blank patches
+            indexed = np.argwhere(std1 > min_patch_std)
+            queries = np.argwhere(queried)
+            if len(indexed) == 0 or len(queries) == 0:
+                self.logger.info("Detected 0 moved components")
+                return []
+            if len(queries) > max_patches:
+                self.logger.info(f"Verifying {max_patches} of {len(queries)} changed patches for moved components")
+                queries = queries[np.linspace(0, len(queries) - 1, max_patches).astype(int)]
+            tree = KDTree(desc1[indexed[:, 0], indexed[:, 1]])
+            
+            _, neighbours = tree.query(desc2[queries[:, 0], queries[:, 1]], k=min(max_candidates, len(indexed)))
+            
+            patch_moves = []
+            for (row, col), candidates in zip(queries, neighbours):
+                y2, x2 = row * cell_size, col * cell_size
+                patch = gray2[y2:y2 + patch_size, x2:x2 + patch_size]
+                
+                # Content still found near its old position (or where the page shift put it) did not move
+                local_origins = [(y2, x2)]
+                if page_shift is not None:
+                    local_origins.append((y2 - page_shift[0], x2 - page_shift[1]))
+                if any(self._match_patch(gray1, patch, y, x, min_shift, match_threshold, diff_threshold)
+                       for y, x in local_origins):
+                    continue
+                
+                matches = []
+                for candidate in candidates:
+                    # Align the candidate precisely within one cell around its grid position
+                    cy, cx = indexed[candidate] * cell_size
+                    match = self._match_patch(gray1, patch, cy, cx, cell_size, match_threshold, diff_threshold)
+                    if match is not None and all(max(abs(match[1] - y), abs(match[2] - x)) > cell_size
+                                                 for _, y, x in matches):
+                        matches.append(match)
+                if not matches:
+                    continue
+                
+                # Nearest copy first among equally good ones; another copy nearly as good is ambiguous
+                matches.sort(key=lambda m: (-round(m[0], 2), np.hypot(y2 - m[1], x2 - m[2])))
+                score, y1, x1 = matches[0]
+                if len(matches) > 1 and matches[1][0] > score - ambiguity_margin:
+                    continue
+                if np.hypot(y2 - y1, x2 - x1) < min_shift:
+                    continue
+                
+                # The source content still in place means it was duplicated, otherwise moved
+                source_now = gray2[y1:y1 + patch_size, x1:x1 + patch_size]
+                source_then = gray1[y1:y1 + patch_size, x1:x1 + patch_size]
+                duplicated = float(np.mean(cv2.absdiff(source_now, source_then))) <= diff_threshold
+                patch_moves.append((y1, x1, y2, x2, score, duplicated))
+            
+            moved_components = self._group_patch_moves(patch_moves, patch_size, cell_size, min_component_patches)
+            self.logger.info(f"Detected {len(moved_components)} moved components")
+            return moved_components
+            
+        except Exception as e:
+            self.logger.error(f"Failed to detect moved components: {str(e)}")
+            raise
+    
+    def _match_patch(self, gray, patch, y, x, radius, match_threshold, diff_threshold):
+        """Best match (score, y, x) of a patch within radius of (y, x) in gray, or None if none is close enough"""
+        height, width = gray.shape
+        patch_size = patch.shape[0]
+        y0, x0 = max(0, y - radius), max(0, x - radius)
+        search = gray[y0:min(height, y + patch_size + radius), x0:min(width, x + patch_size + radius)]
+        if search.shape[0] < patch_size or search.shape[1] < patch_size:
+            return None
+        response = cv2.matchTemplate(search, patch, cv2.TM_CCOEFF_NORMED)
+        _, score, _, location = cv2.minMaxLoc(response)
+        if score < match_threshold:
+            return None
+        # Correlation ignores brightness and contrast, so also require the same intensities
+        y1, x1 = y0 + location[1], x0 + location[0]
+        residual = cv2.absdiff(gray[y1:y1 + patch_size, x1:x1 + patch_size], patch)
+        if float(np.mean(residual)) > diff_threshold or \
+                np.count_nonzero(residual > 3 * diff_threshold) > 0.01 * residual.size:
+            return None
+        return score, y1, x1
+    
+    def _shifted_patch_diff(self, gray1, gray2, shift, cell_size, rows, cols):
+        """Mean difference of every patch of gray2 from gray1 moved by shift (dy, dx); 255 where it has no source"""
+        dy, dx = shift
+        height, width = gray2.shape
+        diff = np.full_like(gray2, 255)
+        diff[max(dy, 0):height + min(dy, 0), max(dx, 0):width + min(dx, 0)] = cv2.absdiff(
+            gray2[max(dy, 0):height + min(dy, 0), max(dx, 0):width + min(dx, 0)],
+            gray1[max(-dy, 0):height + min(-dy, 0), max(-dx, 0):width + min(-dx, 0)])
+        return self._patch_grid_stats(diff, cell_size, rows, cols)
+    
+    def _dominant_page_shift(self, gray1, gray2, proxy1, proxy2, changed, content, cell_size, rows, cols,
+                             diff_threshold):
+        """Shift (dy, dx) that moved the page's layout, or None.
+        
+        The shift is estimated by phase correlation over the rows that changed and
+        refined to the pixel at full resolution. It only counts as a page shift when
+        the patches it explains span at least half the width of the page content, so
+        a single moved component is never mistaken for one.
+        """
+        changed_rows = np.flatnonzero(changed.any(axis=1))
+        if len(changed_rows) == 0:
+            return None
+        proxy_cell = cell_size // 2
+        top, bottom = changed_rows[0] * proxy_cell, (changed_rows[-1] + 2) * proxy_cell
+        band1 = proxy1[top:bottom].astype(np.float32)
+        band2 = proxy2[top:bottom].astype(np.float32)
+        if band1.shape[0] < 2 or band1.shape[1] < 2:
+            return None
+        window = cv2.createHanningWindow((band1.shape[1], band1.shape[0]), cv2.CV_32F)
+        (shift_x, shift_y), _ = cv2.phaseCorrelate(band1, band2, window)
+        estimate = (int(round(shift_y * 2)), int(round(shift_x * 2)))
+        if estimate == (0, 0):
+            return None
+        
+        best, best_explained = None, None
+        for dy in range(estimate[0] - 1, estimate[0] + 2):
+            for dx in range(estimate[1] - 1, estimate[1] + 2):
+                explained = changed & (self._shifted_patch_diff(gray1, gray2, (dy, dx), cell_size,
+                                                                rows, cols) <= diff_threshold)
+                if best is None or np.count_nonzero(explained) > np.count_nonzero(best_explained):
+                    best, best_explained = (dy, dx), explained
+        
+        explained_cols = np.flatnonzero(best_explained.any(axis=0))
+        content_cols = np.flatnonzero(content.any(axis=0))
+        if len(explained_cols) == 0 or len(content_cols) == 0:
+            return None
+        if explained_cols[-1] - explained_cols[0] + 1 < 0.5 * (content_cols[-1] - content_cols[0] + 1):
+            return None
+        self.logger.info(f"Page layout shifted by {best[1]}, {best[0]} px")
+        return best
+    
+    def _patch_grid_stats(self, gray, cell_size, rows, cols, std=False):
+        """Mean (or standard deviation) of every 2x2-cell patch at one-cell stride"""
+        patch_size = 2 * cell_size
+        values = gray.astype(np.float32)
+        
+        def patch_means(v):
+            means = cv2.boxFilter(v, -1, (patch_size, patch_size), anchor=(0, 0),
+                                  normalize=True, borderType=cv2.BORDER_CONSTANT)
+            return means[:rows * cell_size:cell_size, :cols * cell_size:cell_size]
+        
+        means = patch_means(values)
+        if not std:
+            return means
+        return np.sqrt(np.maximum(patch_means(values * values) - means ** 2, 0))
+    
+    def _patch_hog_descriptors(self, gray, cell_size, orientations=9):
+        """HOG descriptors of every 2x2-cell patch at one-cell stride, shape (rows, cols, 4 * orientations)"""
+        gray = gray.astype(np.float32)
+        gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=1)
+        gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=1)
+        magnitude, angle = cv2.cartToPolar(gx, gy, angleInDegrees=True)
+        
+        # Unsigned orientation bins via a lookup on the 0-360 degree angle
+        angle_steps = cv2.convertScaleAbs(angle, alpha=0.5)
+        bin_lut = ((np.arange(256) * 2 % 180) * orientations // 180).astype(np.uint8)
+        bins = cv2.LUT(angle_steps, bin_lut)
+        
+        # Per-cell orientation histograms (magnitude weighted); area resize sums each cell
+        cells_y, cells_x = gray.shape[0] // cell_size, gray.shape[1] // cell_size
+        magnitude = magnitude[:cells_y * cell_size, :cells_x * cell_size]
+        bins = bins[:cells_y * cell_size, :cells_x * cell_size]
+        histograms = np.stack([
+            cv2.resize(magnitude * (bins == b), (cells_x, cells_y), interpolation=cv2.INTER_AREA)
+            for b in range(orientations)
+        ], axis=2)
+        
+        # Concatenate 2x2 neighbouring cells and apply L2-Hys normalization
+        blocks = np.concatenate([histograms[:-1, :-1], histograms[:-1, 1:],
+                                 histograms[1:, :-1], histograms[1:, 1:]], axis=2)
+        blocks /= np.sqrt(np.sum(blocks ** 2, axis=2, keepdims=True) + 1e-10)
+        np.minimum(blocks, 0.2, out=blocks)
+        blocks /= np.sqrt(np.sum(blocks ** 2, axis=2, keepdims=True) + 1e-10)
+        return blocks.astype(np.float32)
+    
+    def _group_patch_moves(self, patch_moves, patch_size, cell_size, min_patches=1):
+        """Group spatially connected patch matches into component move records of at least min_patches patches"""
+        if not patch_moves:
+            return []
+        
+        moves = np.array(patch_moves, dtype=np.float64)
+        cells = (moves[:, 2:4] // cell_size).astype(int)
+        origin = cells.min(axis=0)
+        grid = np.zeros(tuple(cells.max(axis=0) - origin + 2), dtype=np.uint8)
+        grid[cells[:, 0] - origin[0], cells[:, 1] - origin[1]] = 1
+        # Bridge one-cell gaps (e.g. between words) before labelling
+        grid = ndimage.binary_dilation(grid, structure=np.ones((3, 3)))
+        labels, component_count = ndimage.label(grid, structure=np.ones((3, 3)))
+        member_labels = labels[cells[:, 0] - origin[0], cells[:, 1] - origin[1]]
+        
+        components = []
+        for label in range(1, component_count + 1):
+            component = moves[member_labels == label]
+            shifts = component[:, 2:4] - component[:, 0:2]
+            
+            # Use the most common displacement and drop stray matches that disagree with it
+            quantized = np.round(shifts / cell_size).astype(int)
+            values, counts = np.unique(quantized, axis=0, return_counts=True)
+            consistent = np.abs(quantized - values[np.argmax(counts)]).max(axis=1) <= 1
+            component = component[consistent]
+            if len(component) < min_patches:
+                continue
+            shift_y, shift_x = np.median(shifts[consistent], axis=0)
+            
+            shift_y, shift_x = int(round(shift_y)), int(round(shift_x))
+            to_y = int(component[:, 2].min())
+            to_x = int(component[:, 3].min())
+            to_h = int(component[:, 2].max()) + patch_size - to_y
+            to_w = int(component[:, 3].max()) + patch_size - to_x
+            duplicated = component[:, 5].mean() > 0.5
+            components.append({
+                'type': 'duplicated' if duplicated else 'moved',
+                'original_position': (to_x - shift_x, to_y - shift_y, to_w, to_h),
+                'new_position': (to_x, to_y, to_w, to_h),
+                'shift_x': shift_x,
+                'shift_y': shift_y,
+                'distance': float(np.hypot(shift_x, shift_y)),
+                'patch_count': int(len(component)),
+                'confidence': float(component[:, 4].mean())
+            })
+        
+        components.sort(key=lambda c: c['patch_count'], reverse=True)
+        return components
+    
     def detect_color_differences(self, img1, img2, threshold=20):
         """Detect color and font differences"""
         try:
@@ -342,23 +609,17 @@ class ImageComparison:
             self.logger.error(f"Failed to detect overlapping elements: {str(e)}")
             raise
     
-    def create_difference_heatmap(self, img1, img2, output_path):
-        """Create a heatmap showing differences between images"""
+    def create_difference_heatmap(self, img1, img2, output_path, diff_gray=None):
+        """Create a heatmap showing differences between images, blended over img1.
+        
+        diff_gray is the difference_map of the pair when already computed.
+        """
         try:
-            # Calculate difference
-            diff = cv2.absdiff(img1, img2)
-            diff_gray = cv2.cvtColor(diff, cv2.COLOR_RGB2GRAY)
-            
-            # Apply colormap
-            heatmap = cv2.applyColorMap(diff_gray, cv2.COLORMAP_JET)
-            
-            # Blend with original image
-            blended = cv2.addWeighted(img1, 0.7, heatmap, 0.3, 0)
-            
-            # Save heatmap
-            cv2.imwrite(output_path, cv2.cvtColor(blended, cv2.COLOR_RGB2BGR))
+            if diff_gray is None:
+                diff_gray = self.difference_map(img1, img2)
             
-            self.logger.info(f"Difference heatmap saved to: {output_path}")
+            # Colormap lookup, blended with the original image
+            HeatmapRenderer().save(diff_gray, output_path, base=cv2.cvtColor(img1, cv2.COLOR_RGB2BGR))
             return output_path
             
         except Exception as e:
@@ -394,7 +655,17 @@ class ImageComparison:
             for i, diff in enumerate(differences[:10]):  # Limit to top 10 differences
                 color = colors[i % len(colors)]
                 
-                if 'position' in diff:
+                if diff.get('original_position') and diff.get('new_position'):
+                    # Moved content: source on the first image, destination on the second
+                    x, y, w, h = diff['original_position']
+                    draw.rectangle([x, y, x+w, y+h], outline=color, width=3)
+                    draw.text((x, y-20), f"Diff {i+1}", fill=color, font=font)
+                    
+                    x, y, w, h = diff['new_position']
+                    draw.rectangle([x+img1.shape[1]+20, y, x+w+img1.shape[1]+20, y+h], outline=color, width=3)
+                    draw.text((x+img1.shape[1]+20, y-20), f"Diff {i+1}", fill=color, font=font)
+                
+                elif 'position' in diff:
                     x, y, w, h = diff['position']
                     
                     # Draw rectangle on first image
@@ -430,9 +701,11 @@ class ImageComparison:
             mse = self.calculate_mse(img1, img2)
             results['mse'] = mse
             
-            # Calculate Pixel Differences
-            pixel_metrics = self.calculate_pixel_difference(img1, img2)
+            # Calculate Pixel Differences (the difference map is kept for the heatmaps)
+            difference_map = self.difference_map(img1, img2)
+            pixel_metrics = self.calculate_pixel_difference(img1, img2, difference_map)
             results['pixel_metrics'] = pixel_metrics
+            results['difference_map'] = difference_map
             
             # Calculate additional metrics
             # Peak Signal-to-Noise Ratio (PSNR)
@@ -456,6 +729,10 @@ class ImageComparison:
 
 # Example usage
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
     comparator = ImageComparison()
     
     # Example comparison
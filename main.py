@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
+import logging
 import os
 import webbrowser
 import shutil
@@ -2074,6 +2075,11 @@ Generated by Visual AI Regression Module
         self.wcag_text.config(state="disabled")
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    
     # Create the main window
     root = tk.Tk()
     
@@ -1,9 +1,16 @@
 import os
 import json
+import time
+import atexit
+import pickle
+import threading
+import multiprocessing
+from collections import namedtuple
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
 from PIL import Image, ImageDraw, ImageFont
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -20,19 +27,197 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
+from report_serializer import ReportSerializer, sidecar_path
+from heatmap_renderer import HeatmapRenderer
+from artifact_store import ArtifactStore
+from tile_pyramid import (TilePyramidBuilder, tile_viewer_html, TILE_VIEWER_HTML, TILE_SIZE,
+                          TILE_PYRAMID_MIN_SIZE)
+
+# Report artifacts in build order, with the artifacts each one needs
+REPORT_ARTIFACTS = {
+    'pdf': (),
+    'json': (),
+    'visual': (),
+    'sidebyside': (),
+    'heatmap': (),
+    # The package bundles the report files and images built before it
+    'package': ('pdf', 'json', 'visual', 'sidebyside', 'heatmap'),
+    'summary': (),
+    # The HTML report embeds the images (export links to other formats show when built)
+    'html': ('visual', 'sidebyside', 'heatmap')
+}
+
+# Artifacts that are not pulled in by another one, but are built before it when requested
+# (the HTML report links to these exports and shows them as unavailable otherwise)
+REPORT_ARTIFACT_LINKS = {
+    'html': ('pdf', 'json', 'package')
+}
+
+# Artifacts rendered in worker processes; the others combine them and run in the caller
+PARALLEL_REPORT_ARTIFACTS = ('pdf', 'json', 'visual', 'sidebyside', 'heatmap', 'summary')
+
+# Image artifacts and the analysis results they read (the rest is not sent to their workers)
+REPORT_IMAGE_ARTIFACTS = {
+    'visual': ('screenshots', 'annotated_comparison_path'),
+    'sidebyside': ('screenshots',),
+    'heatmap': ('screenshots', 'heatmap_path', 'difference_map')
+}
+
+# Analysis arrays at least this large (SSIM and difference maps) reach report workers through
+# shared memory instead of being pickled into every task
+SHARED_ARRAY_MIN_BYTES = 1 << 16
+
+# Tiled report images that pan and zoom together (same page geometry)
+TILE_SYNC_GROUPS = {
+    'url1_screenshot': 'page',
+    'url2_screenshot': 'page',
+    'heatmap': 'page'
+}
+
+# Already compressed formats, stored in the ZIP package without deflating them again
+STORED_EXTENSIONS = ('.png', '.webp', '.jpg', '.jpeg', '.npz', '.zip')
+
+REPORT_ARTIFACT_SUFFIXES = {
+    'pdf': '.pdf',
+    'json': '.json',
+    'visual': '_visual_comparison.png',
+    'sidebyside': '_side_by_side.png',
+    'heatmap': '_difference_heatmap.png',
+    'package': '_complete_package.zip',
+    'summary': '_summary.html',
+    'html': '.html'
+}
+
+# Report workers start from a fresh interpreter: forking the multithreaded caller could copy
+# locks held by its other threads into the children
+REPORT_POOL_START_METHOD = ('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods()
+                            else 'spawn')
+
+# Process pool shared by all report generators, kept until exit and recreated when the
+# worker count or working directory changes
+_report_pool = None
+_report_pool_key = None
+_report_pool_lock = threading.Lock()
+
+# Report generators in a worker process, by (output_dir, artifact store dir)
+_worker_generators = {}
+
+
+def _get_report_pool(workers):
+    """The shared report process pool with the given number of workers"""
+    global _report_pool, _report_pool_key
+    # Workers keep the working directory they started in, which relative report paths resolve against
+    key = (workers, os.getcwd())
+    with _report_pool_lock:
+        if _report_pool is None or _report_pool_key != key:
+            if _report_pool is not None:
+                _report_pool.shutdown(wait=False)
+            _report_pool = ProcessPoolExecutor(max_workers=workers,
+                                               mp_context=multiprocessing.get_context(REPORT_POOL_START_METHOD))
+            _report_pool_key = key
+        return _report_pool
+
+
+def _discard_report_pool(pool):
+    """Drop a broken pool so the next report starts a new one"""
+    global _report_pool, _report_pool_key
+    with _report_pool_lock:
+        if _report_pool is pool:
+            _report_pool = _report_pool_key = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_report_pool():
+    """Stop the report worker processes (registered to run at exit)"""
+    global _report_pool, _report_pool_key
+    with _report_pool_lock:
+        pool, _report_pool, _report_pool_key = _report_pool, None, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_report_pool)
+
+
+def _report_worker_generator(output_dir, store_dir):
+    key = (output_dir, store_dir)
+    if key not in _worker_generators:
+        _worker_generators[key] = ReportGenerator(output_dir=output_dir, artifact_store=ArtifactStore(store_dir))
+    return _worker_generators[key]
+
+
+# Picklable reference to an array in a shared memory block
+_SharedArray = namedtuple('_SharedArray', 'name shape dtype')
+
+
+def _share_arrays(value, blocks, min_bytes=SHARED_ARRAY_MIN_BYTES):
+    """Copy of value (dicts and lists are walked) with arrays of min_bytes or more moved to shared memory.
+
+    The blocks created are appended to blocks; the caller unlinks them.
+    """
+    if isinstance(value, np.ndarray) and value.nbytes >= min_bytes and not value.dtype.hasobject:
+        block = shared_memory.SharedMemory(create=True, size=max(1, value.nbytes))
+        blocks.append(block)
+        np.ndarray(value.shape, dtype=value.dtype, buffer=block.buf)[...] = value
+        return _SharedArray(block.name, value.shape, value.dtype.str)
+    if isinstance(value, dict):
+        return {key: _share_arrays(item, blocks, min_bytes) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_share_arrays(item, blocks, min_bytes) for item in value]
+    return value
+
+
+def _attach_arrays(value, blocks):
+    """Copy of a _share_arrays result with read-only views in place of the shared arrays"""
+    if isinstance(value, _SharedArray):
+        block = shared_memory.SharedMemory(name=value.name)
+        blocks.append(block)
+        array = np.ndarray(value.shape, dtype=value.dtype, buffer=block.buf)
+        array.flags.writeable = False
+        return array
+    if isinstance(value, dict):
+        return {key: _attach_arrays(item, blocks) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_attach_arrays(item, blocks) for item in value]
+    return value
+
+
+def _release_images(blocks, unlink=False):
+    for block in blocks:
+        try:
+            block.close()
+            if unlink:
+                block.unlink()
+        except (BufferError, OSError):
+            # Views still referenced (e.g. by a traceback) keep the mapping until they are freed
+            pass
+
+
+def _render_report_artifact(artifact, analysis_results, config, output_path, image_specs, output_dir, store_dir):
+    """Render one independent report artifact (runs in a worker process); returns its duration"""
+    start = time.time()
+    blocks = []
+    try:
+        images = _attach_arrays(image_specs or {}, blocks)
+        analysis_results = _attach_arrays(analysis_results, blocks)
+        generator = _report_worker_generator(output_dir, store_dir)
+        generator._build_report_artifact(artifact, analysis_results, config, {}, output_path, images or None)
+    finally:
+        images = analysis_results = None
+        _release_images(blocks)
+    return time.time() - start
+
 
 class ReportGenerator:
-    def __init__(self, output_dir="reports"):
+    def __init__(self, output_dir="reports", artifact_store=None):
         self.output_dir = output_dir
+        # Screenshots and analysis images are linked into reports from this store instead of copied
+        self.artifact_store = artifact_store or ArtifactStore()
         self.setup_logging()
         self.create_output_directory()
         
     def setup_logging(self):
         """Setup logging for report generator"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
         self.logger = logging.getLogger(__name__)
     
     def create_output_directory(self):
@@ -41,57 +226,55 @@ class ReportGenerator:
             os.makedirs(self.output_dir)
             self.logger.info(f"Created output directory: {self.output_dir}")
     
-    def generate_comprehensive_report(self, analysis_results, config):
-        """Generate a comprehensive visual regression report with sharing capabilities"""
+    def generate_comprehensive_report(self, analysis_results, config, images=None):
+        """Generate a comprehensive visual regression report with sharing capabilities.
+        
+        config['report_formats'] lists the artifacts to build (keys of REPORT_ARTIFACTS,
+        default: all); the artifacts they need are built too. Build times per artifact
+        are stored in analysis_results['report_timings'].
+        
+        images optionally holds the decoded screenshots ({'url1': rgb, 'url2': rgb}, as
+        loaded by ImageComparison.load_images); otherwise the screenshot files are decoded
+        once here. With config['report_workers'] > 1 (default: CPU count) the independent
+        artifacts render in a process pool that shares the images through shared memory,
+        and the HTML report and package are built as soon as their inputs are ready. The
+        pool is started once and reused by later reports until shutdown_report_pool().
+        """
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            report_name = f"visual_regression_report_{timestamp}"
-            
-            # Generate different report formats
-            reports = {}
-            
-            # 1. PDF Report (generate first)
-            pdf_path = os.path.join(self.output_dir, f"{report_name}.pdf")
-            self.generate_pdf_report(analysis_results, config, pdf_path)
-            reports['pdf'] = pdf_path
-            
-            # 2. JSON Report (generate second)
-            json_path = os.path.join(self.output_dir, f"{report_name}.json")
-            self.generate_json_report(analysis_results, config, json_path)
-            reports['json'] = json_path
-            
-            # 3. Enhanced Visual Comparison Images
-            visual_path = os.path.join(self.output_dir, f"{report_name}_visual_comparison.png")
-            self.generate_enhanced_visual_comparison(analysis_results, visual_path)
-            reports['visual'] = visual_path
-            
-            # 4. Side-by-side comparison
-            sidebyside_path = os.path.join(self.output_dir, f"{report_name}_side_by_side.png")
-            self.generate_side_by_side_comparison(analysis_results, sidebyside_path)
-            reports['sidebyside'] = sidebyside_path
-            
-            # 5. Difference heatmap
-            heatmap_path = os.path.join(self.output_dir, f"{report_name}_difference_heatmap.png")
-            self.generate_difference_heatmap(analysis_results, heatmap_path)
-            reports['heatmap'] = heatmap_path
-            
-            # 6. Shareable ZIP package
-            zip_path = os.path.join(self.output_dir, f"{report_name}_complete_package.zip")
-            self.create_shareable_package(reports, analysis_results, config, zip_path)
-            reports['package'] = zip_path
-            
-            # 7. Summary report for quick sharing
-            summary_path = os.path.join(self.output_dir, f"{report_name}_summary.html")
-            self.generate_summary_report(analysis_results, config, summary_path)
-            reports['summary'] = summary_path
-            
-            # 8. Enhanced HTML Report with sharing buttons (generate last with all file references)
-            html_path = os.path.join(self.output_dir, f"{report_name}.html")
-            # Add reports to analysis_results so HTML can reference them
-            analysis_results_with_reports = {**analysis_results, 'reports': reports}
-            self.generate_enhanced_html_report(analysis_results_with_reports, config, html_path)
-            reports['html'] = html_path
-            reports['summary'] = summary_path
+            start = time.time()
+            config = config or {}
+            # The run id keeps report names unique across concurrent runs
+            run_id = analysis_results.get('run_id') or datetime.now().strftime("%Y%m%d_%H%M%S")
+            report_name = f"visual_regression_report_{run_id}"
+            artifacts = self.resolve_report_artifacts(config.get('report_formats'))
+            paths = {artifact: os.path.join(self.output_dir, report_name + REPORT_ARTIFACT_SUFFIXES[artifact])
+                     for artifact in artifacts}
+            report_images = self._report_images(analysis_results, artifacts, images)
+            
+            # Generate the requested report formats
+            parallel = [artifact for artifact in artifacts if artifact in PARALLEL_REPORT_ARTIFACTS]
+            workers = min(config.get('report_workers') or os.cpu_count() or 1, len(parallel))
+            reports = None
+            if workers > 1:
+                try:
+                    reports, timings = self._build_report_artifacts_parallel(
+                        artifacts, analysis_results, config, paths, report_images, workers)
+                except (OSError, BrokenProcessPool, pickle.PicklingError) as e:
+                    self.logger.warning(f"Parallel report rendering failed, rendering in sequence: {str(e)}")
+            if reports is None:
+                reports = {}
+                timings = {}
+                for artifact in artifacts:
+                    artifact_start = time.time()
+                    self._build_report_artifact(artifact, analysis_results, config, reports, paths[artifact],
+                                                report_images)
+                    reports[artifact] = paths[artifact]
+                    timings[artifact] = time.time() - artifact_start
+            
+            # Report in build order, however the artifacts finished
+            reports = {**{artifact: reports.pop(artifact) for artifact in artifacts}, **reports}
+            analysis_results['report_timings'] = {artifact: timings[artifact] for artifact in artifacts}
+            analysis_results['report_duration'] = time.time() - start
             
             self.logger.info(f"Comprehensive report generated: {reports}")
             return reports
@@ -99,9 +282,149 @@ class ReportGenerator:
         except Exception as e:
             self.logger.error(f"Failed to generate comprehensive report: {str(e)}")
             raise
+    
+    def resolve_report_artifacts(self, formats=None):
+        """Requested report formats plus everything they depend on, in build order"""
+        if formats is None:
+            return list(REPORT_ARTIFACTS)
+        if isinstance(formats, str):
+            formats = [formats]
+        
+        unknown = [name for name in formats if name not in REPORT_ARTIFACTS]
+        if unknown:
+            raise ValueError(f"Unknown report formats: {', '.join(unknown)} "
+                             f"(available: {', '.join(REPORT_ARTIFACTS)})")
+        
+        needed = set()
+        pending = list(formats)
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(REPORT_ARTIFACTS[name])
+        return [name for name in REPORT_ARTIFACTS if name in needed]
+    
+    def _report_ready(self, artifact, artifacts, reports):
+        """Whether everything an artifact needs (or links to, when requested) is built"""
+        needed = REPORT_ARTIFACTS[artifact] + REPORT_ARTIFACT_LINKS.get(artifact, ())
+        return all(name in reports for name in needed if name in artifacts)
+    
+    def _report_images(self, analysis_results, artifacts, images=None):
+        """Decoded screenshots (BGR) for the image artifacts that render from them, or None"""
+        needed = ('sidebyside' in artifacts or
+                  ('visual' in artifacts and not os.path.exists(analysis_results.get('annotated_comparison_path') or '')) or
+                  ('heatmap' in artifacts and not os.path.exists(analysis_results.get('heatmap_path') or '') and
+                   not isinstance(analysis_results.get('difference_map'), np.ndarray)))
+        if not needed:
+            return None
+        if images and images.get('url1') is not None and images.get('url2') is not None:
+            return {key: cv2.cvtColor(images[key], cv2.COLOR_RGB2BGR) for key in ('url1', 'url2')}
+        return self._load_report_images(analysis_results)
+    
+    def _load_report_images(self, analysis_results):
+        """Decode the screenshot files (BGR); None when either is missing or unreadable"""
+        screenshots = analysis_results.get('screenshots', {})
+        url1_path = screenshots.get('url1')
+        url2_path = screenshots.get('url2')
+        if not (url1_path and url2_path and os.path.exists(url1_path) and os.path.exists(url2_path)):
+            return None
+        img1 = cv2.imread(url1_path)
+        img2 = cv2.imread(url2_path)
+        if img1 is None or img2 is None:
+            return None
+        return {'url1': img1, 'url2': img2}
+    
+    def _build_report_artifacts_parallel(self, artifacts, analysis_results, config, paths, images, workers):
+        """Render independent artifacts in worker processes, building the others once their inputs are done"""
+        reports = {}
+        timings = {}
+        blocks = []
+        running = {}
+        pool = _get_report_pool(workers)
+        try:
+            image_specs = _share_arrays(dict(images or {}), blocks, min_bytes=0)
+            # Large analysis arrays are shared once as well instead of being pickled into every task
+            shared_results = _share_arrays(analysis_results, blocks)
+            for artifact in artifacts:
+                if artifact in PARALLEL_REPORT_ARTIFACTS:
+                    if artifact in REPORT_IMAGE_ARTIFACTS:
+                        task_results = {key: shared_results[key] for key in REPORT_IMAGE_ARTIFACTS[artifact]
+                                        if key in shared_results}
+                        task_images = image_specs
+                    else:
+                        task_results = shared_results
+                        task_images = None
+                    future = pool.submit(_render_report_artifact, artifact, task_results, config,
+                                         paths[artifact], task_images, self.output_dir,
+                                         self.artifact_store.store_dir)
+                    running[future] = artifact
+                
+            pending = [artifact for artifact in artifacts if artifact not in PARALLEL_REPORT_ARTIFACTS]
+            while running or pending:
+                ready = [artifact for artifact in pending if self._report_ready(artifact, artifacts, reports)]
+                for artifact in ready:
+                    start = time.time()
+                    self._build_report_artifact(artifact, analysis_results, config, reports, paths[artifact],
+                                                images)
+                    reports[artifact] = paths[artifact]
+                    timings[artifact] = time.time() - start
+                    pending.remove(artifact)
+                if ready:
+                    continue
+                if not running:
+                    raise RuntimeError(f"Report artifacts with unbuilt inputs: {', '.join(pending)}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    artifact = running.pop(future)
+                    timings[artifact] = future.result()
+                    reports[artifact] = paths[artifact]
+        except BrokenProcessPool:
+            _discard_report_pool(pool)
+            raise
+        finally:
+            # The pool outlives this report: drop its queued tasks and let started ones
+            # finish with the shared memory before it is unlinked
+            for future in running:
+                future.cancel()
+            wait(running)
+            _release_images(blocks, unlink=True)
+        return reports, timings
+    
+    def _build_report_artifact(self, artifact, analysis_results, config, reports, output_path, images=None):
+        """Build one report artifact; reports holds the artifacts built so far, images the decoded screenshots"""
+        # A file linked from the artifact store is replaced, never written through
+        self.artifact_store.detach(output_path)
+        if artifact == 'pdf':
+            self.generate_pdf_report(analysis_results, config, output_path)
+        elif artifact == 'json':
+            self.generate_json_report(analysis_results, config, output_path)
+        elif artifact == 'visual':
+            # Enhanced visual comparison image
+            self.generate_enhanced_visual_comparison(analysis_results, output_path, images)
+        elif artifact == 'sidebyside':
+            self.generate_side_by_side_comparison(analysis_results, output_path, images)
+        elif artifact == 'heatmap':
+            self.generate_difference_heatmap(analysis_results, output_path, images)
+        elif artifact == 'package':
+            # Shareable ZIP package of the files it depends on
+            package_reports = {name: reports[name] for name in REPORT_ARTIFACTS['package'] if name in reports}
+            self.create_shareable_package(package_reports, analysis_results, config, output_path)
+        elif artifact == 'summary':
+            # Summary report for quick sharing
+            self.generate_summary_report(analysis_results, config, output_path)
+        elif artifact == 'html':
+            # Enhanced HTML report with sharing buttons; reports are added so it can reference them
+            # (the copied screenshots are registered in the same dict)
+            analysis_results_with_reports = {**analysis_results, 'reports': reports}
+            self.generate_enhanced_html_report(analysis_results_with_reports, config, output_path, images)
 
-    def generate_enhanced_html_report(self, analysis_results, config, output_path):
-        """Generate enhanced HTML report with sharing capabilities"""
+    def generate_enhanced_html_report(self, analysis_results, config, output_path, images=None):
+        """Generate enhanced HTML report with sharing capabilities.
+        
+        Images larger than config['report_tile_min_size'] (default 2048 px on the
+        longest side) are written as deep-zoom tile pyramids next to the report and
+        shown in a tile viewer; images holds the decoded screenshots (BGR), if any.
+        """
         try:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
@@ -117,12 +440,24 @@ class ReportGenerator:
             # Copy screenshot files to reports directory for HTML access
             self._copy_screenshots_to_reports(analysis_results, base_name)
             
+            # Large images are shown through deep-zoom tiles
+            tile_builder = self._tile_builder(config)
+            tile_root = f"{base_name}_tiles"
+            images = images or {}
+            
             # Pre-generate image HTML content to avoid f-string conflicts
-            url1_screenshot_html = self._generate_image_html(analysis_results, 'url1_screenshot', 'Original screenshot')
-            url2_screenshot_html = self._generate_image_html(analysis_results, 'url2_screenshot', 'Comparison screenshot')
-            sidebyside_html = self._generate_image_html(analysis_results, 'sidebyside', 'Side-by-side comparison')
-            heatmap_html = self._generate_image_html(analysis_results, 'heatmap', 'Difference heatmap')
-            visual_html = self._generate_image_html(analysis_results, 'visual', 'Visual comparison')
+            url1_screenshot_html = self._generate_image_html(analysis_results, 'url1_screenshot', 'Original screenshot',
+                                                             tile_builder, tile_root, images.get('url1'))
+            url2_screenshot_html = self._generate_image_html(analysis_results, 'url2_screenshot', 'Comparison screenshot',
+                                                             tile_builder, tile_root, images.get('url2'))
+            sidebyside_html = self._generate_image_html(analysis_results, 'sidebyside', 'Side-by-side comparison',
+                                                        tile_builder, tile_root)
+            heatmap_html = self._generate_image_html(analysis_results, 'heatmap', 'Difference heatmap',
+                                                     tile_builder, tile_root)
+            visual_html = self._generate_image_html(analysis_results, 'visual', 'Visual comparison',
+                                                    tile_builder, tile_root)
+            image_html = (url1_screenshot_html, url2_screenshot_html, sidebyside_html, heatmap_html, visual_html)
+            tile_viewer_assets = TILE_VIEWER_HTML if any('class="tile-viewer"' in html for html in image_html) else ''
             
             # Pre-generate section HTML content
             analysis_sections_html = self._generate_analysis_sections_html(analysis_results, ai_analysis, config)
@@ -534,6 +869,7 @@ class ReportGenerator:
                         window.open(src, '_blank');
                     }}
                 </script>
+                {tile_viewer_assets}
             </head>
             <body>
                 <div class="header">
@@ -734,6 +1070,18 @@ class ReportGenerator:
                 if len(layout_shifts) > 5:
                     html += f'<p><em>... and {len(layout_shifts) - 5} more</em></p>'
                 html += '</div>'
+            
+            moved_components = analysis_results.get('moved_components', [])
+            if moved_components:
+                html += '<div class="difference-highlight">'
+                html += '<h4>🔀 Moved Components Detected</h4>'
+                for i, move in enumerate(moved_components[:5]):  # Show first 5
+                    html += (f'<p><strong>Component {i+1} ({move["type"]}):</strong> '
+                             f'from {move["original_position"]} to {move["new_position"]} '
+                             f'({move["distance"]:.1f}px)</p>')
+                if len(moved_components) > 5:
+                    html += f'<p><em>... and {len(moved_components) - 5} more</em></p>'
+                html += '</div>'
         
         # Color findings (only if enabled)
         if config is None or config.get('font_color', True):
@@ -1251,12 +1599,16 @@ class ReportGenerator:
             story.append(Paragraph(f"Confidence: {ai.get('confidence', 0):.1%}", styles['Normal']))
     
     def generate_json_report(self, analysis_results, config, output_path):
-        """Generate JSON report for programmatic access"""
+        """Generate JSON report for programmatic access.
+        
+        Difference images and other large arrays are stored in an .npz sidecar
+        (see ReportSerializer); ReportSerializer().load(output_path) reads both back.
+        """
         try:
             report_data = {
                 'metadata': {
                     'generated_at': datetime.now().isoformat(),
-                    'report_version': '1.0',
+                    'report_version': '1.1',
                     'generator': 'Visual AI Regression Module'
                 },
                 'configuration': config,
@@ -1273,8 +1625,7 @@ class ReportGenerator:
                 }
             }
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(report_data, f, indent=2, default=str)
+            ReportSerializer().dump(report_data, output_path)
             
             self.logger.info(f"JSON report saved to: {output_path}")
             
@@ -1282,13 +1633,59 @@ class ReportGenerator:
             self.logger.error(f"Failed to generate JSON report: {str(e)}")
             raise
     
-    def generate_enhanced_visual_comparison(self, analysis_results, output_path):
-        """Generate enhanced visual comparison with annotations"""
+    def generate_gate_failure_report(self, analysis_results, config):
+        """Generate the minimal JSON report written when a fail-fast gate stops the analysis"""
+        try:
+            run_id = analysis_results.get('run_id') or datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_path = os.path.join(self.output_dir, f"visual_regression_report_{run_id}_gate_failure.json")
+            
+            pixel_metrics = analysis_results.get('pixel_metrics', {})
+            report_data = {
+                'metadata': {
+                    'generated_at': datetime.now().isoformat(),
+                    'report_version': '1.0',
+                    'generator': 'Visual AI Regression Module',
+                    'report_type': 'gate_failure'
+                },
+                'status': 'failed',
+                'gate_failure': analysis_results.get('gate_failure', {}),
+                'gating_thresholds': config.get('gating_thresholds', {}),
+                'configuration': {
+                    'url1': config.get('url1', config.get('baseline_image')),
+                    'url2': config.get('url2', config.get('current_image'))
+                },
+                'metrics': {
+                    'ssim': float(analysis_results.get('ssim', 0)),
+                    'mse': float(analysis_results.get('mse', 0)),
+                    'pixel_difference_percentage': float(pixel_metrics.get('pixel_difference_percentage', 0)),
+                    'different_pixels': int(pixel_metrics.get('different_pixels', 0)),
+                    'total_pixels': int(pixel_metrics.get('total_pixels', 0)),
+                    'layout_shifts': len(analysis_results.get('layout_shifts', [])),
+                    'moved_components': len(analysis_results.get('moved_components', [])),
+                    'color_differences': len(analysis_results.get('color_differences', [])),
+                    'missing_elements': len(analysis_results.get('missing_elements', [])),
+                    'new_elements': len(analysis_results.get('new_elements', []))
+                },
+                'screenshots': analysis_results.get('screenshots', {}),
+                'duration': analysis_results.get('duration')
+            }
+            
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(report_data, f, indent=2, default=str)
+            
+            self.logger.info(f"Gate failure report saved to: {output_path}")
+            return {'json': output_path}
+            
+        except Exception as e:
+            self.logger.error(f"Failed to generate gate failure report: {str(e)}")
+            raise
+    
+    def generate_enhanced_visual_comparison(self, analysis_results, output_path, images=None):
+        """Generate enhanced visual comparison with annotations (images: decoded BGR screenshots)"""
         try:
             # First priority: Use annotated comparison if available (this is the enhanced visual comparison)
             if 'annotated_comparison_path' in analysis_results and os.path.exists(analysis_results['annotated_comparison_path']):
-                import shutil
-                shutil.copy2(analysis_results['annotated_comparison_path'], output_path)
+                self._materialize(analysis_results['annotated_comparison_path'], output_path)
                 self.logger.info(f"Enhanced visual comparison (annotated) copied to: {output_path}")
                 return output_path
             
@@ -1296,8 +1693,8 @@ class ReportGenerator:
             screenshots = analysis_results.get('screenshots', {})
             comparisons = analysis_results.get('comparisons', {})
             
-            if screenshots.get('url1') and screenshots.get('url2'):
-                self._create_annotated_comparison_from_data(analysis_results, output_path)
+            if images or (screenshots.get('url1') and screenshots.get('url2')):
+                self._create_annotated_comparison_from_data(analysis_results, output_path, images)
                 return output_path
             else:
                 # Create a placeholder image
@@ -1311,16 +1708,14 @@ class ReportGenerator:
                                          f"Error generating annotated comparison: {str(e)}")
             return output_path
 
-    def generate_side_by_side_comparison(self, analysis_results, output_path):
-        """Generate side-by-side comparison image"""
+    def generate_side_by_side_comparison(self, analysis_results, output_path, images=None):
+        """Generate side-by-side comparison image (images: decoded BGR screenshots)"""
         try:
             # Create side-by-side from screenshots (NOT from annotated comparison)
-            screenshots = analysis_results.get('screenshots', {})
-            url1_screenshot = screenshots.get('url1')
-            url2_screenshot = screenshots.get('url2')
+            images = images or self._load_report_images(analysis_results)
             
-            if url1_screenshot and url2_screenshot and os.path.exists(url1_screenshot) and os.path.exists(url2_screenshot):
-                self._create_side_by_side_from_screenshots(url1_screenshot, url2_screenshot, output_path)
+            if images:
+                self._create_side_by_side_from_screenshots(images['url1'], images['url2'], output_path)
                 self.logger.info(f"Side-by-side comparison created from screenshots: {output_path}")
                 return output_path
             else:
@@ -1335,20 +1730,20 @@ class ReportGenerator:
                                          f"Error generating side-by-side comparison: {str(e)}")
             return output_path
 
-    def generate_difference_heatmap(self, analysis_results, output_path):
-        """Generate difference heatmap image"""
+    def generate_difference_heatmap(self, analysis_results, output_path, images=None):
+        """Generate difference heatmap image (images: decoded BGR screenshots)"""
         try:
             # First priority: Use existing heatmap from analysis
             if 'heatmap_path' in analysis_results and os.path.exists(analysis_results['heatmap_path']):
-                import shutil
-                shutil.copy2(analysis_results['heatmap_path'], output_path)
+                self._materialize(analysis_results['heatmap_path'], output_path)
                 self.logger.info(f"Difference heatmap copied to: {output_path}")
                 return output_path
             
-            # Fallback: Try to create heatmap from screenshot data
+            # Fallback: Try to create heatmap from the difference map or screenshot data
             screenshots = analysis_results.get('screenshots', {})
-            if screenshots.get('url1') and screenshots.get('url2'):
-                self._create_heatmap_from_screenshots(analysis_results, output_path)
+            if images or isinstance(analysis_results.get('difference_map'), np.ndarray) or \
+                    (screenshots.get('url1') and screenshots.get('url2')):
+                self._create_heatmap_from_screenshots(analysis_results, output_path, images)
                 return output_path
             else:
                 # Create placeholder with specific heatmap description
@@ -1362,14 +1757,13 @@ class ReportGenerator:
                                          f"Error generating heatmap: {str(e)}")
             return output_path
 
-    def _create_side_by_side_from_screenshots(self, img1_path, img2_path, output_path):
-        """Create side-by-side comparison from screenshot paths"""
+    def _create_side_by_side_from_screenshots(self, img1, img2, output_path):
+        """Create side-by-side comparison from decoded BGR screenshots"""
         try:
             from PIL import Image, ImageDraw, ImageFont
             
-            # Load images
-            img1 = Image.open(img1_path)
-            img2 = Image.open(img2_path)
+            img1 = Image.fromarray(cv2.cvtColor(img1, cv2.COLOR_BGR2RGB))
+            img2 = Image.fromarray(cv2.cvtColor(img2, cv2.COLOR_BGR2RGB))
             
             # Resize to same height
             max_height = max(img1.height, img2.height)
@@ -1475,33 +1869,23 @@ class ReportGenerator:
         except Exception as e:
             self.logger.error(f"Failed to create placeholder image: {str(e)}")
 
-    def _create_annotated_comparison_from_data(self, analysis_results, output_path):
+    def _create_annotated_comparison_from_data(self, analysis_results, output_path, images=None):
         """Create annotated comparison from analysis data when original is not available"""
         try:
             import cv2
             import numpy as np
             from PIL import Image, ImageDraw, ImageFont
             
-            screenshots = analysis_results.get('screenshots', {})
             comparisons = analysis_results.get('comparisons', {})
             
-            # Load the screenshots
-            url1_path = screenshots.get('url1')
-            url2_path = screenshots.get('url2')
-            
-            if not (url1_path and url2_path and os.path.exists(url1_path) and os.path.exists(url2_path)):
+            # Decoded screenshots, or else the screenshot files
+            images = images or self._load_report_images(analysis_results)
+            if not images:
                 self._create_placeholder_image(output_path, "Enhanced Visual Comparison", 
                                              "Screenshot data not available for annotated comparison")
                 return
-            
-            # Load images
-            img1 = cv2.imread(url1_path)
-            img2 = cv2.imread(url2_path)
-            
-            if img1 is None or img2 is None:
-                self._create_placeholder_image(output_path, "Enhanced Visual Comparison", 
-                                             "Could not load screenshot images")
-                return
+            img1 = images['url1']
+            img2 = images['url2']
             
             # Resize images to match if needed
             if img1.shape != img2.shape:
@@ -1540,77 +1924,48 @@ class ReportGenerator:
             self._create_placeholder_image(output_path, "Enhanced Visual Comparison", 
                                          f"Error creating annotated comparison: {str(e)}")
 
-    def _create_heatmap_from_screenshots(self, analysis_results, output_path):
-        """Create difference heatmap from screenshots when original is not available"""
+    def _create_heatmap_from_screenshots(self, analysis_results, output_path, images=None):
+        """Create difference heatmap from the analysis difference map, or from the screenshots"""
         try:
-            import cv2
-            import numpy as np
-            import matplotlib.pyplot as plt
-            import matplotlib.colors as mcolors
-            
-            screenshots = analysis_results.get('screenshots', {})
-            
-            # Load the screenshots
-            url1_path = screenshots.get('url1')
-            url2_path = screenshots.get('url2')
-            
-            if not (url1_path and url2_path and os.path.exists(url1_path) and os.path.exists(url2_path)):
-                self._create_placeholder_image(output_path, "Difference Heatmap", 
-                                             "Screenshot data not available for heatmap generation")
-                return
-            
-            # Load images
-            img1 = cv2.imread(url1_path)
-            img2 = cv2.imread(url2_path)
-            
-            if img1 is None or img2 is None:
-                self._create_placeholder_image(output_path, "Difference Heatmap", 
-                                             "Could not load screenshot images")
-                return
-            
-            # Resize images to match if needed
-            if img1.shape != img2.shape:
-                h = min(img1.shape[0], img2.shape[0])
-                w = min(img1.shape[1], img2.shape[1])
-                img1 = cv2.resize(img1, (w, h))
-                img2 = cv2.resize(img2, (w, h))
-            
-            # Convert to grayscale for difference calculation
-            gray1 = cv2.cvtColor(img1, cv2.COLOR_BGR2GRAY)
-            gray2 = cv2.cvtColor(img2, cv2.COLOR_BGR2GRAY)
-            
-            # Calculate absolute difference
-            diff = cv2.absdiff(gray1, gray2)
-            
-            # Normalize difference values
-            diff_normalized = diff.astype(np.float32) / 255.0;
-            
-            # Create heatmap
-            plt.figure(figsize=(12, 8))
-            
-            # Create custom colormap (blue for no difference, red for high difference)
-            colors = ['#000080', '#0000FF', '#00FFFF', '#FFFF00', '#FF8000', '#FF0000']
-            n_bins = 256
-            cmap = mcolors.LinearSegmentedColormap.from_list('custom_heatmap', colors, N=n_bins)
-            
-            # Display heatmap
-            plt.imshow(diff_normalized, cmap=cmap, interpolation='nearest')
-            plt.colorbar(label='Difference Intensity', shrink=0.8)
-            plt.title('Pixel Difference Heatmap\n(Blue = Similar, Red = Different)', fontsize=14, fontweight='bold')
-            plt.axis('off');
+            diff = analysis_results.get('difference_map')
+            if not isinstance(diff, np.ndarray):
+                # Decoded screenshots, or else the screenshot files
+                images = images or self._load_report_images(analysis_results)
+                if not images:
+                    self._create_placeholder_image(output_path, "Difference Heatmap", 
+                                                 "Screenshot data not available for heatmap generation")
+                    return
+                img1 = images['url1']
+                img2 = images['url2']
+                
+                # Resize images to match if needed
+                if img1.shape != img2.shape:
+                    h = min(img1.shape[0], img2.shape[0])
+                    w = min(img1.shape[1], img2.shape[1])
+                    img1 = cv2.resize(img1, (w, h))
+                    img2 = cv2.resize(img2, (w, h))
+                
+                # Same measure as ImageComparison.difference_map (BGR here)
+                diff = cv2.cvtColor(cv2.absdiff(img1, img2), cv2.COLOR_BGR2GRAY)
             
-            # Save the heatmap
-            plt.tight_layout()
-            plt.savefig(output_path, dpi=150, bbox_inches='tight')
-            plt.close()
+            # Colormap lookup at native resolution, legend strip below
+            HeatmapRenderer().save(diff, output_path)
             
-            self.logger.info(f"Difference heatmap created from screenshots: {output_path}")
+            self.logger.info(f"Difference heatmap created: {output_path}")
             
         except Exception as e:
             self.logger.error(f"Failed to create heatmap from screenshots: {str(e)}")
             self._create_placeholder_image(output_path, "Difference Heatmap", 
                                          f"Error creating heatmap: {str(e)}")
 
+    def _materialize(self, source, destination):
+        """Place a copy of source at destination, linked from the artifact store when possible"""
+        try:
+            self.artifact_store.materialize(source, destination)
+        except Exception as e:
+            self.logger.warning(f"Artifact store unavailable, copying {os.path.basename(source)}: {str(e)}")
+            shutil.copy2(source, destination)
+    
     def _copy_screenshots_to_reports(self, analysis_results, base_name):
         """Copy screenshot files to reports directory for HTML access"""
         try:
@@ -1622,8 +1977,8 @@ class ReportGenerator:
                     dest_filename = f"{base_name}_{screenshot_type}_screenshot.png"
                     dest_path = os.path.join(self.output_dir, dest_filename)
                     
-                    # Copy the screenshot file
-                    shutil.copy2(screenshot_path, dest_path)
+                    # Link the screenshot file from the artifact store
+                    self._materialize(screenshot_path, dest_path)
                     self.logger.info(f"Copied screenshot {screenshot_type} to reports: {dest_filename}")
                     
                     # Update the reports dict to include the screenshot paths
@@ -1634,8 +1989,44 @@ class ReportGenerator:
         except Exception as e:
             self.logger.error(f"Failed to copy screenshots to reports directory: {str(e)}")
 
-    def _generate_image_html(self, analysis_results, image_type, alt_text):
-        """Generate HTML for image with proper path handling and fallbacks"""
+    def _tile_builder(self, config):
+        """Tile pyramid builder for the HTML report, or None when tiles are disabled"""
+        if not config.get('report_tiles', True):
+            return None
+        return TilePyramidBuilder(tile_size=config.get('report_tile_size', TILE_SIZE),
+                                  tile_format=config.get('report_tile_format', 'webp'),
+                                  min_size=config.get('report_tile_min_size', TILE_PYRAMID_MIN_SIZE))
+    
+    def _generate_tile_viewer_html(self, image_type, image_path, alt_text, tile_builder, tile_root, image=None):
+        """Tile viewer for a large image (its pyramid is written here), or None to embed it whole"""
+        try:
+            if image is not None:
+                height, width = image.shape[:2]
+            else:
+                with Image.open(image_path) as img:
+                    width, height = img.size
+            if not tile_builder.needs_pyramid(width, height):
+                return None
+            manifest = tile_builder.build(image if image is not None else image_path,
+                                          os.path.join(self.output_dir, tile_root, image_type))
+        except Exception as e:
+            self.logger.warning(f"Embedding the full {image_type} image, tiling failed: {str(e)}")
+            return None
+        
+        sync_group = TILE_SYNC_GROUPS.get(image_type)
+        hint = "Drag to pan, Ctrl+scroll to zoom" + (" (moves with the other page views)" if sync_group else "")
+        return tile_viewer_html(manifest, f"{tile_root}/{image_type}", alt_text, sync_group) + f"""
+                <p class="tile-viewer-hint">{hint} &middot;
+                    <a href="{os.path.basename(image_path)}" target="_blank">Open full image ({width}&times;{height})</a></p>
+                """
+    
+    def _generate_image_html(self, analysis_results, image_type, alt_text, tile_builder=None, tile_root=None,
+                             image=None):
+        """Generate HTML for image with proper path handling and fallbacks.
+        
+        With a tile_builder, large images are tiled under tile_root and shown in a tile
+        viewer; image is the decoded picture when already in memory.
+        """
         try:
             # Get the image path from reports
             reports = analysis_results.get('reports', {})
@@ -1674,7 +2065,8 @@ class ReportGenerator:
             image_filename = os.path.basename(image_path)
             
             # Special handling for screenshots - look for the copied version in reports directory
-            if image_type in ['url1_screenshot', 'url2_screenshot']:
+            # (unless this report copied its own)
+            if image_type in ['url1_screenshot', 'url2_screenshot'] and image_type not in reports:
                 # Look for a file in the reports directory that matches the expected pattern
                 reports_dir = self.output_dir
                 try:
@@ -1688,6 +2080,12 @@ class ReportGenerator:
             
             # Check if the image file actually exists
             if os.path.exists(image_path):
+                if tile_builder is not None:
+                    tile_html = self._generate_tile_viewer_html(image_type, image_path, alt_text, tile_builder,
+                                                                tile_root, image)
+                    if tile_html:
+                        return tile_html
+                
                 # Image exists - show it normally
                 return f"""
                 <img src="{image_filename}" 
@@ -1728,15 +2126,19 @@ class ReportGenerator:
                 for report_type, file_path in reports.items():
                     if file_path and os.path.exists(file_path) and report_type != 'package':
                         # Add with just the filename
-                        zipf.write(file_path, os.path.basename(file_path))
+                        zipf.write(file_path, os.path.basename(file_path), self._zip_compression(file_path))
                         self.logger.info(f"Added {report_type} to package: {os.path.basename(file_path)}")
+                        # The JSON report's arrays live in a sidecar next to it
+                        if report_type == 'json' and os.path.exists(sidecar_path(file_path)):
+                            zipf.write(sidecar_path(file_path), os.path.basename(sidecar_path(file_path)),
+                                       zipfile.ZIP_STORED)
                 
                 # Add screenshots if available
                 screenshots = analysis_results.get('screenshots', {})
                 for screenshot_type, screenshot_path in screenshots.items():
                     if screenshot_path and os.path.exists(screenshot_path):
                         filename = f"original_screenshot_{screenshot_type}.png"
-                        zipf.write(screenshot_path, filename)
+                        zipf.write(screenshot_path, filename, self._zip_compression(screenshot_path))
                         self.logger.info(f"Added screenshot to package: {filename}")
                 
                 # Add README file explaining the package
@@ -1757,6 +2159,10 @@ class ReportGenerator:
             except:
                 return None
 
+    def _zip_compression(self, path):
+        """ZIP compression for a file: already compressed formats are stored as they are"""
+        return zipfile.ZIP_STORED if path.lower().endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+    
     def _generate_package_readme(self, reports, analysis_results, config):
         """Generate README content for the shareable package"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -2208,6 +2614,10 @@ interactive features and comprehensive results.
     # Example usage
 if __name__ == "__main__":
     # Example usage
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
     generator = ReportGenerator()
     
     # Mock analysis results
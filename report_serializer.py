@@ -0,0 +1,116 @@
+"""
+Report Serializer Module
+Writes report data as compact JSON, with NumPy arrays stored in a binary .npz sidecar
+"""
+
+import os
+import json
+import logging
+import numpy as np
+
+# Arrays up to this many elements (region colors, small histograms) are written inline as lists
+ARRAY_INLINE_LIMIT = 64
+
+# JSON marker of an array stored in the sidecar
+ARRAY_REFERENCE_KEY = '$array'
+
+
+def sidecar_path(json_path):
+    """Path of the .npz sidecar holding the arrays of a JSON report"""
+    return os.path.splitext(json_path)[0] + '_arrays.npz'
+
+
+class ReportSerializer:
+    """Schema-aware JSON writer and reader for report data.
+
+    Scalars, strings and region tables are written as compact JSON; NumPy
+    scalars become plain numbers and small arrays become lists. Larger arrays
+    (difference images and the like) go to a compressed .npz sidecar next to
+    the JSON file, and the JSON holds {'$array': key, 'shape': ..., 'dtype': ...}
+    in their place. load() puts the arrays back where they were.
+    """
+
+    def __init__(self, inline_limit=ARRAY_INLINE_LIMIT, indent=None):
+        self.setup_logging()
+        self.inline_limit = inline_limit
+        self.indent = indent
+
+    def setup_logging(self):
+        """Setup logging for the report serializer"""
+        self.logger = logging.getLogger(__name__)
+
+    def to_json_data(self, data):
+        """JSON-safe copy of data and the arrays split off from it ({key: array})"""
+        arrays = {}
+        return self._convert(data, '', arrays), arrays
+
+    def _convert(self, value, path, arrays):
+        if value is None or isinstance(value, (str, bool, int, float)):
+            return value
+        if isinstance(value, dict):
+            return {self._key(key): self._convert(item, f"{path}/{self._key(key)}" if path else self._key(key), arrays)
+                    for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._convert(item, f"{path}[{index}]", arrays) for index, item in enumerate(value)]
+        if isinstance(value, np.generic):
+            return self._convert(value.item(), path, arrays)
+        if isinstance(value, np.ndarray):
+            if value.dtype.hasobject or value.size <= self.inline_limit:
+                return self._convert(value.tolist(), path, arrays)
+            key = path or 'array'
+            while key in arrays:
+                key += '_'
+            arrays[key] = value
+            return {ARRAY_REFERENCE_KEY: key, 'shape': list(value.shape), 'dtype': value.dtype.str}
+        if isinstance(value, (set, frozenset)):
+            return self._convert(sorted(value, key=str), path, arrays)
+        return str(value)
+
+    def _key(self, key):
+        return key if isinstance(key, str) else str(key)
+
+    def dump(self, data, output_path):
+        """Write data to output_path (plus its array sidecar); returns the sidecar path or None"""
+        json_data, arrays = self.to_json_data(data)
+        separators = (',', ':') if self.indent is None else (',', ': ')
+        arrays_path = sidecar_path(output_path)
+
+        # json.dump encodes in chunks, so the report is streamed to the file
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(json_data, f, indent=self.indent, separators=separators)
+        if arrays:
+            np.savez_compressed(arrays_path, **arrays)
+            self.logger.info(f"Stored {len(arrays)} arrays in: {arrays_path}")
+            return arrays_path
+        if os.path.exists(arrays_path):
+            os.remove(arrays_path)
+        return None
+
+    def load(self, json_path, load_arrays=True):
+        """Read a report written by dump(); array references are resolved from the sidecar"""
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not load_arrays:
+            return data
+
+        references = []
+        stack = [data] if isinstance(data, (dict, list)) else []
+        while stack:
+            node = stack.pop()
+            items = node.items() if isinstance(node, dict) else enumerate(node)
+            for key, item in items:
+                if isinstance(item, dict) and ARRAY_REFERENCE_KEY in item:
+                    references.append((node, key, item[ARRAY_REFERENCE_KEY]))
+                elif isinstance(item, (dict, list)):
+                    stack.append(item)
+        if not references:
+            return data
+
+        arrays_path = sidecar_path(json_path)
+        if not os.path.exists(arrays_path):
+            self.logger.warning(f"Array sidecar missing, keeping array references: {arrays_path}")
+            return data
+        with np.load(arrays_path, allow_pickle=False) as arrays:
+            for node, key, array_key in references:
+                node[key] = arrays[array_key]
+        return data
@@ -25,10 +25,6 @@ class ScreenshotCapture:
         
     def setup_logging(self):
         """Setup logging for screenshot capture"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
         self.logger = logging.getLogger(__name__)
     
     def initialize_driver(self, resolution="1920x1080"):
@@ -81,8 +77,8 @@ class ScreenshotCapture:
             self.logger.error(f"Failed to initialize {self.browser} driver: {str(e)}")
             raise
     
-    def capture_screenshot(self, url, output_path, wait_time=3, full_page=True):
-        """Capture screenshot of a given URL"""
+    def capture_screenshot(self, url, output_path, wait_time=3, full_page=True, html_output_path=None):
+        """Capture screenshot of a given URL (and optionally save its rendered HTML)"""
         try:
             if not self.driver:
                 raise Exception("Driver not initialized. Call initialize_driver() first.")
@@ -114,6 +110,11 @@ class ScreenshotCapture:
                 # Get viewport screenshot
                 self.driver.save_screenshot(output_path)
             
+            if html_output_path:
+                # Rendered DOM snapshot, for offline WCAG analysis without a browser
+                with open(html_output_path, 'w', encoding='utf-8') as f:
+                    f.write(self.driver.page_source)
+            
             self.logger.info(f"Screenshot saved to: {output_path}")
             return True
             
@@ -267,6 +268,10 @@ class ScreenshotCapture:
 # Example usage
 if __name__ == "__main__":
     # Example usage
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
     capturer = ScreenshotCapture(browser="chrome", headless=True)
     
     try:
@@ -0,0 +1,297 @@
+"""
+Screenshot Embedding Index Module
+Nearest-baseline lookup and near-duplicate detection across historical screenshots
+"""
+
+import os
+import time
+import pickle
+import logging
+import threading
+import numpy as np
+import cv2
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+from sklearn.neighbors import BallTree
+from ai_detector import AIDetector
+
+INDEX_FORMAT_VERSION = 1
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp')
+
+# Directories holding captured screenshots (generated visualizations are not baselines)
+SCREENSHOT_DIRECTORIES = ("screenshots",)
+
+# Indexes loaded in this process, by absolute path: (file signature, index)
+_shared_indexes = {}
+_shared_lock = threading.Lock()
+
+
+def load_shared_index(index_path=os.path.join("models", "screenshot_index.pkl"), ai_detector=None):
+    """Return the index stored at index_path, loaded once per process; None if there is no index.
+
+    The loaded index is reused until the file on disk changes. Callers only query
+    it: add images to a ScreenshotIndex of their own and save it instead.
+    """
+    key = os.path.abspath(index_path)
+    try:
+        info = os.stat(index_path)
+    except FileNotFoundError:
+        return None
+    signature = (info.st_mtime_ns, info.st_size)
+    with _shared_lock:
+        cached = _shared_indexes.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+        index = ScreenshotIndex(index_path, ai_detector=ai_detector)
+        if not index.load():
+            return None
+        _shared_indexes[key] = (signature, index)
+        return index
+
+
+class ScreenshotIndex:
+    """Embedding index over historical screenshots.
+
+    Screenshots are embedded with AIDetector.extract_features, standardized and
+    reduced with PCA, and stored in a BallTree. New captures go to a small
+    pending buffer that is searched by brute force and merged into the tree
+    (refitting the projection) once it reaches rebuild_threshold entries.
+    """
+
+    def __init__(self, index_path=os.path.join("models", "screenshot_index.pkl"), n_components=32,
+                 rebuild_threshold=256, ai_detector=None):
+        self.setup_logging()
+        self.index_path = index_path
+        self.n_components = n_components
+        self.rebuild_threshold = rebuild_threshold
+        self.ai_detector = ai_detector or AIDetector()
+
+        # Indexed entries (in the tree) and pending entries (brute-force searched)
+        self.paths = []
+        self.features = np.empty((0, 0))
+        self.pending_paths = []
+        self.pending_features = []
+
+        self.scaler = None
+        self.pca = None
+        self.tree = None
+        self.embeddings = np.empty((0, 0))
+
+    def setup_logging(self):
+        """Setup logging for the screenshot index"""
+        self.logger = logging.getLogger(__name__)
+
+    def __len__(self):
+        return len(self.paths) + len(self.pending_paths)
+
+    def __contains__(self, path):
+        path = os.path.normpath(path)
+        return path in self._path_set()
+
+    def _path_set(self):
+        return set(self.paths) | set(self.pending_paths)
+
+    def _load_image(self, image_path):
+        """Load an image as RGB array"""
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError(f"Could not load image: {image_path}")
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+    def embed_features(self, features):
+        """Project raw feature vectors into the index embedding space"""
+        features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        if self.pca is None:
+            return features
+        return self.pca.transform(self.scaler.transform(features))
+
+    def add_image(self, image_path, image=None):
+        """Add a screenshot to the index; returns False if it is already indexed or unreadable"""
+        image_path = os.path.normpath(image_path)
+        if image_path in self:
+            return False
+
+        try:
+            if image is None:
+                image = self._load_image(image_path)
+            features = self.ai_detector.extract_features(image)
+            if len(features) == 0:
+                return False
+
+            self.pending_paths.append(image_path)
+            self.pending_features.append(features)
+
+            if self.tree is None or len(self.pending_paths) >= self.rebuild_threshold:
+                self.rebuild()
+            return True
+
+        except Exception as e:
+            self.logger.warning(f"Could not index {image_path}: {e}")
+            return False
+
+    def add_directories(self, directories=SCREENSHOT_DIRECTORIES, progress_callback=None):
+        """Index every image under the given directories that is not indexed yet"""
+        known = self._path_set()
+        added = 0
+        for directory in directories:
+            for root, _, files in os.walk(directory):
+                for filename in sorted(files):
+                    if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    path = os.path.normpath(os.path.join(root, filename))
+                    if path in known:
+                        continue
+                    # Defer rebuilding until the whole batch is embedded
+                    try:
+                        features = self.ai_detector.extract_features(self._load_image(path))
+                    except Exception as e:
+                        self.logger.warning(f"Could not index {path}: {e}")
+                        continue
+                    if len(features) == 0:
+                        continue
+                    self.pending_paths.append(path)
+                    self.pending_features.append(features)
+                    known.add(path)
+                    added += 1
+                    if progress_callback and added % 100 == 0:
+                        progress_callback(f"Indexed {added} screenshots...")
+
+        if self.pending_paths:
+            self.rebuild()
+        self.logger.info(f"Added {added} screenshots to index ({len(self)} total)")
+        return added
+
+    def rebuild(self):
+        """Merge pending entries, refit the scaler/PCA projection and rebuild the BallTree"""
+        if self.pending_features:
+            pending = np.vstack(self.pending_features)
+            self.features = pending if self.features.size == 0 else np.vstack([self.features, pending])
+            self.paths.extend(self.pending_paths)
+            self.pending_paths = []
+            self.pending_features = []
+
+        if not self.paths:
+            return
+
+        self.scaler = StandardScaler().fit(self.features)
+        n_components = min(self.n_components, self.features.shape[0], self.features.shape[1])
+        self.pca = PCA(n_components=n_components, random_state=42).fit(self.scaler.transform(self.features))
+        self.embeddings = self.pca.transform(self.scaler.transform(self.features))
+        self.tree = BallTree(self.embeddings)
+        self.logger.info(f"Screenshot index rebuilt with {len(self.paths)} entries, {n_components} dimensions")
+
+    def query_features(self, features, k=5, exclude=()):
+        """Return the k nearest indexed screenshots for a raw feature vector"""
+        if len(self) == 0:
+            return []
+
+        exclude = {os.path.normpath(p) for p in exclude}
+        query = self.embed_features(features)
+        candidates = []
+
+        # Ask the tree for extra neighbours to make up for excluded paths
+        if self.tree is not None:
+            tree_k = min(len(self.paths), k + len(exclude))
+            distances, indices = self.tree.query(query, k=tree_k)
+            candidates.extend((float(d), self.paths[i]) for d, i in zip(distances[0], indices[0]))
+
+        if self.pending_paths:
+            pending = self.embed_features(np.vstack(self.pending_features))
+            distances = np.linalg.norm(pending - query, axis=1)
+            candidates.extend((float(d), p) for d, p in zip(distances, self.pending_paths))
+
+        candidates.sort()
+        return [{'path': path, 'distance': distance}
+                for distance, path in candidates if path not in exclude][:k]
+
+    def query(self, image_or_path, k=5, exclude=()):
+        """Return the k most similar historical screenshots for an image array or path"""
+        start = time.time()
+        if isinstance(image_or_path, str):
+            exclude = tuple(exclude) + (image_or_path,)
+            image_or_path = self._load_image(image_or_path)
+        features = self.ai_detector.extract_features(image_or_path)
+        results = self.query_features(features, k=k, exclude=exclude)
+        self.logger.info(f"Screenshot index query returned {len(results)} results in {(time.time() - start) * 1000:.1f} ms")
+        return results
+
+    def find_duplicates(self, max_distance=0.5):
+        """Find groups of near-identical captures (embedding distance <= max_distance)"""
+        if self.pending_paths:
+            self.rebuild()
+        if self.tree is None:
+            return []
+
+        neighbours = self.tree.query_radius(self.embeddings, r=max_distance)
+        groups = []
+        seen = set()
+        for i, group in enumerate(neighbours):
+            if i in seen or len(group) < 2:
+                continue
+            members = sorted(int(j) for j in group if j not in seen)
+            seen.update(members)
+            if len(members) > 1:
+                groups.append([self.paths[j] for j in members])
+        return groups
+
+    def save(self, index_path=None):
+        """Persist the index to disk"""
+        index_path = index_path or self.index_path
+        try:
+            directory = os.path.dirname(index_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            index_data = {
+                'version': INDEX_FORMAT_VERSION,
+                'n_components': self.n_components,
+                'paths': self.paths,
+                'features': self.features,
+                'pending_paths': self.pending_paths,
+                'pending_features': self.pending_features,
+                'scaler': self.scaler,
+                'pca': self.pca,
+                'tree': self.tree,
+                'embeddings': self.embeddings
+            }
+            with open(index_path, 'wb') as f:
+                pickle.dump(index_data, f)
+            self.logger.info(f"Screenshot index saved to {index_path}")
+            return index_path
+        except Exception as e:
+            self.logger.error(f"Failed to save screenshot index: {str(e)}")
+            raise
+
+    def load(self, index_path=None):
+        """Load a persisted index; returns False if the file does not exist"""
+        index_path = index_path or self.index_path
+        try:
+            if not os.path.exists(index_path):
+                self.logger.warning(f"Screenshot index not found: {index_path}")
+                return False
+            with open(index_path, 'rb') as f:
+                index_data = pickle.load(f)
+            self.n_components = index_data['n_components']
+            self.paths = index_data['paths']
+            self.features = index_data['features']
+            self.pending_paths = index_data['pending_paths']
+            self.pending_features = index_data['pending_features']
+            self.scaler = index_data['scaler']
+            self.pca = index_data['pca']
+            self.tree = index_data['tree']
+            self.embeddings = index_data['embeddings']
+            self.logger.info(f"Screenshot index loaded from {index_path} ({len(self)} entries)")
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to load screenshot index: {str(e)}")
+            return False
+
+
+# Example usage
+if __name__ == "__main__":
+    index = ScreenshotIndex()
+    index.load()
+    index.add_directories(["screenshots", "visualizations"], progress_callback=print)
+    index.save()
+
+    print(f"Indexed screenshots: {len(index)}")
+    print(f"Near-duplicate groups: {len(index.find_duplicates())}")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-page historical anomaly model in AIDetector.
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_detector import AIDetector
+
+
+def test_history_model_scores_batch():
+    """A model trained on accepted captures flags outliers in a batch"""
+    print("🧪 Testing historical anomaly model...")
+    detector = AIDetector()
+    rng = np.random.default_rng(1)
+    accepted = rng.normal(0, 1, (40, 20))
+    
+    # Not enough history yet
+    detector.add_accepted_captures('home', accepted[:3])
+    assert not detector.has_page_model('home')
+    
+    # Incremental training
+    detector.add_accepted_captures('home', accepted[3:])
+    assert detector.has_page_model('home')
+    
+    batch = np.vstack([rng.normal(0, 1, (5, 20)), rng.normal(12, 1, (5, 20))])
+    scores = detector.score_captures('home', batch)
+    print(f"   Anomaly flags: {scores['anomaly_detected'].tolist()}")
+    assert scores['anomaly_detected'][5:].all()
+    assert scores['anomaly_score'][5:].min() > scores['anomaly_score'][:5].max()
+    
+    result = detector.detect_anomalies_history('home', batch[-1])
+    assert result['anomaly_detected'] and result['model'] == 'history'
+    print("✅ Historical model flags outliers")
+
+
+def test_history_model_persists():
+    """Page models survive save_model/load_model"""
+    print("🧪 Testing anomaly model persistence...")
+    detector = AIDetector()
+    rng = np.random.default_rng(2)
+    detector.add_accepted_captures('checkout', rng.normal(0, 1, (10, 8)))
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model_path = os.path.join(temp_dir, 'anomaly_model.pkl')
+        detector.save_model(model_path)
+        
+        restored = AIDetector()
+        assert restored.load_model(model_path)
+        assert restored.has_page_model('checkout')
+        assert len(restored.page_models['checkout']['history']) == 10
+    print("✅ Anomaly model persisted and restored")
+
+
+if __name__ == "__main__":
+    test_history_model_scores_batch()
+    test_history_model_persists()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-addressed artifact store.
+"""
+
+import os
+import sys
+import zipfile
+import tempfile
+import numpy as np
+import cv2
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from artifact_store import ArtifactStore, file_digest
+from report_generator import ReportGenerator
+
+
+def _write_image(path, seed):
+    rng = np.random.default_rng(seed)
+    cv2.imwrite(path, rng.integers(0, 255, (120, 160, 3), dtype=np.uint8))
+    return path
+
+
+def test_identical_files_share_one_blob():
+    """Interned duplicates become links to one blob, counted by its link count"""
+    print("🧪 Testing artifact deduplication...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = ArtifactStore(os.path.join(tmpdir, "store"))
+        first = _write_image(os.path.join(tmpdir, "run1.png"), seed=1)
+        second = _write_image(os.path.join(tmpdir, "run2.png"), seed=1)
+        other = _write_image(os.path.join(tmpdir, "other.png"), seed=2)
+
+        digest = store.intern(first)
+        assert digest == file_digest(first)
+        assert store.refcount(digest) == 1
+        assert store.intern(second) == digest
+        assert os.path.samefile(first, second)
+        assert os.path.samefile(first, store.blob_path(digest))
+        assert store.refcount(digest) == 2
+        store.intern(other)
+
+        stats = store.stats()
+        assert stats['blobs'] == 2
+        assert stats['saved_bytes'] == os.path.getsize(first)
+
+        # Materialized copies link to the same blob
+        report_a = os.path.join(tmpdir, "reports_a", "shot.png")
+        report_b = os.path.join(tmpdir, "reports_b", "shot.png")
+        store.materialize(first, report_a)
+        store.materialize(first, report_b)
+        assert os.path.samefile(report_a, report_b)
+        assert store.refcount(digest) == 4
+
+        # A file linked to others is removed before it is rewritten
+        store.detach(report_b)
+        assert not os.path.exists(report_b) and store.refcount(digest) == 3
+
+        # Blobs are collected once nothing links to them
+        for path in (first, second, report_a):
+            os.remove(path)
+        result = store.gc()
+        assert result['removed'] == 1
+        assert not os.path.exists(store.blob_path(digest))
+        assert os.path.exists(store.blob_path(file_digest(other)))
+    print("✅ Identical artifacts stored once")
+
+
+def test_materialize_keeps_foreign_files_apart():
+    """Files the store does not own are cloned into it, so editing them leaves the blob intact"""
+    print("🧪 Testing materialized user files...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = ArtifactStore(os.path.join(tmpdir, "store"))
+        baseline = _write_image(os.path.join(tmpdir, "baseline.png"), seed=3)
+        digest = store.materialize(baseline, os.path.join(tmpdir, "reports", "baseline.png"))
+        assert not os.path.samefile(baseline, store.blob_path(digest))
+
+        with open(baseline, 'r+b') as f:
+            f.write(b'edited')
+        assert file_digest(store.blob_path(digest)) == digest
+    print("✅ User files never share a blob")
+
+
+def test_reports_link_screenshots():
+    """Report screenshot copies come from the store, and packages store PNGs uncompressed"""
+    print("🧪 Testing report artifacts from the store...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = ArtifactStore(os.path.join(tmpdir, "store"))
+        paths = {'url1': _write_image(os.path.join(tmpdir, "url1.png"), seed=4),
+                 'url2': _write_image(os.path.join(tmpdir, "url2.png"), seed=5)}
+        for path in paths.values():
+            store.intern(path)
+
+        generator = ReportGenerator(output_dir=os.path.join(tmpdir, "reports"), artifact_store=store)
+        reports = {}
+        for run_id in ('first', 'second'):
+            results = {'run_id': run_id, 'screenshots': paths, 'summary_dict': {}}
+            reports[run_id] = generator.generate_comprehensive_report(
+                results, {'report_formats': ['html', 'json', 'package'], 'report_workers': 1, 'report_tiles': False})
+
+        for run_id, run_reports in reports.items():
+            for screenshot_type, path in paths.items():
+                assert os.path.samefile(run_reports[f'{screenshot_type}_screenshot'], path)
+        assert store.refcount(file_digest(paths['url1'])) == 3
+
+        with zipfile.ZipFile(reports['first']['package']) as package:
+            info = package.getinfo("original_screenshot_url1.png")
+            assert info.compress_type == zipfile.ZIP_STORED
+            json_name = os.path.basename(reports['first']['json'])
+            assert package.getinfo(json_name).compress_type == zipfile.ZIP_DEFLATED
+    print("✅ Report screenshots linked from the store")
+
+
+if __name__ == "__main__":
+    test_identical_files_share_one_blob()
+    test_materialize_keeps_foreign_files_apart()
+    test_reports_link_screenshots()
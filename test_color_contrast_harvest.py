@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-call text style harvest and vectorized contrast checks.
+"""
+
+import os
+import sys
+import numpy as np
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from wcag_checker import WCAGCompliantChecker, WCAGAuditContext, contrast_ratios
+
+
+class HarvestDriver:
+    """WebDriver stand-in returning fixed harvest rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.script_calls = 0
+
+    def execute_script(self, script):
+        self.script_calls += 1
+        return self.rows
+
+
+def _row(text, color, background, size=16, weight=400, y=0, bg_image=0):
+    """Build one harvest row: tag, text, RGBA, background RGB, size, weight, rect, bg image"""
+    return ['p', text] + list(color) + list(background) + [size, weight, 10, y, 100, 20, bg_image]
+
+
+def test_vectorized_ratios_match_scalar():
+    """Vectorized contrast ratios agree with the scalar helper"""
+    print("🧪 Testing vectorized contrast ratios...")
+    checker = WCAGCompliantChecker()
+    rng = np.random.default_rng(1)
+    fg = rng.integers(0, 256, (50, 3))
+    bg = rng.integers(0, 256, (50, 3))
+
+    ratios = contrast_ratios(fg, bg)
+    expected = [checker._calculate_contrast_ratio(f"rgb({f[0]}, {f[1]}, {f[2]})", f"rgb({b[0]}, {b[1]}, {b[2]})")
+                for f, b in zip(fg, bg)]
+    assert np.allclose(ratios, expected)
+    print(f"✅ {len(ratios)} ratios match")
+
+
+def test_all_text_elements_checked_in_one_call():
+    """Every harvested element is checked, failures grouped per color pair"""
+    print("🧪 Testing full-page contrast check...")
+    checker = WCAGCompliantChecker()
+    rows = [_row(f"Grey {i}", (150, 150, 150, 1), (255, 255, 255), y=i * 30) for i in range(40)]
+    rows += [
+        _row("Black", (0, 0, 0, 1), (255, 255, 255)),
+        # 4.48:1 fails AA as body text but passes as large or bold-large text
+        _row("Large", (119, 119, 119, 1), (255, 255, 255), size=24),
+        _row("Bold", (119, 119, 119, 1), (255, 255, 255), size=19, weight=700),
+        _row("Small", (119, 119, 119, 1), (255, 255, 255)),
+        # Passes AA but not AAA
+        _row("Dark grey", (100, 100, 100, 1), (255, 255, 255)),
+        # Translucent black text is blended into a light grey
+        _row("Faded", (0, 0, 0, 0.2), (255, 255, 255)),
+        _row("Over image", (150, 150, 150, 1), (255, 255, 255), bg_image=1)
+    ]
+    driver = HarvestDriver(rows)
+    audit = WCAGAuditContext(driver, "https://example.com")
+
+    issues = checker._analyze_color_contrast_enhanced(audit)
+    assert driver.script_calls == 1
+
+    aa = [issue for issue in issues if issue['guideline'] == '1.4.3']
+    aaa = [issue for issue in issues if issue['guideline'] == '1.4.6']
+    aa_texts = {issue['element'] for issue in aa}
+    assert aa_texts == {"p: Grey 0", "p: Small", "p: Faded"}, aa_texts
+    grey = next(issue for issue in aa if issue['element'] == "p: Grey 0")
+    assert grey['occurrences'] == 40 and "on 40 elements" in grey['description']
+    # Large and bold-large text share a color pair and size class
+    assert {issue['element']: issue['occurrences'] for issue in aaa} == {"p: Large": 2, "p: Dark grey": 1}
+
+    stats = audit.results['detailed_analysis']['color_contrast']
+    assert stats['elements_checked'] == len(rows) - 1
+    assert stats['elements_over_background_image'] == 1
+    assert stats['aa_failures'] == 42 and stats['aaa_failures'] == 3
+    print(f"✅ {stats['elements_checked']} elements checked, {len(issues)} grouped issues")
+
+
+def test_empty_page():
+    """A page without text produces no issues"""
+    print("🧪 Testing page without text...")
+    checker = WCAGCompliantChecker()
+    audit = WCAGAuditContext(HarvestDriver([]), "https://example.com")
+    assert checker._analyze_color_contrast_enhanced(audit) == []
+    assert audit.results['detailed_analysis']['color_contrast']['elements_checked'] == 0
+    print("✅ No issues on empty page")
+
+
+if __name__ == "__main__":
+    test_vectorized_ratios_match_scalar()
+    test_all_text_elements_checked_in_one_call()
+    test_empty_page()
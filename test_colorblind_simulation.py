@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test script for the color vision deficiency simulation and per-element contrast loss.
+"""
+
+import os
+import sys
+import numpy as np
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from wcag_checker import WCAGCompliantChecker, WCAGAuditContext, cvd_matrix, simulate_cvd, CVD_MATRICES
+
+
+def _styles(pairs, background_image=None):
+    """Columnar harvest table for (text, foreground, background) pairs of 16px text"""
+    n = len(pairs)
+    rects = np.array([[10, 10 + 40 * i, 200, 30] for i in range(n)], dtype=np.float64).reshape(-1, 4)
+    return {
+        'tag': ['p'] * n,
+        'text': [text for text, _, _ in pairs],
+        'locator': [f"/html[1]/body[1]/p[{i + 1}]" for i in range(n)],
+        'color': np.array([list(fg) + [1] for _, fg, _ in pairs], dtype=np.float64).reshape(-1, 4),
+        'background': np.array([bg for _, _, bg in pairs], dtype=np.float64).reshape(-1, 3),
+        'font_size': np.full(n, 16.0),
+        'font_weight': np.full(n, 400.0),
+        'rect': rects,
+        'background_image': np.array(background_image or [False] * n)
+    }
+
+
+def test_simulation_matrices():
+    """Severity interpolates from normal vision; the lookup table matches the float path"""
+    print("🧪 Testing simulation matrices...")
+    for deficiency in CVD_MATRICES:
+        assert np.allclose(cvd_matrix(deficiency, 0.0), np.eye(3))
+        assert np.allclose(cvd_matrix(deficiency, 1.0), CVD_MATRICES[deficiency])
+        # Neutral greys stay grey
+        assert np.allclose(CVD_MATRICES[deficiency].sum(axis=1), 1.0, atol=1e-3)
+
+    rng = np.random.default_rng(7)
+    image = rng.integers(0, 256, (32, 48, 3), dtype=np.uint8)
+    from_lut = simulate_cvd(image)
+    from_float = simulate_cvd(image.astype(np.float64))
+    assert from_lut.shape == (3, 32, 48, 3)
+    assert np.allclose(from_lut, from_float)
+    assert np.allclose(simulate_cvd(image, severity=0.0)[0], image, atol=1e-6)
+
+    checker = WCAGCompliantChecker()
+    simulated = checker._simulate_colorblindness(image, 'deuteranopia')
+    assert simulated.dtype == np.uint8 and simulated.shape == image.shape
+    print("✅ Matrices and lookup table consistent")
+
+
+def test_contrast_loss_per_element():
+    """Text that passes AA only for normal vision is reported per deficiency"""
+    print("🧪 Testing per-element contrast loss...")
+    checker = WCAGCompliantChecker()
+    audit = WCAGAuditContext(None, "https://example.com")
+    pairs = [("Red on black", (255, 0, 0), (0, 0, 0))] * 3 + [
+        ("Black on white", (0, 0, 0), (255, 255, 255)),
+        ("Blue on yellow", (0, 0, 255), (255, 255, 0)),
+        # Fails AA for everyone; reported by the contrast check, not here
+        ("Grey on white", (200, 200, 200), (255, 255, 255))
+    ]
+
+    issues = checker._check_colorblind_accessibility(None, _styles(pairs), audit)
+    by_description = {issue['description'].split(' users')[0]: issue for issue in issues}
+    assert len(issues) == 1, [issue['description'] for issue in issues]
+    protan = by_description['Text contrast drops below 4.5:1 for protanopia']
+    assert protan['element'] == "p: Red on black"
+    assert protan['occurrences'] == 3 and protan['guideline'] == '1.4.1'
+
+    stats = audit.results['detailed_analysis']['color_vision']
+    assert stats['elements_checked'] == len(pairs)
+    assert stats['deficiencies']['protanopia']['elements_affected'] == 3
+    assert stats['deficiencies']['protanopia']['max_contrast_loss'] > 0.3
+    assert stats['deficiencies']['tritanopia']['elements_affected'] == 0
+    print(f"✅ {len(issues)} issue for {len(pairs)} elements")
+
+
+def test_text_over_background_image():
+    """Text over an image is measured in its rect on the downscaled proxy"""
+    print("🧪 Testing text over background images...")
+    checker = WCAGCompliantChecker()
+    audit = WCAGAuditContext(None, "https://example.com")
+
+    # 1920px wide screenshot: a red text block on a black banner image
+    screenshot = np.zeros((400, 1920, 3), dtype=np.uint8)
+    screenshot[40:60, 40:400] = (255, 0, 0)
+    pairs = [("Banner", (255, 255, 255), (255, 255, 255)), ("Plain", (0, 0, 0), (255, 255, 255))]
+    styles = _styles(pairs, background_image=[True, False])
+    styles['rect'][0] = [20, 20, 300, 50]
+
+    issues = checker._check_colorblind_accessibility(screenshot, styles, audit)
+    stats = audit.results['detailed_analysis']['color_vision']
+    assert stats['proxy_shape'] == [200, 960]
+    assert [issue['element'] for issue in issues] == ["p: Banner"]
+    assert 'protanopia' in issues[0]['description']
+    print(f"✅ Proxy {stats['proxy_shape']} measured text over image")
+
+
+def test_without_text():
+    """No harvested text means no issues"""
+    print("🧪 Testing page without text...")
+    checker = WCAGCompliantChecker()
+    assert checker._check_colorblind_accessibility(np.zeros((10, 10, 3), np.uint8), _styles([])) == []
+    print("✅ No issues without text")
+
+
+if __name__ == "__main__":
+    test_simulation_matrices()
+    test_contrast_loss_per_element()
+    test_text_over_background_image()
+    test_without_text()
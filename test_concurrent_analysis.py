@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script for running analyses concurrently on shared engine instances.
+"""
+
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from visual_ai_regression import VisualAIRegression
+from wcag_checker import WCAGCompliantChecker
+from ai_detector import AIDetector
+
+
+def _write_pair(directory, index):
+    """Write a baseline/current pair whose differences depend on index"""
+    baseline = np.full((400, 300, 3), 240, dtype=np.uint8)
+    cv2.rectangle(baseline, (20, 20), (200, 80), (200, 60, 30), -1)
+    current = baseline.copy()
+    for i in range(index):
+        cv2.rectangle(current, (20 + 60 * i, 200), (60 + 60 * i, 240 + 20 * i), (20, 160, 10), -1)
+
+    baseline_path = os.path.join(directory, f"baseline_{index}.png")
+    current_path = os.path.join(directory, f"current_{index}.png")
+    cv2.imwrite(baseline_path, baseline)
+    cv2.imwrite(current_path, current)
+    return baseline_path, current_path
+
+
+def test_concurrent_image_analyses_match_sequential():
+    """One VisualAIRegression instance serves parallel runs without cross-talk"""
+    print("🧪 Testing concurrent image analyses on one instance...")
+    regression = VisualAIRegression()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configs = []
+        for index in range(1, 5):
+            baseline_path, current_path = _write_pair(tmpdir, index)
+            configs.append({
+                'baseline_image': baseline_path,
+                'current_image': current_path,
+                'wcag_analysis': False
+            })
+
+        # Run outputs (visualizations, caches) go to the temporary directory
+        cwd = os.getcwd()
+        os.chdir(tmpdir)
+        try:
+            sequential = [regression.run_image_analysis(config)['details'] for config in configs]
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                concurrent = list(pool.map(lambda config: regression.run_image_analysis(config)['details'], configs))
+        finally:
+            os.chdir(cwd)
+
+    assert concurrent == sequential
+    assert len({str(details) for details in sequential}) == len(configs)
+    print(f"✅ {len(configs)} concurrent analyses match their sequential results")
+
+
+class FakeDriver:
+    """Minimal WebDriver stand-in serving a fixed HTML page"""
+
+    def __init__(self, html):
+        self.page_source = html
+
+    def get(self, url):
+        pass
+
+    def find_element(self, by, value):
+        return object()
+
+    def find_elements(self, by, value):
+        return []
+
+    def get_screenshot_as_png(self):
+        return cv2.imencode('.png', np.full((60, 80, 3), 255, dtype=np.uint8))[1].tobytes()
+
+
+def test_concurrent_wcag_audits():
+    """One WCAGCompliantChecker runs audits of different pages concurrently"""
+    print("🧪 Testing concurrent WCAG audits on one checker...")
+    checker = WCAGCompliantChecker()
+    pages = {
+        'https://example.com/good': '<html lang="en"><head><title>Good</title></head>'
+                                    '<body><h1>Title</h1><a href="#main">Skip</a></body></html>',
+        'https://example.com/bad': '<html><body><h2>Sub</h2><img src="a.png"><img src="b.png">'
+                                   '<input type="text"></body></html>'
+    }
+    work = list(pages.items()) * 4
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cwd = os.getcwd()
+        os.chdir(tmpdir)
+        try:
+            sequential = {url: checker.check_wcag_compliance(FakeDriver(html), url) for url, html in pages.items()}
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(lambda item: checker.check_wcag_compliance(FakeDriver(item[1]), item[0]), work))
+        finally:
+            os.chdir(cwd)
+
+    for (url, _), result in zip(work, results):
+        assert result['url'] == url
+        assert result['total_issues'] == sequential[url]['total_issues']
+        assert result['compliance_score'] == sequential[url]['compliance_score']
+    assert sequential['https://example.com/bad']['total_issues'] > sequential['https://example.com/good']['total_issues']
+    print(f"✅ {len(work)} concurrent audits kept their own results")
+
+
+def test_detector_has_no_per_call_state():
+    """Pairwise anomaly detection does not fit anything on the shared detector"""
+    print("🧪 Testing AIDetector per-call state...")
+    detector = AIDetector()
+    rng = np.random.default_rng(3)
+    before = dict(vars(detector))
+    detector.detect_anomalies_clustering(rng.random(263), rng.random(263))
+    assert vars(detector).keys() == before.keys()
+    assert detector.page_models is before['page_models']
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        model_path = os.path.join(tmpdir, "model.pkl")
+        for _ in range(6):
+            detector.update_model_file(model_path, 'page', rng.random(263))
+        view = detector.with_model(model_path)
+        assert view.has_page_model('page')
+        assert not detector.has_page_model('page')
+    print("✅ Shared detector left untouched")
+
+
+if __name__ == "__main__":
+    test_concurrent_image_analyses_match_sequential()
+    test_concurrent_wcag_audits()
+    test_detector_has_no_per_call_state()
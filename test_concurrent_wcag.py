@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script for running the baseline and current WCAG audits concurrently.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import cv2
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import visual_ai_regression
+from visual_ai_regression import VisualAIRegression, AnalysisRun
+
+PAGES = {
+    'https://example.com/a': '<html lang="en"><head><title>A</title></head><body><a href="#m">Skip</a>'
+                             '<h1>A</h1><img src="a.png"></body></html>',
+    'https://example.com/b': '<html lang="en"><head><title>B</title></head><body><a href="#m">Skip</a>'
+                             '<h1>B</h1><img src="b.png"><img src="c.png"><input type="text"></body></html>'
+}
+LOAD_SECONDS = 0.4
+
+
+class SlowDriver:
+    """WebDriver stand-in whose page loads take LOAD_SECONDS"""
+
+    def __init__(self):
+        self.page_source = ''
+        self.closed = False
+
+    def get(self, url):
+        time.sleep(LOAD_SECONDS)
+        self.page_source = PAGES[url]
+
+    def find_element(self, by, value):
+        return object()
+
+    def find_elements(self, by, value):
+        return []
+
+    def execute_script(self, script, *args):
+        if 'document.evaluate' in script:
+            return [300, [None] * len(args[0])]
+        if 'innerWidth' in script:
+            return [300, 200]
+        return []
+
+    def get_screenshot_as_png(self):
+        return cv2.imencode('.png', np.full((200, 300, 3), 255, dtype=np.uint8))[1].tobytes()
+
+    def quit(self):
+        self.closed = True
+
+
+class FakeCapture:
+    """ScreenshotCapture stand-in tracking the drivers it starts"""
+    started = []
+    fail = False
+
+    def __init__(self, browser="chrome", headless=True):
+        self.driver = None
+
+    def initialize_driver(self, resolution="1920x1080"):
+        if FakeCapture.fail:
+            raise RuntimeError("no browser available")
+        self.driver = SlowDriver()
+        FakeCapture.started.append(self.driver)
+
+    def close(self):
+        if self.driver:
+            self.driver.quit()
+
+
+def _run(config_overrides, fail_second_driver=False):
+    """Run the comparison stages with fake browsers; returns results and the drivers started"""
+    regression = VisualAIRegression()
+    config = {'url1': 'https://example.com/a', 'url2': 'https://example.com/b', 'wcag_cache': False,
+              'ai_analysis': False, 'element_detection': False}
+    config.update(config_overrides)
+    image = np.full((200, 300, 3), 230, dtype=np.uint8)
+
+    original = visual_ai_regression.ScreenshotCapture
+    visual_ai_regression.ScreenshotCapture = FakeCapture
+    FakeCapture.started = []
+    FakeCapture.fail = False
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cwd = os.getcwd()
+        os.chdir(tmpdir)
+        try:
+            run = AnalysisRun()
+            run.screenshot_capturer = FakeCapture()
+            run.screenshot_capturer.initialize_driver()
+            FakeCapture.fail = fail_second_driver
+            results = regression._run_comparisons(image, image.copy(), config, lambda message: None, run)
+        finally:
+            os.chdir(cwd)
+            visual_ai_regression.ScreenshotCapture = original
+    return results, FakeCapture.started
+
+
+def test_audits_run_concurrently():
+    """Both audits overlap on separate drivers and report timings"""
+    print("🧪 Testing concurrent WCAG audits...")
+    results, drivers = _run({})
+    wcag = results['wcag_analysis']
+
+    assert wcag['url1']['url'] == 'https://example.com/a'
+    assert wcag['url2']['url'] == 'https://example.com/b'
+    assert wcag['url2']['total_issues'] > wcag['url1']['total_issues']
+    assert wcag['comparison']['issue_changes']['new'] > 0
+
+    # The run's driver plus one started for url2, closed afterwards
+    assert len(drivers) == 2 and drivers[1].closed and not drivers[0].closed
+    timings = wcag['timings']
+    assert timings['wall_seconds'] < timings['sequential_seconds']
+    assert timings['overlap_seconds'] > 0
+    assert {'metrics', 'layout_shift', 'font_color', 'wcag_wait'} <= set(results['stage_timings'])
+    print(f"✅ {timings['sequential_seconds']:.2f}s of audits in {timings['wall_seconds']:.2f}s")
+
+
+def test_shared_driver_fallback():
+    """Without a second browser both audits run on the run's driver"""
+    print("🧪 Testing shared driver fallback...")
+    results, drivers = _run({}, fail_second_driver=True)
+    wcag = results['wcag_analysis']
+    assert len(drivers) == 1
+    assert wcag['url1']['url'] == 'https://example.com/a' and wcag['url2']['url'] == 'https://example.com/b'
+    assert wcag['timings']['wall_seconds'] >= 2 * LOAD_SECONDS
+    print("✅ Audits serialized on the shared driver")
+
+
+def test_sequential_mode():
+    """wcag_concurrent=False keeps the sequential audits"""
+    print("🧪 Testing sequential mode...")
+    results, drivers = _run({'wcag_concurrent': False})
+    assert len(drivers) == 1
+    assert 'timings' not in results['wcag_analysis']
+    assert results['wcag_analysis']['url2']['url'] == 'https://example.com/b'
+    assert 'wcag_analysis' in results['stage_timings']
+    print("✅ Sequential audits")
+
+
+if __name__ == "__main__":
+    test_audits_run_concurrently()
+    test_shared_driver_fallback()
+    test_sequential_mode()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Test script for the fail-fast gating mode.
+Verifies that analysis stops as soon as a gating threshold is crossed and that
+only the minimal failure report is written.
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import numpy as np
+import cv2
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import visual_ai_regression
+from visual_ai_regression import VisualAIRegression, AnalysisRun, AnalysisGateFailure
+
+# Page load time of the stand-in browser
+LOAD_SECONDS = 0.5
+
+
+def _write_test_images(directory):
+    """Create a baseline image and a heavily changed current image"""
+    baseline = np.full((300, 400, 3), 255, dtype=np.uint8)
+    cv2.rectangle(baseline, (20, 20), (180, 120), (40, 40, 200), -1)
+    current = baseline.copy()
+    current[:, 200:] = 0  # Half the page turns black - badly broken build
+    
+    baseline_path = os.path.join(directory, 'baseline.png')
+    current_path = os.path.join(directory, 'current.png')
+    cv2.imwrite(baseline_path, baseline)
+    cv2.imwrite(current_path, current)
+    return baseline_path, current_path
+
+
+def test_fail_fast_gating():
+    """Test that a crossed threshold stops the analysis and skips later stages"""
+    print("🧪 Testing fail-fast gating mode...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        baseline_path, current_path = _write_test_images(temp_dir)
+        
+        regression = VisualAIRegression()
+        regression.report_generator.output_dir = temp_dir
+        
+        stages = []
+        config = {
+            'baseline_image': baseline_path,
+            'current_image': current_path,
+            'layout_shift': True,
+            'font_color': True,
+            'element_detection': True,
+            'ai_analysis': True,
+            'wcag_analysis': True,
+            'generate_report': True,
+            'fail_fast': True,
+            'gating_thresholds': {'max_pixel_difference_percentage': 10.0}
+        }
+        
+        results = regression.run_image_analysis(config, stages.append)
+        
+        gate = results.get('gate_failure')
+        print(f"   Gate failure: {gate}")
+        assert gate is not None, "Gate should have been triggered"
+        assert gate['stage'] == 'metrics'
+        assert gate['metric'] == 'pixel_difference_percentage'
+        
+        # Later stages must not have run
+        assert not any('AI-powered' in msg for msg in stages), "AI stage should be cancelled"
+        assert not any('WCAG' in msg for msg in stages), "WCAG stage should be cancelled"
+        
+        # Only the minimal failure report is produced
+        assert list(results['reports'].keys()) == ['json']
+        with open(results['reports']['json'], 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        assert report['status'] == 'failed'
+        assert report['metrics']['pixel_difference_percentage'] > 10.0
+        print("✅ Fail-fast gate stopped the analysis after the first metric")
+
+
+def test_gating_disabled_by_default():
+    """Test that gating checks are a no-op unless fail_fast is enabled"""
+    print("🧪 Testing gating is disabled by default...")
+    
+    regression = VisualAIRegression()
+    results = {'ssim': 0.1, 'pixel_metrics': {'pixel_difference_percentage': 90.0}}
+    regression._check_gating(results, {}, 'metrics')
+    print("✅ No gate failure raised without fail_fast")
+
+
+class SlowDriver:
+    """WebDriver stand-in whose page loads take LOAD_SECONDS"""
+
+    def __init__(self):
+        self.page_source = '<html lang="en"><head><title>Page</title></head><body><h1>Page</h1></body></html>'
+        self.closed = False
+
+    def get(self, url):
+        time.sleep(LOAD_SECONDS)
+
+    def find_element(self, by, value):
+        return object()
+
+    def find_elements(self, by, value):
+        return []
+
+    def execute_script(self, script, *args):
+        if 'innerWidth' in script:
+            return [400, 300]
+        return []
+
+    def get_screenshot_as_png(self):
+        return cv2.imencode('.png', np.full((300, 400, 3), 255, dtype=np.uint8))[1].tobytes()
+
+    def quit(self):
+        self.closed = True
+
+
+class FakeCapture:
+    """ScreenshotCapture stand-in tracking the drivers it starts"""
+    started = []
+
+    def __init__(self, browser="chrome", headless=True):
+        self.driver = None
+
+    def initialize_driver(self, resolution="1920x1080"):
+        self.driver = SlowDriver()
+        FakeCapture.started.append(self.driver)
+
+    def close(self):
+        if self.driver:
+            self.driver.quit()
+
+
+def test_gate_failure_cancels_background_wcag():
+    """A gate failure abandons the background WCAG audits instead of waiting for them"""
+    print("🧪 Testing fail-fast with background WCAG audits...")
+    regression = VisualAIRegression()
+    baseline = np.full((300, 400, 3), 255, dtype=np.uint8)
+    current = baseline.copy()
+    current[:, 200:] = 0
+    config = {
+        'url1': 'https://example.com/a',
+        'url2': 'https://example.com/b',
+        'wcag_cache': False,
+        'fail_fast': True,
+        'gating_thresholds': {'max_pixel_difference_percentage': 10.0}
+    }
+
+    original = visual_ai_regression.ScreenshotCapture
+    visual_ai_regression.ScreenshotCapture = FakeCapture
+    FakeCapture.started = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            run = AnalysisRun()
+            run.screenshot_capturer = FakeCapture()
+            run.screenshot_capturer.initialize_driver()
+            start = time.time()
+            try:
+                regression._run_comparisons(baseline, current, config, lambda message: None, run)
+                raise AssertionError("Gate should have been triggered")
+            except AnalysisGateFailure as gate_failure:
+                assert gate_failure.stage == 'metrics'
+            elapsed = time.time() - start
+
+            # The audits stop at their next check: no WCAG report, the second browser is closed
+            time.sleep(3 * LOAD_SECONDS)
+            reports = os.listdir('reports') if os.path.isdir('reports') else []
+            assert not any(name.startswith('wcag_report') for name in reports)
+            assert len(FakeCapture.started) == 2 and FakeCapture.started[1].closed
+        finally:
+            os.chdir(cwd)
+            visual_ai_regression.ScreenshotCapture = original
+
+    print(f"   Gate failure returned after {elapsed:.2f}s")
+    assert elapsed < LOAD_SECONDS, "Gate failure should not wait for the page loads"
+    print("✅ Background audits cancelled")
+
+
+if __name__ == "__main__":
+    test_fail_fast_gating()
+    test_gating_disabled_by_default()
+    test_gate_failure_cancels_background_wcag()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for resolution-independent feature extraction in AIDetector.
+"""
+
+import os
+import sys
+import numpy as np
+import cv2
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_detector import AIDetector
+
+
+def _page(height, width):
+    """Create a synthetic page with a header bar and content blocks"""
+    page = np.full((height, width, 3), 245, dtype=np.uint8)
+    cv2.rectangle(page, (0, 0), (width, height // 10), (30, 60, 160), -1)
+    cv2.rectangle(page, (width // 10, height // 4), (width // 2, height // 2), (200, 40, 40), -1)
+    cv2.circle(page, (3 * width // 4, 3 * height // 4), min(height, width) // 8, (20, 160, 60), -1)
+    return page
+
+
+def test_feature_vector_length_is_stable():
+    """Feature vectors must have the same length for any image size or channel count"""
+    print("🧪 Testing feature vector length...")
+    detector = AIDetector()
+    lengths = {
+        len(detector.extract_features(_page(100, 100))),
+        len(detector.extract_features(_page(1080, 1920))),
+        len(detector.extract_features(_page(6000, 1280))),
+        len(detector.extract_features(cv2.cvtColor(_page(400, 300), cv2.COLOR_RGB2GRAY)))
+    }
+    print(f"   Lengths: {lengths}")
+    assert lengths == {263}
+    print("✅ Feature vector length is stable")
+
+
+def test_features_are_comparable_across_sizes():
+    """The same page rendered at two resolutions must be closer than a different page"""
+    print("🧪 Testing features are comparable across page sizes...")
+    detector = AIDetector()
+    small = detector.extract_features(_page(540, 960))
+    large = detector.extract_features(_page(1080, 1920))
+    different = detector.extract_features(np.flipud(_page(1080, 1920)).copy())
+    
+    same_distance = np.linalg.norm(small - large)
+    different_distance = np.linalg.norm(small - different)
+    print(f"   Same page distance: {same_distance:.3f}, different page distance: {different_distance:.3f}")
+    assert same_distance < different_distance
+    print("✅ Features are comparable across sizes")
+
+
+if __name__ == "__main__":
+    test_feature_vector_length_is_stable()
+    test_features_are_comparable_across_sizes()
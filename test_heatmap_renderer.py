@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the lookup-table heatmap renderer.
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+import cv2
+import matplotlib.colors as mcolors
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from heatmap_renderer import HeatmapRenderer, heatmap_lut, HEATMAP_COLORS, LEGEND_HEIGHT
+from image_comparison import ImageComparison
+from report_generator import ReportGenerator
+
+
+def test_lut_matches_colormap():
+    """The lookup table reproduces the report colormap"""
+    print("🧪 Testing heatmap lookup table...")
+    lut = heatmap_lut()
+    assert lut.shape == (256, 1, 3) and lut.dtype == np.uint8
+    assert tuple(lut[0, 0]) == (128, 0, 0)  # navy, BGR
+    assert tuple(lut[255, 0]) == (0, 0, 255)  # red, BGR
+    colormap = mcolors.LinearSegmentedColormap.from_list('heatmap', HEATMAP_COLORS, N=256)
+    expected = np.array(colormap(np.arange(256) / 255.0))[:, 2::-1] * 255
+    assert np.abs(expected - lut[:, 0]).max() <= 1
+    print("✅ Lookup table matches the colormap")
+
+
+def test_render_native_resolution():
+    """Every pixel is looked up at native size, with the legend strip below"""
+    print("🧪 Testing heatmap rendering...")
+    rng = np.random.default_rng(5)
+    diff = rng.integers(0, 256, (300, 500), dtype=np.uint8)
+    renderer = HeatmapRenderer()
+    heatmap = renderer.render(diff)
+    assert heatmap.shape == (300 + LEGEND_HEIGHT, 500, 3)
+    assert np.array_equal(heatmap[:300], renderer.lut[diff, 0])
+
+    legend = heatmap[300:]
+    assert tuple(legend[LEGEND_HEIGHT // 2, -60]) != tuple(legend[LEGEND_HEIGHT // 2, 60])
+    assert HeatmapRenderer(legend=False).render(diff).shape == (300, 500, 3)
+    assert renderer.render(np.zeros((4, 10), dtype=np.uint8)).shape == (4 + LEGEND_HEIGHT, 10, 3)
+    print("✅ Heatmap rendered at native resolution")
+
+
+def test_comparison_heatmap_reuses_difference_map():
+    """ImageComparison shares the metrics difference map and blends the heatmap over the baseline"""
+    print("🧪 Testing comparison heatmap...")
+    comparator = ImageComparison()
+    img1 = np.full((120, 160, 3), 200, dtype=np.uint8)
+    img2 = img1.copy()
+    img2[40:80, 50:110] = (20, 30, 220)
+    metrics = comparator.calculate_comprehensive_metrics(img1, img2)
+    difference_map = metrics['difference_map']
+    assert difference_map.dtype == np.uint8 and difference_map.shape == (120, 160)
+    assert metrics['pixel_metrics']['different_pixels'] == 40 * 60
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "heatmap.png")
+        # A zero difference map gives the blended baseline with the lowest color
+        comparator.create_difference_heatmap(img1, img2, path, np.zeros_like(difference_map))
+        saved = cv2.imread(path)
+        assert saved.shape == (120 + LEGEND_HEIGHT, 160, 3)
+        expected = np.round(0.7 * 200 + 0.3 * np.array([128, 0, 0]))
+        assert np.abs(saved[60, 80].astype(int) - expected).max() <= 1
+    print("✅ Comparison heatmap blended")
+
+
+def test_report_heatmap_from_difference_map():
+    """The report heatmap renders the analysis difference map without the screenshots"""
+    print("🧪 Testing report heatmap...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        generator = ReportGenerator(output_dir=tmpdir)
+        diff = np.zeros((200, 240), dtype=np.uint8)
+        diff[50:100, 60:120] = 255
+        path = os.path.join(tmpdir, "report_heatmap.png")
+        generator.generate_difference_heatmap({'difference_map': diff, 'screenshots': {}}, path)
+        saved = cv2.imread(path)
+        assert saved.shape == (200 + LEGEND_HEIGHT, 240, 3)
+        assert tuple(saved[75, 90]) == (0, 0, 255)
+        assert tuple(saved[10, 10]) == (128, 0, 0)
+    print("✅ Report heatmap rendered from the difference map")
+
+
+if __name__ == "__main__":
+    test_lut_matches_colormap()
+    test_render_native_resolution()
+    test_comparison_heatmap_reuses_difference_map()
+    test_report_heatmap_from_difference_map()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Test script for issue locators and the accessibility heatmap overlay.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import cv2
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from wcag_rules import DOMRuleEngine, parse_html, element_xpath
+from wcag_cache import dom_fingerprint
+import wcag_checker
+from wcag_checker import WCAGCompliantChecker, IMPACT_COLORS
+
+
+def _sections(count, broken=()):
+    sections = []
+    for i in range(count):
+        image = '<img src="x.png">' if i in broken else '<img src="x.png" alt="ok">'
+        sections.append(f'<section><h2>Section {i}</h2>{image}</section>')
+    return ''.join(sections)
+
+
+def test_rule_issues_have_locators():
+    """Element issues carry the XPath of their element; page-level issues point at the page"""
+    print("🧪 Testing issue locators...")
+    soup = parse_html('<html><body><div><p>Text</p><img src="a.png"></div><img src="b.png"></body></html>')
+    issues = DOMRuleEngine().run(soup)['issues']
+
+    assert [issue['locator'] for issue in issues['text_alternatives']] == \
+        ['/html[1]/body[1]/div[1]/img[1]', '/html[1]/body[1]/img[1]']
+    assert issues['readable'][0]['locator'] == '/html[1]'
+    assert all(issue['locator'] for group in issues.values() for issue in group)
+    assert element_xpath(soup.find_all('img')[1]) == '/html[1]/body[1]/img[1]'
+    print("✅ Every rule issue has a locator")
+
+
+def test_reused_subtree_locators_follow_the_subtree():
+    """Cached subtree issues are relocated when the subtree moves on the page"""
+    print("🧪 Testing locators of reused subtrees...")
+    engine = DOMRuleEngine()
+    first = parse_html(f'<html><body>{_sections(5, broken={3})}</body></html>')
+    first_run = engine.run_partitioned(first, dom_fingerprint(first)['units'])
+
+    # A new section at the top shifts every unchanged section down by one
+    second = parse_html(f'<html><body><section><h2>New</h2></section>{_sections(5, broken={3})}</body></html>')
+    second_run = engine.run_partitioned(second, dom_fingerprint(second)['units'], first_run['unit_issues'])
+    assert second_run['units_rechecked'] == 1
+    assert second_run['issues'] == engine.run(second)['issues']
+    assert second_run['rule_issues']['image_alt'][0]['locator'] == '/html[1]/body[1]/section[5]/img[1]'
+    print("✅ Reused issues point at the moved subtree")
+
+
+def test_overlay_blending():
+    """Rects are blended by impact; uncovered pixels and the input stay unchanged"""
+    print("🧪 Testing overlay blending...")
+    checker = WCAGCompliantChecker()
+    image = np.full((100, 200, 3), 255, dtype=np.uint8)
+    rects = np.array([[10, 10, 50, 50], [40, 40, 50, 50], [150, 10, 20, 20], [300, 300, 10, 10]], dtype=np.float64)
+    overlay = checker._render_issue_overlay(image, rects, ['moderate', 'critical', 'unknown', 'major'])
+
+    assert (image == 255).all()
+    assert tuple(overlay[5, 5]) == (255, 255, 255)
+    moderate, critical, both = overlay[20, 20].astype(int), overlay[80, 80].astype(int), overlay[50, 50].astype(int)
+    assert moderate[2] < moderate[0] and moderate[1] > 180  # yellow tint
+    assert critical[0] > critical[1] and critical[0] > critical[2]  # red tint
+    # Overlap takes the most severe color, more opaque
+    assert both[1] < critical[1] and both[0] > both[1]
+    # Borders are almost opaque
+    assert np.abs(overlay[40, 60].astype(int) - IMPACT_COLORS[3]).max() < 30
+    print("✅ Overlay colored by impact")
+
+
+def test_overlay_scales_to_many_issues():
+    """Thousands of rects are rendered without a per-pixel loop"""
+    print("🧪 Testing overlay with many issues...")
+    checker = WCAGCompliantChecker()
+    rng = np.random.default_rng(2)
+    image = np.full((4000, 1280, 3), 240, dtype=np.uint8)
+    rects = np.column_stack([rng.uniform(0, 1200, 5000), rng.uniform(0, 3900, 5000),
+                             rng.uniform(5, 80, 5000), rng.uniform(5, 80, 5000)])
+    impacts = rng.choice(['minor', 'moderate', 'major', 'critical'], 5000)
+    start = time.time()
+    overlay = checker._render_issue_overlay(image, rects, impacts)
+    elapsed = time.time() - start
+    assert overlay.shape == image.shape and (overlay != 240).any()
+    print(f"✅ 5000 rects blended in {elapsed * 1000:.0f} ms")
+
+
+def test_overlay_bands_match_single_pass():
+    """Blending in row bands gives the same image as one band; pixels outside the issues are untouched"""
+    print("🧪 Testing banded overlay rendering...")
+    checker = WCAGCompliantChecker()
+    rng = np.random.default_rng(4)
+    image = rng.integers(0, 255, (700, 300, 3), dtype=np.uint8)
+    rects = np.column_stack([rng.uniform(20, 250, 60), rng.uniform(100, 600, 60),
+                             rng.uniform(2, 60, 60), rng.uniform(2, 60, 60)])
+    impacts = rng.choice(['minor', 'moderate', 'major', 'critical'], 60)
+
+    band_rows = wcag_checker.OVERLAY_BAND_ROWS
+    try:
+        wcag_checker.OVERLAY_BAND_ROWS = 10000
+        single = checker._render_issue_overlay(image, rects, impacts)
+        wcag_checker.OVERLAY_BAND_ROWS = 7
+        banded = checker._render_issue_overlay(image, rects, impacts)
+    finally:
+        wcag_checker.OVERLAY_BAND_ROWS = band_rows
+    assert np.array_equal(single, banded)
+    assert np.array_equal(banded[:99], image[:99]) and np.array_equal(banded[:, :19], image[:, :19])
+    print("✅ Banded overlay matches")
+
+
+class HeatmapDriver:
+    """WebDriver stand-in answering the issue rect script"""
+
+    def __init__(self, html):
+        self.page_source = html
+        self.rect_calls = 0
+
+    def get(self, url):
+        pass
+
+    def find_element(self, by, value):
+        return object()
+
+    def find_elements(self, by, value):
+        return []
+
+    def execute_script(self, script, *args):
+        if 'document.evaluate' in script:
+            self.rect_calls += 1
+            rects = [[20 + 30 * i, 40, 20, 20] if locator.endswith('img[1]') else None
+                     for i, locator in enumerate(args[0])]
+            return [400, rects]
+        if 'innerWidth' in script:
+            return [400, 300]
+        return []
+
+    def get_screenshot_as_png(self):
+        return cv2.imencode('.png', np.full((300, 400, 3), 255, dtype=np.uint8))[1].tobytes()
+
+
+def test_heatmap_from_audit():
+    """An audit resolves all issue rects in one call and writes the overlay"""
+    print("🧪 Testing accessibility heatmap...")
+    html = f'<html lang="en"><head><title>Heatmap</title></head><body><a href="#main">Skip</a>' \
+           f'<h1>Title</h1>{_sections(4, broken={0, 2})}</body></html>'
+    driver = HeatmapDriver(html)
+    checker = WCAGCompliantChecker()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cwd = os.getcwd()
+        os.chdir(tmpdir)
+        try:
+            results = checker.check_wcag_compliance(driver, "https://example.com")
+            heatmap = cv2.cvtColor(cv2.imread(results['accessibility_heatmap']), cv2.COLOR_BGR2RGB)
+        finally:
+            os.chdir(cwd)
+
+    assert driver.rect_calls == 1
+    missing_alt = [issue for issue in results['categories']['perceivable']['issues']
+                   if issue['description'] == 'Image missing alt text']
+    assert len(missing_alt) == 2 and all(issue['rect'] for issue in missing_alt)
+    stats = results['detailed_analysis']['heatmap']
+    assert stats['markers'] == 2
+    x, y = int(missing_alt[0]['rect'][0]) + 10, 50
+    assert heatmap[y, x, 0] > heatmap[y, x, 1]  # critical issues are red
+    assert tuple(heatmap[250, 300]) == (255, 255, 255)
+    print(f"✅ {stats['markers']} markers of {stats['issues']} issues drawn")
+
+
+if __name__ == "__main__":
+    test_rule_issues_have_locators()
+    test_reused_subtree_locators_follow_the_subtree()
+    test_overlay_blending()
+    test_overlay_scales_to_many_issues()
+    test_overlay_bands_match_single_pass()
+    test_heatmap_from_audit()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for bounded issue snippets, CSS paths and element fingerprints.
+"""
+
+import os
+import sys
+import time
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from wcag_rules import DOMRuleEngine, parse_html, element_snippet, element_fingerprint, css_path
+from visual_ai_regression import VisualAIRegression
+
+
+def _cards(count, start=0):
+    return ''.join(f'<div class="card" onclick="open({i})"><p>Card {i}</p>' + '<span>x</span>' * 50 + '</div>'
+                   for i in range(start, start + count))
+
+
+def test_snippet_is_bounded():
+    """Snippets hold the opening tag, key attributes and leading text only"""
+    print("🧪 Testing bounded snippets...")
+    soup = parse_html(f'<html><body><div id="app" onclick="boot()" data-state="{"x" * 500}">'
+                      f'{_cards(500)}</div></body></html>')
+    wrapper = soup.find(id='app')
+
+    start = time.time()
+    snippet = element_snippet(wrapper)
+    elapsed = time.time() - start
+    assert snippet.startswith('<div id="app" onclick="boot()">Card 0 x x')
+    assert snippet.endswith('...') and len(snippet) < 120
+    assert 'data-state' not in snippet
+    assert elapsed < 0.05
+
+    long_class = parse_html(f'<html><body><p class="{"c" * 100}">Hi</p></body></html>').p
+    assert element_snippet(long_class) == f'<p class="{"c" * 40}...">Hi'
+    print(f"✅ {len(snippet)}-character snippet of a {len(str(wrapper))}-character subtree")
+
+
+def test_css_path():
+    """CSS paths are anchored at the nearest id and use positions only when needed"""
+    print("🧪 Testing CSS paths...")
+    soup = parse_html('<html><body><main id="main"><ul class="menu main-menu extra"><li>A</li><li><a>B</a></li></ul>'
+                      '</main><footer><p>C</p></footer></body></html>')
+    assert css_path(soup.find('a')) == '#main > ul.menu.main-menu > li:nth-of-type(2) > a'
+    assert css_path(soup.find('footer').p) == 'html > body > footer > p'
+    assert css_path(soup.find(id='main')) == '#main'
+    print("✅ CSS paths built")
+
+
+def test_fingerprint_stable_across_runs():
+    """Fingerprints survive insertions elsewhere and change with the element"""
+    print("🧪 Testing element fingerprints...")
+    engine = DOMRuleEngine()
+    before = engine.run(parse_html(f'<html><body><main>{_cards(3)}</main></body></html>'))
+    after = engine.run(parse_html(f'<html><body><header><p>Banner</p></header><main>{_cards(1, 7)}{_cards(3)}'
+                                  f'</main></body></html>'))
+    fingerprints = lambda run: [issue['fingerprint'] for issue in run['issues']['input_modalities']]
+
+    assert len(set(fingerprints(before))) == 3
+    assert set(fingerprints(before)) < set(fingerprints(after))
+    moved = after['issues']['input_modalities'][1]
+    assert moved['selector'] == 'html > body > main > div.card:nth-of-type(2)'
+    assert element_fingerprint(parse_html('<div class="card">Card 0</div>').div) != \
+        element_fingerprint(parse_html('<div class="card">Card 1</div>').div)
+    print("✅ Fingerprints stable")
+
+
+def test_issue_diff_between_audits():
+    """Audit comparisons list new and resolved issues by fingerprint"""
+    print("🧪 Testing issue diff...")
+    engine = DOMRuleEngine()
+
+    def audit(html):
+        issues = [issue for group in engine.run(parse_html(html))['issues'].values() for issue in group]
+        return {'categories': {'perceivable': {'score': 100, 'issues': issues}}}
+
+    first = audit(f'<html><body><main>{_cards(3)}<img src="a.png"></main></body></html>')
+    second = audit(f'<html><body><main>{_cards(1, 9)}{_cards(3)}<img src="a.png" alt="A"></main></body></html>')
+    changes = VisualAIRegression()._diff_wcag_issues(first, second)
+    assert changes['new'] == 1 and changes['resolved'] == 1
+    assert changes['new_issues'][0]['element'].startswith('<div class="card" onclick="open(9)">Card 9')
+    assert changes['resolved_issues'][0]['description'] == 'Image missing alt text'
+    print(f"✅ {changes['new']} new, {changes['resolved']} resolved, {changes['unchanged']} unchanged")
+
+
+if __name__ == "__main__":
+    test_snippet_is_bounded()
+    test_css_path()
+    test_fingerprint_stable_across_runs()
+    test_issue_diff_between_audits()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test script for patch-index based moved/duplicated component detection in ImageComparison.
+"""
+
+import os
+import sys
+import numpy as np
+import cv2
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from image_comparison import ImageComparison
+
+
+def _page_with_component():
+    """Build a tall synthetic page with one textured component near the top"""
+    rng = np.random.default_rng(0)
+    page = np.full((2400, 1000, 3), 250, dtype=np.uint8)
+    component = cv2.GaussianBlur((rng.random((120, 200, 3)) * 255).astype(np.uint8), (5, 5), 0)
+    page[100:220, 100:300] = component
+    cv2.putText(page, "Header", (450, 150), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
+    return page, component
+
+
+def test_moved_component_reported_once():
+    """A component moved far down the page is one 'moved' record, not removal plus addition"""
+    print("🧪 Testing moved component detection...")
+    comparator = ImageComparison()
+    baseline, component = _page_with_component()
+    current = baseline.copy()
+    current[100:220, 100:300] = 250
+    current[1803:1923, 607:807] = component
+
+    moves = comparator.detect_moved_components(baseline, current)
+    assert len(moves) == 1, moves
+    move = moves[0]
+    assert move['type'] == 'moved'
+    assert (move['shift_x'], move['shift_y']) == (507, 1703)
+
+    # Source and destination boxes cover the component
+    x, y, w, h = move['original_position']
+    assert x <= 100 and y <= 100 and x + w >= 300 and y + h >= 220
+    x, y, w, h = move['new_position']
+    assert x <= 607 and y <= 1803 and x + w >= 807 and y + h >= 1923
+    print(f"✅ Moved component found: {move['original_position']} → {move['new_position']}")
+
+
+def test_duplicated_component():
+    """A copy that leaves the original in place is reported as duplicated"""
+    print("🧪 Testing duplicated component detection...")
+    comparator = ImageComparison()
+    baseline, component = _page_with_component()
+    current = baseline.copy()
+    current[1403:1523, 507:707] = component
+
+    moves = comparator.detect_moved_components(baseline, current)
+    assert moves, "duplicate not detected"
+    assert moves[0]['type'] == 'duplicated'
+    assert (moves[0]['shift_x'], moves[0]['shift_y']) == (407, 1303)
+    print(f"✅ Duplicated component found with {moves[0]['patch_count']} patches")
+
+
+def test_identical_and_blank_pages():
+    """Identical or blank pages produce no moves"""
+    print("🧪 Testing pages without moves...")
+    comparator = ImageComparison()
+    baseline, _ = _page_with_component()
+    assert comparator.detect_moved_components(baseline, baseline.copy()) == []
+
+    blank = np.full((600, 800, 3), 255, dtype=np.uint8)
+    assert comparator.detect_moved_components(blank, blank.copy()) == []
+    print("✅ No moves reported")
+
+
+def test_differently_colored_shape_is_not_a_move():
+    """A new shape in another colour must not match the original (correlation alone would)"""
+    print("🧪 Testing recoloured shape rejection...")
+    comparator = ImageComparison()
+    baseline = np.full((400, 300, 3), 240, dtype=np.uint8)
+    cv2.rectangle(baseline, (20, 20), (200, 80), (30, 60, 200), -1)
+    current = baseline.copy()
+    cv2.rectangle(current, (40, 200), (250, 260), (10, 160, 20), -1)
+
+    assert comparator.detect_moved_components(baseline, current) == []
+    print("✅ Recoloured shape not reported as moved")
+
+
+def _text_page(repeated, height=2400, width=1000):
+    """Build a text-dense page of random words, or of one repeated sentence"""
+    rng = np.random.default_rng(1)
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit", "sed", "tempor"]
+    page = np.full((height, width, 3), 255, dtype=np.uint8)
+    for y in range(40, height - 20, 34):
+        text = "the quick brown fox jumps over the lazy dog" if repeated else " ".join(rng.choice(words, 8))
+        cv2.putText(page, text, (30, y), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (20, 20, 20), 2, cv2.LINE_AA)
+    return page
+
+
+def test_uniform_page_shift_is_not_a_move():
+    """Content pushed down as a whole (e.g. by a taller header) must not be reported as moved"""
+    print("🧪 Testing uniform page shifts...")
+    comparator = ImageComparison()
+    for repeated in (False, True):
+        baseline = _text_page(repeated)
+        for shift in (37, 120):
+            current = np.full_like(baseline, 255)
+            current[shift:] = baseline[:-shift]
+            moves = comparator.detect_moved_components(baseline, current)
+            assert moves == [], (repeated, shift, moves)
+    print("✅ Page shifts not reported as moved components")
+
+
+if __name__ == "__main__":
+    test_moved_component_reported_once()
+    test_duplicated_component()
+    test_identical_and_blank_pages()
+    test_differently_colored_shape_is_not_a_move()
+    test_uniform_page_shift_is_not_a_move()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script for offline WCAG analysis of saved HTML snapshots.
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from wcag_offline import OfflineWCAGAuditor, main
+from wcag_checker import WCAGCompliantChecker
+
+GOOD_PAGE = ('<html lang="en"><head><title>Good</title></head>'
+             '<body><a href="#main">Skip</a><h1 id="main">Title</h1></body></html>')
+BAD_PAGE = ('<html><head></head><body><h3>Sub</h3><img src="a.png">'
+            '<input type="text"><div id="x"></div><div id="x"></div></body></html>')
+
+
+def _write_snapshots(directory, count):
+    os.makedirs(os.path.join(directory, "session"), exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, "session" if i % 2 else "", f"page_{i}.html")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(BAD_PAGE if i % 3 == 0 else GOOD_PAGE)
+        paths.append(os.path.normpath(path))
+    with open(os.path.join(directory, "notes.txt"), 'w') as f:
+        f.write("not html")
+    return sorted(paths)
+
+
+def test_offline_results_match_static_checks():
+    """Offline mode reports the static rule issues and lists skipped checks"""
+    print("🧪 Testing offline analysis of one page...")
+    checker = WCAGCompliantChecker()
+    results = checker.check_html_compliance(BAD_PAGE, "saved/bad.html")
+
+    assert results['mode'] == 'offline' and results['url'] == "saved/bad.html"
+    descriptions = [issue['description'] for data in results['categories'].values() for issue in data['issues']]
+    assert 'Image missing alt text' in descriptions
+    assert 'Duplicate ID found: x' in descriptions
+    assert 'Page missing language declaration' in descriptions
+    assert results['total_issues'] == len(descriptions)
+
+    skipped = {check['guideline'] for check in results['skipped_checks']}
+    assert {'1.4.3', '1.4.6', '2.5.8'} <= skipped
+    assert results['wcag_22_features']['target_size_compliant'] is None
+    assert 'color_contrast' not in results['detailed_analysis']
+    assert checker.check_html_compliance(GOOD_PAGE, "good.html")['total_issues'] == 0
+    print(f"✅ {results['total_issues']} issues, {len(results['skipped_checks'])} checks skipped")
+
+
+def test_directory_audit_in_process_pool():
+    """Directories are expanded and audited in parallel with the same results as serially"""
+    print("🧪 Testing parallel directory audit...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = _write_snapshots(tmpdir, 12)
+        auditor = OfflineWCAGAuditor(max_workers=2)
+        assert auditor.collect_files([tmpdir, os.path.join(tmpdir, "missing")]) == paths
+
+        parallel = auditor.audit(tmpdir)
+        serial = OfflineWCAGAuditor(max_workers=1).audit(tmpdir)
+
+    assert [r['url'] for r in parallel['files']] == paths
+    assert [r['total_issues'] for r in parallel['files']] == [r['total_issues'] for r in serial['files']]
+    summary = parallel['summary']
+    assert summary['files'] == 12 and summary['errors'] == 0 and summary['workers'] == 2
+    assert summary['min_score'] < 100
+    print(f"✅ {summary['files']} files audited, average score {summary['average_score']:.1f}%")
+
+
+def test_command_line_exit_status():
+    """The CLI writes JSON results and fails when a page is below --min-score"""
+    print("🧪 Testing command line...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write_snapshots(tmpdir, 4)
+        output = os.path.join(tmpdir, "out", "results.json")
+        assert main([tmpdir, '--workers', '1', '--output', output]) == 0
+        assert main([tmpdir, '--workers', '1', '--output', output, '--min-score', '99']) == 1
+        with open(output) as f:
+            assert json.load(f)['summary']['files'] == 4
+    print("✅ CLI exit status reflects --min-score")
+
+
+if __name__ == "__main__":
+    test_offline_results_match_static_checks()
+    test_directory_audit_in_process_pool()
+    test_command_line_exit_status()
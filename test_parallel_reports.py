@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Test script for parallel report artifact rendering.
+"""
+
+import os
+import sys
+import pickle
+import zipfile
+import tempfile
+import pytest
+import numpy as np
+import cv2
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import report_generator
+from report_generator import (ReportGenerator, REPORT_ARTIFACTS, _share_arrays, _attach_arrays, _release_images,
+                              shutdown_report_pool)
+from report_serializer import ReportSerializer
+from artifact_store import ArtifactStore
+
+
+def _screenshots(directory):
+    """Write a baseline/current screenshot pair and return their paths"""
+    baseline = np.full((300, 400, 3), 235, dtype=np.uint8)
+    cv2.rectangle(baseline, (40, 40), (200, 120), (180, 90, 20), -1)
+    current = baseline.copy()
+    cv2.rectangle(current, (220, 180), (360, 260), (20, 40, 200), -1)
+    paths = {'url1': os.path.join(directory, "url1.png"), 'url2': os.path.join(directory, "url2.png")}
+    cv2.imwrite(paths['url1'], baseline)
+    cv2.imwrite(paths['url2'], current)
+    return paths
+
+
+def _analysis_results(paths, run_id):
+    return {
+        'run_id': run_id,
+        'screenshots': paths,
+        'similarity_score': 0.9,
+        'layout_shifts': [{'distance': 12.0, 'shift_x': 4, 'shift_y': 8}],
+        'color_differences': [],
+        'summary_dict': {'similarity_score': 0.9}
+    }
+
+
+def test_shared_images_round_trip():
+    """Images copied to shared memory come back as read-only views, and unlinking frees them"""
+    print("🧪 Testing shared memory images...")
+    images = {'url1': np.arange(60, dtype=np.uint8).reshape(4, 5, 3), 'url2': np.zeros((2, 2, 3), dtype=np.uint8)}
+    blocks = []
+    try:
+        specs = _share_arrays(images, blocks, min_bytes=0)
+        view_blocks = []
+        views = _attach_arrays(specs, view_blocks)
+        assert all(np.array_equal(views[key], images[key]) for key in images)
+        assert not views['url1'].flags.writeable
+        views = None
+        _release_images(view_blocks)
+    finally:
+        _release_images(blocks, unlink=True)
+    with pytest.raises(FileNotFoundError):
+        _attach_arrays(specs, [])
+    print("✅ Shared images round-trip")
+
+
+def test_parallel_matches_sequential():
+    """Worker processes render the same artifacts as the sequential path"""
+    print("🧪 Testing parallel report rendering...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = _screenshots(tmpdir)
+        generator = ReportGenerator(output_dir=os.path.join(tmpdir, "reports"),
+                                    artifact_store=ArtifactStore(os.path.join(tmpdir, "store")))
+        sequential_results = _analysis_results(paths, 'sequential')
+        parallel_results = _analysis_results(paths, 'parallel')
+        sequential = generator.generate_comprehensive_report(sequential_results, {'report_workers': 1})
+        parallel = generator.generate_comprehensive_report(parallel_results, {'report_workers': 3})
+
+        assert list(parallel)[:len(REPORT_ARTIFACTS)] == list(REPORT_ARTIFACTS)
+        assert list(parallel_results['report_timings']) == list(REPORT_ARTIFACTS)
+        assert parallel_results['report_duration'] > 0
+        for artifact in REPORT_ARTIFACTS:
+            assert os.path.exists(parallel[artifact]), artifact
+        for artifact in ('visual', 'sidebyside'):
+            assert np.array_equal(cv2.imread(sequential[artifact]), cv2.imread(parallel[artifact])), artifact
+
+        # The package holds exactly the files it depends on, whichever finished first
+        with zipfile.ZipFile(parallel['package']) as package:
+            names = set(package.namelist())
+        assert names == {os.path.basename(parallel[name]) for name in REPORT_ARTIFACTS['package']} | {
+            'original_screenshot_url1.png', 'original_screenshot_url2.png', 'README.txt'}
+
+        # The HTML report waits for the exports it links to
+        with open(parallel['html'], encoding='utf-8') as f:
+            html = f.read()
+        assert 'Not available' not in html
+    print("✅ Parallel reports match the sequential ones")
+
+
+def test_analysis_arrays_shared_with_workers():
+    """Large analysis arrays are sent to workers as shared memory references, not pickled copies"""
+    print("🧪 Testing shared analysis arrays...")
+    rng = np.random.default_rng(0)
+    diff_image = rng.random((600, 800), dtype=np.float32)
+    results = {'run_id': 'arrays', 'diff_image': diff_image, 'pixel_metrics': {'histogram': np.arange(8)},
+               'regions': [{'mask': np.ones((300, 300), dtype=np.uint8)}]}
+
+    blocks = []
+    try:
+        shared = _share_arrays(results, blocks)
+        assert len(blocks) == 2
+        assert len(pickle.dumps(shared)) < 2048 < diff_image.nbytes
+        # Small arrays stay inline
+        assert np.array_equal(shared['pixel_metrics']['histogram'], np.arange(8))
+        view_blocks = []
+        views = _attach_arrays(shared, view_blocks)
+        assert np.array_equal(views['diff_image'], diff_image)
+        assert views['regions'][0]['mask'].shape == (300, 300)
+        views = None
+        _release_images(view_blocks)
+    finally:
+        _release_images(blocks, unlink=True)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        generator = ReportGenerator(output_dir=tmpdir, artifact_store=ArtifactStore(os.path.join(tmpdir, "store")))
+        reports = generator.generate_comprehensive_report(
+            dict(results, summary_dict={}), {'report_formats': ['json', 'pdf'], 'report_workers': 2})
+        loaded = ReportSerializer().load(reports['json'])
+        assert np.array_equal(loaded['analysis_results']['diff_image'], diff_image)
+    print("✅ Analysis arrays shared with the report workers")
+
+
+def test_in_memory_screenshots():
+    """Decoded screenshots are used without reading the screenshot files"""
+    print("🧪 Testing reports from decoded screenshots...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        generator = ReportGenerator(output_dir=tmpdir, artifact_store=ArtifactStore(os.path.join(tmpdir, "store")))
+        images = {'url1': np.full((120, 200, 3), (255, 0, 0), dtype=np.uint8),
+                  'url2': np.full((120, 160, 3), (0, 0, 255), dtype=np.uint8)}
+        missing = {'url1': os.path.join(tmpdir, "gone1.png"), 'url2': os.path.join(tmpdir, "gone2.png")}
+        for workers in (1, 2):
+            results = _analysis_results(missing, f"memory_{workers}")
+            reports = generator.generate_comprehensive_report(
+                results, {'report_formats': ['sidebyside', 'visual'], 'report_workers': workers}, images=images)
+
+            side_by_side = cv2.imread(reports['sidebyside'])
+            assert side_by_side.shape[:2] == (120, 200 + 160 + 20)
+            # RGB input: red on the left, blue on the right (BGR on disk)
+            assert tuple(side_by_side[100, 100]) == (0, 0, 255)
+            assert tuple(side_by_side[100, 300]) == (255, 0, 0)
+            assert cv2.imread(reports['visual']).shape[:2] == (120, 160)
+    print("✅ Decoded screenshots rendered")
+
+
+def test_report_pool_is_reused():
+    """Reports share one long-lived pool whose workers are not forked from the caller"""
+    print("🧪 Testing the shared report pool...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = _screenshots(tmpdir)
+        generator = ReportGenerator(output_dir=os.path.join(tmpdir, "reports"),
+                                    artifact_store=ArtifactStore(os.path.join(tmpdir, "store")))
+        pools = []
+        for run_id in ('first', 'second'):
+            reports = generator.generate_comprehensive_report(
+                _analysis_results(paths, run_id), {'report_formats': ['json', 'summary'], 'report_workers': 2})
+            assert os.path.exists(reports['json']) and os.path.exists(reports['summary'])
+            pools.append(report_generator._report_pool)
+
+        assert pools[0] is not None and pools[0] is pools[1]
+        assert pools[0]._mp_context.get_start_method() != 'fork'
+        shutdown_report_pool()
+        assert report_generator._report_pool is None
+    print("✅ Report pool reused across reports")
+
+
+if __name__ == "__main__":
+    test_shared_images_round_trip()
+    test_parallel_matches_sequential()
+    test_analysis_arrays_shared_with_workers()
+    test_in_memory_screenshots()
+    test_report_pool_is_reused()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for vectorized region extraction and one-to-one region matching in AIDetector.
+"""
+
+import os
+import sys
+import numpy as np
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_detector import AIDetector
+
+
+def _random_regions(rng, count):
+    """Build a columnar region table shaped like AIDetector.segment_image output"""
+    return {
+        'label': np.arange(1, count + 1),
+        'area': rng.integers(10, 500, count).astype(np.float64),
+        'centroid': rng.random((count, 2)) * 500,
+        'bbox': np.zeros((count, 4), dtype=np.int64),
+        'eccentricity': rng.random(count),
+        'mean_color': rng.random((count, 3)) * 255,
+        'std_color': rng.random((count, 3)) * 10
+    }
+
+
+def _pairwise_similarity(region1, region2):
+    """Reference similarity of two region records, computed one pair at a time"""
+    area_ratio = min(region1['area'], region2['area']) / max(region1['area'], region2['area'])
+    
+    centroid_distance = np.linalg.norm(np.subtract(region1['centroid'], region2['centroid']))
+    max_distance = np.linalg.norm(region1['centroid']) + np.linalg.norm(region2['centroid'])
+    position_similarity = 1 - centroid_distance / max_distance if max_distance > 0 else 0
+    
+    ecc_max = max(region1['eccentricity'], region2['eccentricity'])
+    shape_similarity = min(region1['eccentricity'], region2['eccentricity']) / ecc_max if ecc_max > 0 else 0
+    
+    color_distance = np.linalg.norm(region1['mean_color'] - region2['mean_color'])
+    color_similarity = 1 / (1 + color_distance / 100)
+    
+    return (area_ratio * 0.3 + position_similarity * 0.4 +
+            shape_similarity * 0.2 + color_similarity * 0.1)
+
+
+def test_similarity_matrix_matches_pairwise():
+    """The vectorized matrix must agree with the pairwise similarity"""
+    print("🧪 Testing vectorized region similarity matrix...")
+    detector = AIDetector()
+    rng = np.random.default_rng(42)
+    props1 = _random_regions(rng, 25)
+    props2 = _random_regions(rng, 30)
+    
+    matrix = detector._region_similarity_matrix(props1, props2)
+    assert matrix.shape == (25, 30)
+    for i in range(25):
+        for j in range(30):
+            expected = _pairwise_similarity(detector._region_record(props1, i),
+                                            detector._region_record(props2, j))
+            assert abs(matrix[i, j] - expected) < 1e-9
+    print("✅ Similarity matrix matches pairwise calculation")
+
+
+def test_matches_are_one_to_one():
+    """Each region may be matched at most once in either image"""
+    print("🧪 Testing one-to-one region assignment...")
+    detector = AIDetector()
+    rng = np.random.default_rng(7)
+    props1 = _random_regions(rng, 40)
+    props2 = _random_regions(rng, 35)
+    
+    matches = detector._match_regions(props1, props2)
+    assert len({m['idx1'] for m in matches}) == len(matches)
+    assert len({m['idx2'] for m in matches}) == len(matches)
+    assert all(m['confidence'] > 0.5 for m in matches)
+    assert detector._match_regions(detector._empty_region_table(), props2) == []
+    print(f"✅ {len(matches)} one-to-one matches found")
+
+
+def test_region_table_matches_regionprops():
+    """The columnar region table must agree with per-region regionprops values"""
+    print("🧪 Testing vectorized region table extraction...")
+    from skimage.measure import regionprops
+    
+    detector = AIDetector()
+    rng = np.random.default_rng(0)
+    image = (rng.random((120, 160, 3)) * 255).astype(np.uint8)
+    image[30:90, 40:120] = [200, 10, 10]
+    
+    segments, table = detector.segment_image(image, n_segments=30)
+    regions = [r for r in regionprops(segments) if r.area >= 10]
+    assert detector._region_count(table) == len(regions)
+    
+    for row, region in enumerate(regions):
+        pixels = image[segments == region.label].astype(np.float64)
+        assert np.allclose(table['centroid'][row], region.centroid)
+        assert tuple(table['bbox'][row]) == region.bbox
+        assert np.allclose(table['mean_color'][row], pixels.mean(axis=0))
+        assert np.allclose(table['std_color'][row], pixels.std(axis=0))
+    print(f"✅ Region table matches regionprops for {len(regions)} regions")
+
+
+if __name__ == "__main__":
+    test_similarity_matrix_matches_pairwise()
+    test_matches_are_one_to_one()
+    test_region_table_matches_regionprops()
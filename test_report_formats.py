@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for format-selective report generation.
+"""
+
+import os
+import sys
+import tempfile
+import pytest
+from PIL import Image, ImageDraw
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from report_generator import ReportGenerator, REPORT_ARTIFACTS
+from artifact_store import ArtifactStore
+
+
+def _analysis_results(directory):
+    """Minimal analysis results with two screenshots on disk"""
+    paths = {}
+    for key, offset in (('url1', 0), ('url2', 20)):
+        image = Image.new('RGB', (400, 300), color='lightcyan')
+        ImageDraw.Draw(image).rectangle([100 + offset, 100, 200 + offset, 160], fill='blue')
+        paths[key] = os.path.join(directory, f"{key}.png")
+        image.save(paths[key])
+    return {
+        'run_id': 'formats_test',
+        'screenshots': paths,
+        'similarity_score': 0.93,
+        'ssim': 0.93,
+        'mse': 12.0,
+        'layout_shifts': [],
+        'color_differences': [],
+        'summary_dict': {'similarity_score': 0.93}
+    }
+
+
+def test_dependency_resolution():
+    """Requested formats pull in their dependencies, in build order"""
+    print("🧪 Testing report format resolution...")
+    generator = ReportGenerator(output_dir=tempfile.mkdtemp())
+    assert generator.resolve_report_artifacts() == list(REPORT_ARTIFACTS)
+    assert generator.resolve_report_artifacts(['json']) == ['json']
+    assert generator.resolve_report_artifacts('summary') == ['summary']
+    assert generator.resolve_report_artifacts(['html']) == ['visual', 'sidebyside', 'heatmap', 'html']
+    assert generator.resolve_report_artifacts(['html', 'pdf']) == ['pdf', 'visual', 'sidebyside', 'heatmap', 'html']
+    assert generator.resolve_report_artifacts(['package']) == ['pdf', 'json', 'visual', 'sidebyside', 'heatmap',
+                                                               'package']
+    with pytest.raises(ValueError):
+        generator.resolve_report_artifacts(['docx'])
+    print("✅ Dependencies resolved")
+
+
+def test_json_only():
+    """A JSON-only request builds nothing else and times the artifact"""
+    print("🧪 Testing JSON-only report...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output_dir = os.path.join(tmpdir, "reports")
+        generator = ReportGenerator(output_dir=output_dir)
+        results = _analysis_results(tmpdir)
+        reports = generator.generate_comprehensive_report(results, {'report_formats': ['json']})
+
+        assert list(reports) == ['json']
+        assert os.listdir(output_dir) == [os.path.basename(reports['json'])]
+        assert set(results['report_timings']) == {'json'}
+    print("✅ Only the JSON report was written")
+
+
+def test_html_with_dependencies():
+    """The HTML report gets its images; exports that were not requested show as unavailable"""
+    print("🧪 Testing HTML report with dependencies...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output_dir = os.path.join(tmpdir, "reports")
+        generator = ReportGenerator(output_dir=output_dir, artifact_store=ArtifactStore(os.path.join(tmpdir, "store")))
+        results = _analysis_results(tmpdir)
+        reports = generator.generate_comprehensive_report(results, {'report_formats': ['html']})
+
+        assert {'visual', 'sidebyside', 'heatmap', 'html'} <= set(reports)
+        assert 'pdf' not in reports and 'package' not in reports
+        assert all(os.path.exists(reports[name]) for name in ('visual', 'sidebyside', 'heatmap', 'html'))
+        with open(reports['html'], encoding='utf-8') as f:
+            html = f.read()
+        assert os.path.basename(reports['sidebyside']) in html
+        assert 'PDF version of this analysis report (Not available)' in html
+        assert list(results['report_timings']) == ['visual', 'sidebyside', 'heatmap', 'html']
+    print("✅ HTML report built with its images")
+
+
+if __name__ == "__main__":
+    test_dependency_resolution()
+    test_json_only()
+    test_html_with_dependencies()
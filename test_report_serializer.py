@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for the compact JSON report serializer with .npz array sidecars.
+"""
+
+import os
+import sys
+import json
+import zipfile
+import tempfile
+import numpy as np
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from report_serializer import ReportSerializer, sidecar_path, ARRAY_REFERENCE_KEY
+from report_generator import ReportGenerator
+
+
+def _analysis_results():
+    rng = np.random.default_rng(7)
+    return {
+        'similarity_score': np.float64(0.875),
+        'mse': np.float32(12.5),
+        'diff_image': rng.integers(0, 255, (120, 160), dtype=np.uint8),
+        'color_diff_image': np.zeros((120, 160, 3), dtype=np.uint8),
+        'color_differences': [
+            {'position': (10, 20, 30, 40), 'color1': np.array([255.0, 0.0, 0.0]),
+             'color_distance': np.float64(80.5), 'area': 1200.0}
+        ],
+        'missing_elements': [{'position': (1, 2, 3, 4), 'avg_intensity1': np.float64(200.0)}],
+        'pixel_metrics': {'different_pixels': np.int64(4321), 'changed': np.bool_(True)},
+        'ai_analysis': {'features': {'edges': np.linspace(0, 1, 500)}}
+    }
+
+
+def test_round_trip():
+    """Arrays go to the sidecar and come back in place; scalars become plain JSON"""
+    print("🧪 Testing report serializer round trip...")
+    results = _analysis_results()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "report.json")
+        serializer = ReportSerializer()
+        assert serializer.dump({'analysis_results': results}, path) == sidecar_path(path)
+
+        with open(path, encoding='utf-8') as f:
+            raw = json.load(f)
+        stored = raw['analysis_results']
+        assert stored['diff_image'] == {ARRAY_REFERENCE_KEY: 'analysis_results/diff_image',
+                                        'shape': [120, 160], 'dtype': '|u1'}
+        assert stored['similarity_score'] == 0.875
+        assert stored['color_differences'][0]['color1'] == [255.0, 0.0, 0.0]
+        assert stored['color_differences'][0]['position'] == [10, 20, 30, 40]
+        assert stored['pixel_metrics'] == {'different_pixels': 4321, 'changed': True}
+        assert '\n' not in open(path, encoding='utf-8').read()
+
+        loaded = serializer.load(path)['analysis_results']
+        for key in ('diff_image', 'color_diff_image'):
+            assert loaded[key].dtype == results[key].dtype
+            assert np.array_equal(loaded[key], results[key])
+        assert np.array_equal(loaded['ai_analysis']['features']['edges'], results['ai_analysis']['features']['edges'])
+
+        # Without the arrays the references stay
+        assert serializer.load(path, load_arrays=False)['analysis_results']['diff_image'] == stored['diff_image']
+
+        # A report without arrays removes a stale sidecar
+        assert serializer.dump({'score': 1.0}, path) is None
+        assert not os.path.exists(sidecar_path(path))
+    print("✅ Arrays restored from the sidecar")
+
+
+def test_json_report_size_and_package():
+    """The JSON report holds no stringified arrays, and the package ships the sidecar"""
+    print("🧪 Testing JSON report with array sidecar...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        generator = ReportGenerator(output_dir=tmpdir)
+        results = _analysis_results()
+        results['run_id'] = 'serializer'
+        results['diff_image'] = np.full((1000, 1000), 7, dtype=np.uint8)
+        reports = generator.generate_comprehensive_report(
+            results, {'report_formats': ['package', 'json'], 'report_workers': 1})
+
+        assert os.path.getsize(reports['json']) < 4096
+        loaded = ReportSerializer().load(reports['json'])
+        assert np.array_equal(loaded['analysis_results']['diff_image'], results['diff_image'])
+        assert loaded['summary']['similarity_score'] == 0.875
+
+        with zipfile.ZipFile(reports['package']) as package:
+            assert os.path.basename(sidecar_path(reports['json'])) in package.namelist()
+    print("✅ Compact JSON report written")
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_json_report_size_and_package()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the screenshot embedding index.
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+import cv2
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from screenshot_index import ScreenshotIndex, load_shared_index
+
+
+def _write_pages(directory, count=12):
+    """Write synthetic pages with different layouts; returns their paths"""
+    rng = np.random.default_rng(5)
+    paths = []
+    for i in range(count):
+        page = np.full((600, 400, 3), 250, dtype=np.uint8)
+        for _ in range(4):
+            y, x = int(rng.integers(0, 500)), int(rng.integers(0, 300))
+            page[y:y + 100, x:x + 100] = rng.integers(0, 255, 3)
+        path = os.path.join(directory, f"page_{i:02d}.png")
+        cv2.imwrite(path, page)
+        paths.append(path)
+    return paths
+
+
+def test_query_returns_nearest_capture():
+    """A near-identical capture must be the nearest neighbour"""
+    print("🧪 Testing screenshot index nearest-neighbour lookup...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = _write_pages(temp_dir)
+        index = ScreenshotIndex(os.path.join(temp_dir, 'index.pkl'), n_components=8, rebuild_threshold=4)
+        assert index.add_directories([temp_dir]) == len(paths)
+        
+        # Slightly changed version of page 3
+        query = cv2.cvtColor(cv2.imread(paths[3]), cv2.COLOR_BGR2RGB)
+        query[0:5, 0:5] = 0
+        results = index.query(query, k=3)
+        print(f"   Nearest: {[os.path.basename(r['path']) for r in results]}")
+        assert os.path.normpath(results[0]['path']) == os.path.normpath(paths[3])
+        
+        # Querying by path excludes the path itself
+        by_path = index.query(paths[3], k=2)
+        assert all(os.path.normpath(r['path']) != os.path.normpath(paths[3]) for r in by_path)
+    print("✅ Nearest capture found")
+
+
+def test_incremental_add_persist_and_duplicates():
+    """Pending entries are searchable, persisted and merged; duplicates are grouped"""
+    print("🧪 Testing incremental updates and persistence...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = _write_pages(temp_dir, count=6)
+        index_path = os.path.join(temp_dir, 'index.pkl')
+        index = ScreenshotIndex(index_path, n_components=4, rebuild_threshold=100)
+        index.add_directories([temp_dir])
+        
+        duplicate_path = os.path.join(temp_dir, 'copy_of_page_00.png')
+        cv2.imwrite(duplicate_path, cv2.imread(paths[0]))
+        assert index.add_image(duplicate_path)
+        assert not index.add_image(duplicate_path)
+        assert len(index.pending_paths) == 1
+        index.save()
+        
+        restored = ScreenshotIndex(index_path)
+        assert restored.load()
+        assert len(restored) == 7
+        groups = restored.find_duplicates(max_distance=1e-6)
+        print(f"   Duplicate groups: {groups}")
+        assert any(set(map(os.path.basename, g)) == {'page_00.png', 'copy_of_page_00.png'} for g in groups)
+    print("✅ Incremental index persisted and duplicates detected")
+
+
+def test_shared_index_and_captured_screenshots_only():
+    """The baseline lookup index is loaded once per process and holds captures only"""
+    print("🧪 Testing shared index loading...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            os.makedirs(os.path.join("screenshots", "run1"))
+            os.makedirs(os.path.join("visualizations", "run1"))
+            captures = _write_pages(os.path.join("screenshots", "run1"), count=4)
+            _write_pages(os.path.join("visualizations", "run1"), count=2)
+            index_path = os.path.join(temp_dir, 'index.pkl')
+            assert load_shared_index(index_path) is None
+
+            index = ScreenshotIndex(index_path, n_components=4)
+            assert index.add_directories() == len(captures)
+            assert all(path.startswith("screenshots") for path in index.paths)
+            index.save()
+        finally:
+            os.chdir(cwd)
+
+        shared = load_shared_index(index_path)
+        assert shared is not None and len(shared) == len(captures)
+        assert load_shared_index(index_path) is shared
+
+        # Saving the index again makes the next lookup reload it
+        os.utime(index_path, ns=(0, 0))
+        assert load_shared_index(index_path) is not shared
+    print("✅ Shared index reused until the file changes")
+
+
+if __name__ == "__main__":
+    test_query_returns_nearest_capture()
+    test_incremental_add_persist_and_duplicates()
+    test_shared_index_and_captured_screenshots_only()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for sharing one decoded screenshot across the pixel-based WCAG checks.
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+import cv2
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from wcag_checker import WCAGCompliantChecker
+
+PAGE = ('<html lang="en"><head><title>Shared</title></head><body>'
+        '<a href="#main">Skip</a><h1>Title</h1><img src="a.png"><p>Text</p></body></html>')
+
+
+class ScreenshotDriver:
+    """WebDriver stand-in counting screenshot captures"""
+
+    def __init__(self, html, fail=False):
+        self.page_source = html
+        self.fail = fail
+        self.screenshots = 0
+
+    def get(self, url):
+        pass
+
+    def find_element(self, by, value):
+        return object()
+
+    def find_elements(self, by, value):
+        return []
+
+    def execute_script(self, script, *args):
+        if 'document.evaluate' in script:
+            return [80, [None] * len(args[0])]
+        if 'innerWidth' in script:
+            return [80, 60]
+        return []
+
+    def get_screenshot_as_png(self):
+        self.screenshots += 1
+        if self.fail:
+            raise RuntimeError("browser gone")
+        image = np.full((60, 80, 3), 255, dtype=np.uint8)
+        image[:, :40] = (0, 0, 200)  # BGR: red half on the left
+        return cv2.imencode('.png', image)[1].tobytes()
+
+
+def _audit(driver, **kwargs):
+    """Run an audit in a temporary directory (the heatmap is written under visualizations/)"""
+    checker = WCAGCompliantChecker()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cwd = os.getcwd()
+        os.chdir(tmpdir)
+        try:
+            results = checker.check_wcag_compliance(driver, "https://example.com", **kwargs)
+            heatmap = results.get('accessibility_heatmap')
+            image = cv2.imread(heatmap) if heatmap else None
+        finally:
+            os.chdir(cwd)
+    return results, image
+
+
+def test_one_capture_per_audit():
+    """All pixel-based checks and the heatmap use a single screenshot"""
+    print("🧪 Testing one screenshot per audit...")
+    driver = ScreenshotDriver(PAGE)
+    results, heatmap = _audit(driver)
+    assert driver.screenshots == 1
+    assert heatmap is not None and heatmap.shape == (60, 80, 3)
+    # Decoded once to RGB and written back with the original colors
+    assert tuple(heatmap[0, 0]) == (0, 0, 200)
+    assert results['total_issues'] > 0
+    print("✅ One capture shared by every pixel-based check")
+
+
+def test_capture_stage_array_reused():
+    """A screenshot passed in from the capture stage replaces the browser capture"""
+    print("🧪 Testing capture-stage screenshot reuse...")
+    driver = ScreenshotDriver(PAGE)
+    screenshot = np.full((90, 120, 3), 255, dtype=np.uint8)
+    _, heatmap = _audit(driver, screenshot=screenshot)
+    assert driver.screenshots == 0
+    assert heatmap.shape == (90, 120, 3)
+    print("✅ No browser screenshot taken")
+
+
+def test_failed_capture_not_retried():
+    """A failing capture is attempted once and the audit still completes"""
+    print("🧪 Testing failed capture...")
+    driver = ScreenshotDriver(PAGE, fail=True)
+    results, heatmap = _audit(driver)
+    assert driver.screenshots == 1
+    assert heatmap is None
+    assert 'compliance_score' in results and 'error' not in results
+    print("✅ Audit completed without a screenshot")
+
+
+if __name__ == "__main__":
+    test_one_capture_per_audit()
+    test_capture_stage_array_reused()
+    test_failed_capture_not_retried()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Test script for the WCAG 2.2 2.5.8 target size and spacing check.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import subprocess
+import pytest
+import numpy as np
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from wcag_checker import WCAGCompliantChecker, WCAGAuditContext
+
+# Minimal DOM for running the target rect script under node. Nodes are {tag, attrs, rect,
+# text, children}; selectors are comma lists of tag, [attr] or [attr='value']
+DOM_STUB = r"""
+const elements = [];
+const proto = {
+    matches(selector) {
+        return selector.split(',').some((part) => {
+            const m = part.trim().match(/^([a-z]*)(?:\[([\w-]+)(?:='([^']*)')?\])?$/);
+            return (!m[1] || this.localName === m[1]) &&
+                (!m[2] || (m[2] in this.attrs && (m[3] === undefined || this.attrs[m[2]] === m[3])));
+        });
+    },
+    closest(selector) {
+        for (let el = this; el; el = el.parentElement) if (el.matches(selector)) return el;
+        return null;
+    },
+    querySelector(selector) {
+        return elements.find((el) => el !== this && this.contains(el) && el.matches(selector)) || null;
+    },
+    contains(other) {
+        for (let el = other; el; el = el.parentElement) if (el === this) return true;
+        return false;
+    },
+    getAttribute(name) { return name in this.attrs ? this.attrs[name] : null; },
+    getBoundingClientRect() { const [left, top, width, height] = this.rect; return {left, top, width, height}; },
+    get textContent() { return this.text + this.children.map((child) => child.textContent).join(''); },
+};
+const build = (node, parent) => {
+    const el = Object.assign(Object.create(proto), {
+        tagName: node.tag.toUpperCase(), localName: node.tag, nodeType: 1, parentElement: parent,
+        attrs: node.attrs || {}, rect: node.rect || [0, 0, 0, 0], text: node.text || '',
+        previousElementSibling: null});
+    elements.push(el);
+    el.children = (node.children || []).map((child) => build(child, el));
+    el.children.forEach((child, i) => { child.previousElementSibling = el.children[i - 1] || null; });
+    return el;
+};
+const [page, script, args] = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+build(page, null);
+globalThis.window = {scrollX: 0, scrollY: 0};
+globalThis.getComputedStyle = (el) => ({visibility: 'visible', display: el.attrs.display || 'block'});
+globalThis.document = {querySelectorAll: (selector) => elements.filter((el) => el.matches(selector))};
+process.stdout.write(JSON.stringify(new Function(script)(...args)));
+"""
+
+
+class RectDriver:
+    """WebDriver stand-in returning fixed target rect rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.script_calls = 0
+
+    def execute_script(self, script, *args):
+        self.script_calls += 1
+        return self.rows
+
+
+class NodeDriver:
+    """WebDriver stand-in running scripts with node against a DOM_STUB page"""
+
+    def __init__(self, page):
+        self.page = page
+
+    def execute_script(self, script, *args):
+        result = subprocess.run(['node', '-e', DOM_STUB], input=json.dumps([self.page, script, args]),
+                                capture_output=True, text=True, check=True)
+        return json.loads(result.stdout)
+
+
+def _target(x, y, w, h, label="link", inline=0):
+    return ['a', label, x, y, w, h, inline]
+
+
+def _run(rows):
+    checker = WCAGCompliantChecker()
+    driver = RectDriver(rows)
+    audit = WCAGAuditContext(driver, "https://example.com")
+    issues = checker._check_target_size(audit)
+    assert driver.script_calls == 1
+    return issues, audit.results['detailed_analysis']['target_size']
+
+
+def _brute_force(rects, undersized, radius=12.0):
+    """Reference O(n^2) implementation of the spacing rule"""
+    centers = rects[:, :2] + rects[:, 2:] / 2
+    crowded = []
+    for i in np.flatnonzero(undersized):
+        for j in range(len(rects)):
+            if i == j:
+                continue
+            x, y, w, h = rects[j]
+            dx = max(x - centers[i, 0], 0, centers[i, 0] - (x + w))
+            dy = max(y - centers[i, 1], 0, centers[i, 1] - (y + h))
+            if np.hypot(dx, dy) < radius or (undersized[j] and np.hypot(*(centers[j] - centers[i])) < 2 * radius):
+                crowded.append(int(i))
+                break
+    return crowded
+
+
+def test_spacing_rule():
+    """Undersized targets pass only with enough spacing; inline links are exempt"""
+    print("🧪 Testing 2.5.8 spacing rule...")
+    # Row of 16px icons 30px apart: circles 24px apart do not intersect
+    spaced = [_target(30 * i, 0, 16, 16) for i in range(5)]
+    issues, stats = _run(spaced)
+    assert issues == [] and stats['undersized_targets'] == 5
+
+    # Same icons 20px apart: every circle intersects its neighbour's
+    tight = [_target(20 * i, 0, 16, 16) for i in range(5)]
+    issues, _ = _run(tight)
+    assert len(issues) == 5 and issues[0]['guideline'] == '2.5.8'
+
+    # A small target 2px from a large button; the button itself is fine
+    issues, _ = _run([_target(0, 0, 16, 16, "icon"), _target(18, 0, 120, 40, "Submit")])
+    assert [issue['element'] for issue in issues] == ["a: icon"]
+
+    # Inline links in a paragraph are exempt
+    issues, stats = _run([_target(10 * i, 0, 8, 12, inline=1) for i in range(5)])
+    assert issues == [] and stats['undersized_targets'] == 0
+    print("✅ Spacing rule applied")
+
+
+def test_matches_brute_force():
+    """The grid lookup agrees with the pairwise definition on random layouts"""
+    print("🧪 Testing grid against pairwise check...")
+    checker = WCAGCompliantChecker()
+    rng = np.random.default_rng(7)
+    for _ in range(5):
+        rects = np.column_stack([rng.uniform(0, 800, 300), rng.uniform(0, 800, 300),
+                                 rng.uniform(4, 80, 300), rng.uniform(4, 40, 300)])
+        undersized = (rects[:, 2] < 24) | (rects[:, 3] < 24)
+        assert checker._find_crowded_targets(rects, undersized) == _brute_force(rects, undersized)
+    print("✅ Grid matches pairwise results")
+
+
+def test_many_targets_single_round_trip():
+    """Thousands of targets take one script call and stay fast"""
+    print("🧪 Testing large link-heavy page...")
+    rows = [_target(30 * (i % 40), 30 * (i // 40), 16, 16) for i in range(5000)]
+    start = time.time()
+    issues, stats = _run(rows)
+    elapsed = time.time() - start
+    assert issues == [] and stats['targets_checked'] == 5000
+    assert elapsed < 10
+    print(f"✅ 5000 targets checked in {elapsed:.2f}s")
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="node is not installed")
+def test_targets_inside_focusable_containers():
+    """Links in a tabindex="-1" skip-link target or an onclick wrapper are still checked"""
+    print("🧪 Testing targets inside focusable containers...")
+    tight_links = [{'tag': 'a', 'attrs': {'href': f'#{i}'}, 'rect': [20 * i, 100, 16, 16], 'text': f'{i}'}
+                   for i in range(3)]
+    spaced_links = [{'tag': 'a', 'attrs': {'href': f'#s{i}'}, 'rect': [40 * i, 300, 16, 16], 'text': f's{i}'}
+                    for i in range(3)]
+    page = {'tag': 'html', 'rect': [0, 0, 800, 1000], 'children': [
+        {'tag': 'body', 'rect': [0, 0, 800, 1000], 'children': [
+            {'tag': 'a', 'attrs': {'href': '#main'}, 'rect': [0, 0, 100, 30], 'text': 'Skip'},
+            {'tag': 'main', 'attrs': {'id': 'main', 'tabindex': '-1'}, 'rect': [0, 80, 800, 400],
+             'children': tight_links + [{'tag': 'div', 'attrs': {'onclick': 'go()'}, 'rect': [0, 280, 800, 60],
+                                         'children': spaced_links}]},
+            # A focusable span inside a button shares the button's hit area
+            {'tag': 'button', 'rect': [0, 600, 120, 40], 'text': 'Send',
+             'children': [{'tag': 'span', 'attrs': {'tabindex': '0'}, 'rect': [4, 604, 10, 10]}]}
+        ]}
+    ]}
+
+    checker = WCAGCompliantChecker()
+    audit = WCAGAuditContext(NodeDriver(page), "https://example.com")
+    issues = checker._check_target_size(audit)
+    stats = audit.results['detailed_analysis']['target_size']
+
+    # Skip link, 6 nested links and the button; not the containers or the span
+    assert stats['targets_checked'] == 8
+    assert stats['undersized_targets'] == 6
+    assert sorted(issue['element'] for issue in issues) == ['a: 0', 'a: 1', 'a: 2']
+    assert issues[0]['locator'].startswith('/html[1]/body[1]/main[1]/a[')
+    print("✅ Nested targets checked")
+
+
+if __name__ == "__main__":
+    test_spacing_rule()
+    test_matches_brute_force()
+    test_many_targets_single_round_trip()
+    test_targets_inside_focusable_containers()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test script for deep-zoom tile pyramids in HTML reports.
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+import cv2
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from tile_pyramid import TilePyramidBuilder
+from report_generator import ReportGenerator
+from artifact_store import ArtifactStore
+
+
+def _page(height, width=300, seed=0):
+    """Tall page-like BGR image with distinct bands"""
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 245, dtype=np.uint8)
+    for y in range(0, height, 150):
+        cv2.rectangle(image, (20, y + 20), (width - 20, y + 110), tuple(int(c) for c in rng.integers(0, 255, 3)), -1)
+    return image
+
+
+def test_pyramid_levels_and_tiles():
+    """Levels halve down to one tile, and level 0 tiles are exact crops"""
+    print("🧪 Testing tile pyramid levels...")
+    builder = TilePyramidBuilder(tile_format='png', max_workers=2)
+    sizes = builder.level_sizes(1920, 25000)
+    assert sizes[0] == (1920, 25000) and max(sizes[-1]) <= 256
+    assert all(max(size) > 256 for size in sizes[:-1])
+    assert not builder.needs_pyramid(1920, 1080) and builder.needs_pyramid(1920, 25000)
+
+    image = _page(1000, 600)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output_dir = os.path.join(tmpdir, "tiles")
+        manifest = builder.build(image, output_dir)
+        assert manifest['levels'] == [[600, 1000], [300, 500], [150, 250]]
+        assert manifest['tile_count'] == 3 * 4 + 2 * 2 + 1
+        assert np.array_equal(cv2.imread(os.path.join(output_dir, "0", "1_2.png")), image[512:768, 256:512])
+        assert cv2.imread(os.path.join(output_dir, "0", "2_3.png")).shape == (1000 - 768, 600 - 512, 3)
+        assert cv2.imread(os.path.join(output_dir, "2", "0_0.png")).shape == (250, 150, 3)
+
+        # A rebuild drops the tiles of the previous image
+        builder.build(image[:200, :200], output_dir)
+        assert not os.path.exists(os.path.join(output_dir, "1"))
+    print("✅ Pyramid levels and tiles written")
+
+
+def test_html_report_uses_tile_viewer():
+    """Full-page screenshots are tiled and synchronized; small images stay embedded"""
+    print("🧪 Testing tile viewer in the HTML report...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = {'url1': os.path.join(tmpdir, "url1.png"), 'url2': os.path.join(tmpdir, "url2.png")}
+        cv2.imwrite(paths['url1'], _page(3000, seed=1))
+        cv2.imwrite(paths['url2'], _page(3000, seed=2))
+        output_dir = os.path.join(tmpdir, "reports")
+        generator = ReportGenerator(output_dir=output_dir, artifact_store=ArtifactStore(os.path.join(tmpdir, "store")))
+        results = {'run_id': 'tiles', 'screenshots': paths, 'summary_dict': {}}
+        reports = generator.generate_comprehensive_report(
+            results, {'report_formats': ['html'], 'report_workers': 1})
+
+        with open(reports['html'], encoding='utf-8') as f:
+            html = f.read()
+        base_name = os.path.splitext(os.path.basename(reports['html']))[0]
+        for image_type in ('url1_screenshot', 'url2_screenshot'):
+            assert f'data-tiles="{base_name}_tiles/{image_type}"' in html
+            assert os.path.exists(os.path.join(output_dir, f"{base_name}_tiles", image_type, "0", "0_0.webp"))
+        assert html.count('data-sync="page"') >= 2
+        assert html.count('function createTileViewer') == 1
+        # The side-by-side image (3000 px tall as well) is tiled without synchronization
+        assert f'data-tiles="{base_name}_tiles/sidebyside"' in html
+
+        # Tiles can be turned off
+        results = {'run_id': 'no_tiles', 'screenshots': paths, 'summary_dict': {}}
+        reports = generator.generate_comprehensive_report(
+            results, {'report_formats': ['html'], 'report_workers': 1, 'report_tiles': False})
+        with open(reports['html'], encoding='utf-8') as f:
+            html = f.read()
+        assert 'class="tile-viewer"' not in html and 'createTileViewer' not in html
+    print("✅ Tile viewer embedded")
+
+
+if __name__ == "__main__":
+    test_pyramid_levels_and_tiles()
+    test_html_report_uses_tile_viewer()
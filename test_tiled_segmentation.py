@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script for downscaled-proxy and tiled SLIC segmentation in AIDetector.
+"""
+
+import os
+import sys
+import numpy as np
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_detector import AIDetector
+
+
+def _tall_page(height=5000, width=800):
+    """Create a tall synthetic page with coloured blocks"""
+    rng = np.random.default_rng(3)
+    page = np.full((height, width, 3), 240, dtype=np.uint8)
+    for _ in range(60):
+        y = int(rng.integers(0, height - 120))
+        x = int(rng.integers(0, width - 200))
+        page[y:y + 120, x:x + 200] = rng.integers(0, 255, 3)
+    return page
+
+
+def test_proxy_and_tiled_modes_map_to_full_resolution():
+    """Regions from proxy/tiled modes must be reported in full-resolution coordinates"""
+    print("🧪 Testing proxy and tiled segmentation modes...")
+    detector = AIDetector()
+    page = _tall_page()
+    height, width = page.shape[:2]
+    
+    for mode in ['proxy', 'tiled']:
+        segments, table = detector.segment_image(page, n_segments=100, mode=mode)
+        count = detector._region_count(table)
+        print(f"   {mode}: {count} regions")
+        
+        assert segments is None
+        # Segment count scales with page area (5000x800 is ~1.9x the 1920x1080 reference)
+        assert count > 100
+        assert len(np.unique(table['label'])) == count
+        assert table['bbox'][:, 2].max() <= height and table['bbox'][:, 3].max() <= width
+        assert table['centroid'][:, 0].max() > height * 0.9
+        assert np.all(table['bbox'][:, 0] <= table['centroid'][:, 0])
+        assert np.all(table['centroid'][:, 0] <= table['bbox'][:, 2])
+    print("✅ Proxy and tiled regions are in full-resolution coordinates")
+
+
+def test_time_budget_lowers_resolution():
+    """An exhausted time budget must still produce regions for the whole page"""
+    print("🧪 Testing segmentation time budget...")
+    detector = AIDetector()
+    page = _tall_page(height=8000, width=400)
+    
+    _, table = detector.segment_image(page, mode='tiled', time_budget=1e-6)
+    assert detector._region_count(table) > 0
+    assert table['centroid'][:, 0].max() > 7000
+    print("✅ Budgeted segmentation covered the whole page")
+
+
+if __name__ == "__main__":
+    test_proxy_and_tiled_modes_map_to_full_resolution()
+    test_time_budget_lowers_resolution()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test script for the DOM-hash keyed WCAG result cache and incremental rechecks.
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+import cv2
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from wcag_rules import DOMRuleEngine, parse_html
+from wcag_cache import WCAGResultCache, dom_fingerprint
+from wcag_checker import WCAGCompliantChecker
+
+
+def _page(sections, extra_head=""):
+    body = ''.join(sections)
+    return (f'<html><head><title>Cache</title>{extra_head}</head><body>'
+            f'<a href="#main">Skip</a><h1>Title</h1>{body}</body></html>')
+
+
+def _sections(count, broken=()):
+    sections = []
+    for i in range(count):
+        image = '<img src="x.png">' if i in broken else '<img src="x.png" alt="ok">'
+        sections.append(f'<section id="s{i}"><h2>Section {i}</h2>{image}'
+                        f'<div style="color: red"></div><p>Text {i}</p></section>')
+    return sections
+
+
+class CacheDriver:
+    """WebDriver stand-in with a replaceable page and a call counter for rendering work"""
+
+    def __init__(self, html, viewport=(1280, 720)):
+        self.page_source = html
+        self.viewport = viewport
+        self.stylesheets = [['https://example.com/site.css', '', 'body { color: rgb(0, 0, 0); }']]
+        self.screenshots = 0
+
+    def get(self, url):
+        pass
+
+    def find_element(self, by, value):
+        return object()
+
+    def find_elements(self, by, value):
+        return []
+
+    def execute_script(self, script, *args):
+        if 'innerWidth' in script:
+            return list(self.viewport)
+        if 'styleSheets' in script:
+            return self.stylesheets
+        return []
+
+    def get_screenshot_as_png(self):
+        self.screenshots += 1
+        return cv2.imencode('.png', np.full((60, 80, 3), 255, dtype=np.uint8))[1].tobytes()
+
+
+def test_fingerprint_normalization():
+    """Whitespace, comments and attribute order do not change the hash; content does"""
+    print("🧪 Testing DOM fingerprint...")
+    base = dom_fingerprint(parse_html('<html><body><div a="1" b="2">Hi  there</div><p>x</p></body></html>'))
+    same = dom_fingerprint(parse_html('<html><body>\n<!-- note --><div b="2" a="1">Hi\nthere</div> <p>x</p></body></html>'))
+    changed = dom_fingerprint(parse_html('<html><body><div a="1" b="2">Hi there</div><p>y</p></body></html>'))
+    assert base['document'] == same['document']
+    assert base['document'] != changed['document']
+    assert len(set(base['units']) & set(changed['units'])) == 1
+    print("✅ Fingerprint ignores formatting only")
+
+
+def test_partitioned_run_matches_full_run():
+    """Per-subtree evaluation with reuse gives the same issues as a full run"""
+    print("🧪 Testing incremental rule evaluation...")
+    engine = DOMRuleEngine()
+    first = parse_html(_page(_sections(30, broken={3})))
+    first_run = engine.run_partitioned(first, dom_fingerprint(first)['units'])
+    assert first_run['issues'] == engine.run(first)['issues']
+    # Skip link, heading and the 30 sections
+    assert first_run['units_rechecked'] == 32
+
+    second = parse_html(_page(_sections(30, broken={3, 17})))
+    second_run = engine.run_partitioned(second, dom_fingerprint(second)['units'], first_run['unit_issues'])
+    assert second_run['issues'] == engine.run(second)['issues']
+    assert second_run['units_rechecked'] == 1 and second_run['units_reused'] == 31
+    print(f"✅ {second_run['units_rechecked']} subtree rechecked, {second_run['units_reused']} reused")
+
+
+def test_checker_cache_hit_partial_and_miss():
+    """Unchanged pages skip the audit; changed subtrees are rechecked; viewport is part of the key"""
+    print("🧪 Testing checker with result cache...")
+    checker = WCAGCompliantChecker()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cwd = os.getcwd()
+        os.chdir(tmpdir)
+        try:
+            cache = WCAGResultCache(os.path.join(tmpdir, "cache"))
+            url = "https://example.com/page"
+            driver = CacheDriver(_page(_sections(10, broken={2})))
+
+            first = checker.check_wcag_compliance(driver, url, cache=cache)
+            assert first['cache']['status'] == 'miss'
+            screenshots = driver.screenshots
+
+            # Same DOM apart from formatting: served from cache without rendering work
+            driver.page_source = _page(_sections(10, broken={2})).replace('<p>', '\n<p>')
+            hit = checker.check_wcag_compliance(driver, url, cache=cache)
+            assert hit['cache']['status'] == 'hit'
+            assert driver.screenshots == screenshots
+            assert hit['total_issues'] == first['total_issues']
+
+            # A CSS-only change is audited again; the static rule issues are all reused
+            driver.stylesheets = [['https://example.com/site.css', '', 'body { color: rgb(200, 200, 200); }']]
+            restyled = checker.check_wcag_compliance(driver, url, cache=cache)
+            assert restyled['cache']['status'] == 'partial'
+            assert restyled['cache']['units_rechecked'] == 0
+            assert driver.screenshots > screenshots
+
+            # One section changed: only that subtree is rechecked
+            changed_html = _page(_sections(10, broken={2, 5}))
+            driver.page_source = changed_html
+            partial = checker.check_wcag_compliance(driver, url, cache=cache)
+            assert partial['cache']['status'] == 'partial'
+            assert partial['cache']['units_rechecked'] == 1
+            uncached = checker.check_wcag_compliance(CacheDriver(changed_html), url)
+            assert partial['categories'] == uncached['categories']
+            assert partial['total_issues'] == first['total_issues'] + 1
+
+            # Different viewport: a separate cache entry
+            other = checker.check_wcag_compliance(CacheDriver(changed_html, viewport=(375, 812)), url, cache=cache)
+            assert other['cache']['status'] == 'miss'
+        finally:
+            os.chdir(cwd)
+    print("✅ Cache hit, partial recheck and viewport miss behave as expected")
+
+
+def test_cache_is_bounded():
+    """Result entries and per-page entries are both pruned to max_entries"""
+    print("🧪 Testing cache pruning...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = WCAGResultCache(tmpdir, max_entries=3)
+        for i in range(8):
+            cache.put(f"key{i}", {'total_issues': i}, f"page{i}", {})
+        for kind in ('results', 'pages'):
+            assert len(os.listdir(os.path.join(tmpdir, kind))) == 3
+    print("✅ Cache stays within max_entries")
+
+
+if __name__ == "__main__":
+    test_fingerprint_normalization()
+    test_partitioned_run_matches_full_run()
+    test_checker_cache_hit_partial_and_miss()
+    test_cache_is_bounded()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-pass WCAG DOM rule engine.
+"""
+
+import os
+import sys
+import time
+from bs4 import BeautifulSoup
+
+# Add current directory to path for local imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from wcag_rules import DOMRule, DOMRuleEngine, parse_html, default_rules
+
+TEST_HTML = """
+<html><head><title>Rules</title></head><body>
+<h2>Starts at h2</h2><h4>Skips h3</h4>
+<img src="a.png"><img src="b.png" alt="Logo">
+<input id="email"><label for="email">Email</label><input id="phone">
+<table><tr><td>no header</td></tr></table><table><tr><th>header</th></tr></table>
+<video src="v.mp4"></video><video src="w.mp4"><track kind="captions"></video>
+<div id="dup"></div><div id="dup"></div><span aria-labelledby="missing">x</span>
+<div onclick="go()">click</div><a tabindex="2" href="/x">tab</a>
+</body></html>
+"""
+
+
+class CountingRule(DOMRule):
+    """Records every element dispatched to it"""
+    name = 'counting'
+    group = 'counting'
+    tags = ('img', 'div')
+    attributes = ('id',)
+
+    def start(self):
+        return {'issues': [], 'seen': []}
+
+    def visit(self, elem, state):
+        state['seen'].append(elem)
+
+    def finish(self, state, soup):
+        return [{'element': elem.name} for elem in state['seen']]
+
+
+def test_rules_find_issues_in_one_walk():
+    """Default rules report the expected issues grouped by guideline"""
+    print("🧪 Testing default rules...")
+    engine = DOMRuleEngine()
+    result = engine.run(parse_html(TEST_HTML))
+    issues = result['issues']
+
+    descriptions = lambda group: [issue['description'] for issue in issues[group]]
+    assert descriptions('text_alternatives') == ['Image missing alt text', 'Form control missing label']
+    assert 'phone' in issues['text_alternatives'][1]['element']
+    assert descriptions('adaptable') == ['Page should start with h1 heading',
+                                         'Heading level skipped: h2 after h0',
+                                         'Heading level skipped: h4 after h2',
+                                         'Data table missing header cells']
+    assert len(issues['time_based_media']) == 1 and 'v.mp4' in issues['time_based_media'][0]['element']
+    assert descriptions('compatible') == ['Duplicate ID found: dup', 'aria-labelledby references non-existent ID: missing']
+    assert descriptions('input_modalities') == ['Non-interactive element has click handler']
+    assert descriptions('navigable') == ['Positive tabindex may disrupt natural focus order']
+    assert descriptions('keyboard_accessible') == ['Page missing skip navigation links']
+    assert issues['readable'][0]['guideline'] == '3.1.1'
+
+    assert set(result['rule_timings_ms']) == {rule.name for rule in engine.rules}
+    assert result['nodes'] == len(parse_html(TEST_HTML).find_all(True))
+    print(f"✅ {sum(len(v) for v in issues.values())} issues from {result['nodes']} elements")
+
+
+def test_dispatch_by_tag_and_attribute():
+    """Each element reaches a rule once, whether matched by tag, attribute or both"""
+    print("🧪 Testing rule dispatch...")
+    engine = DOMRuleEngine(rules=[CountingRule()])
+    soup = BeautifulSoup('<div id="a"><img id="b"><p id="c"></p><span></span><div></div></div>', 'html.parser')
+    result = engine.run(soup)
+    assert [issue['element'] for issue in result['issues']['counting']] == ['div', 'img', 'p', 'div']
+    print("✅ Elements dispatched once per rule")
+
+
+def test_register_and_group_selection():
+    """Custom rules can be registered; runs can be limited to guideline groups"""
+    print("🧪 Testing rule registration...")
+    engine = DOMRuleEngine()
+    engine.register(CountingRule())
+    try:
+        engine.register(CountingRule())
+        assert False, "duplicate rule name accepted"
+    except ValueError:
+        pass
+
+    result = engine.run(parse_html(TEST_HTML), groups=['compatible'])
+    assert list(result['issues']) == ['compatible']
+    assert set(result['rule_timings_ms']) == {'duplicate_id', 'aria_labelledby'}
+    assert len(engine.rules) == len(default_rules()) + 1
+    print("✅ Registration and group selection work")
+
+
+def test_checker_uses_engine():
+    """The checker's per-guideline methods are backed by the engine"""
+    print("🧪 Testing checker integration...")
+    from wcag_checker import WCAGCompliantChecker
+    checker = WCAGCompliantChecker()
+    soup = parse_html(TEST_HTML)
+    assert soup.builder.NAME in ('lxml', 'html.parser')
+    assert checker._check_compatible(soup) == checker.rule_engine.run(soup)['issues']['compatible']
+    print(f"✅ Checker parses with {soup.builder.NAME}")
+
+
+def test_large_page():
+    """A page with thousands of elements is checked quickly"""
+    print("🧪 Testing large page...")
+    html = '<html><body>' + ''.join(
+        f'<div id="d{i}"><a href="/p{i}">link</a><img src="x"><input id="i{i}">'
+        f'<span aria-labelledby="d{i}">s</span></div>' for i in range(3000)) + '</body></html>'
+    engine = DOMRuleEngine()
+    start = time.time()
+    result = engine.run(parse_html(html))
+    elapsed = time.time() - start
+    assert len(result['issues']['text_alternatives']) == 6000
+    assert result['issues']['compatible'] == []
+    assert elapsed < 30
+    print(f"✅ {result['nodes']} elements checked in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    test_rules_find_issues_in_one_walk()
+    test_dispatch_by_tag_and_attribute()
+    test_register_and_group_selection()
+    test_checker_uses_engine()
+    test_large_page()
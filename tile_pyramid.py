@@ -0,0 +1,342 @@
+"""
+Tile Pyramid Module
+Cuts large report images into deep-zoom tile pyramids and provides the HTML viewer for them
+"""
+
+import os
+import json
+import shutil
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+
+# Tile edge length in pixels
+TILE_SIZE = 256
+
+# Images whose longest side is at most this are embedded whole
+TILE_PYRAMID_MIN_SIZE = 2048
+
+# Tile file formats and their encoder settings
+TILE_FORMATS = {
+    'webp': ('.webp', [cv2.IMWRITE_WEBP_QUALITY, 90]),
+    'png': ('.png', [cv2.IMWRITE_PNG_COMPRESSION, 3])
+}
+
+
+class TilePyramidBuilder:
+    """Writes an image as a deep-zoom tile pyramid.
+
+    Level 0 is the native resolution and every further level halves the
+    previous one, until the whole image fits in a single tile. Tiles are
+    stored as <output_dir>/<level>/<column>_<row>.<format>; the manifest
+    returned by build() describes the level sizes for the viewer.
+    """
+
+    def __init__(self, tile_size=TILE_SIZE, tile_format='webp', min_size=TILE_PYRAMID_MIN_SIZE, max_workers=None):
+        self.setup_logging()
+        self.tile_size = tile_size
+        self.min_size = min_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+        if tile_format not in TILE_FORMATS:
+            raise ValueError(f"Unknown tile format: {tile_format} (available: {', '.join(TILE_FORMATS)})")
+        if not cv2.haveImageWriter('tile' + TILE_FORMATS[tile_format][0]):
+            self.logger.warning(f"No {tile_format} encoder available, writing PNG tiles")
+            tile_format = 'png'
+        self.tile_format = tile_format
+
+    def setup_logging(self):
+        """Setup logging for the tile pyramid builder"""
+        self.logger = logging.getLogger(__name__)
+
+    def needs_pyramid(self, width, height):
+        """Whether an image is large enough to be shown through tiles"""
+        return max(width, height) > self.min_size
+
+    def level_sizes(self, width, height):
+        """(width, height) of every level, native resolution first"""
+        sizes = [(width, height)]
+        while max(width, height) > self.tile_size:
+            width = max(1, (width + 1) // 2)
+            height = max(1, (height + 1) // 2)
+            sizes.append((width, height))
+        return sizes
+
+    def build(self, image, output_dir):
+        """Write the tiles of a BGR image (array or path) to output_dir; returns the manifest"""
+        if isinstance(image, str):
+            path = image
+            image = cv2.imread(path)
+            if image is None:
+                raise ValueError(f"Could not load image: {path}")
+        height, width = image.shape[:2]
+        sizes = self.level_sizes(width, height)
+        extension, params = TILE_FORMATS[self.tile_format]
+
+        # Stale tiles of a previous build would be picked up by the viewer
+        if os.path.isdir(output_dir):
+            shutil.rmtree(output_dir)
+
+        tile_count = 0
+        level_image = image
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for level, (level_width, level_height) in enumerate(sizes):
+                if level:
+                    level_image = cv2.resize(level_image, (level_width, level_height), interpolation=cv2.INTER_AREA)
+                level_dir = os.path.join(output_dir, str(level))
+                os.makedirs(level_dir)
+                tiles = [(column, row) for row in range(0, level_height, self.tile_size)
+                         for column in range(0, level_width, self.tile_size)]
+
+                def write_tile(origin, level_image=level_image, level_dir=level_dir):
+                    x, y = origin
+                    tile = level_image[y:y + self.tile_size, x:x + self.tile_size]
+                    name = f"{x // self.tile_size}_{y // self.tile_size}{extension}"
+                    return cv2.imwrite(os.path.join(level_dir, name), tile, params)
+
+                if not all(pool.map(write_tile, tiles)):
+                    raise IOError(f"Could not write tiles to: {level_dir}")
+                tile_count += len(tiles)
+
+        self.logger.info(f"Tile pyramid of {width}x{height} written to {output_dir}: "
+                         f"{len(sizes)} levels, {tile_count} tiles")
+        return {
+            'width': width,
+            'height': height,
+            'tile_size': self.tile_size,
+            'format': self.tile_format,
+            'levels': [list(size) for size in sizes],
+            'tile_count': tile_count
+        }
+
+
+def tile_viewer_html(manifest, tiles_url, alt_text, sync_group=None):
+    """Markup of a tile viewer for a pyramid written to tiles_url (relative to the report)"""
+    sync = f' data-sync="{sync_group}"' if sync_group else ''
+    return f"""
+                <div class="tile-viewer" role="img" aria-label="{alt_text}" data-tiles="{tiles_url}"
+                     data-format="{manifest['format']}" data-tile-size="{manifest['tile_size']}"
+                     data-levels='{json.dumps(manifest['levels'])}'{sync}>
+                    <div class="tile-stage"></div>
+                    <div class="tile-toolbar">
+                        <button type="button" data-zoom="in" title="Zoom in">+</button>
+                        <button type="button" data-zoom="out" title="Zoom out">&minus;</button>
+                        <button type="button" data-zoom="fit" title="Fit width">Fit</button>
+                    </div>
+                </div>
+                """
+
+
+# Styles and script of the tile viewer, included once in reports that use it. Only the
+# tiles inside the visible area of the current level are requested; viewers with the
+# same data-sync group share their zoom and position (in image pixels).
+TILE_VIEWER_HTML = """
+                <style>
+                    .tile-viewer {
+                        position: relative;
+                        height: 480px;
+                        overflow: hidden;
+                        background: #eef0f3;
+                        border-radius: 5px;
+                        cursor: grab;
+                        touch-action: none;
+                        user-select: none;
+                    }
+                    .tile-viewer.dragging {
+                        cursor: grabbing;
+                    }
+                    .tile-viewer .tile-stage img {
+                        position: absolute;
+                        max-width: none !important;
+                        border-radius: 0 !important;
+                        transform: none !important;
+                        transition: none !important;
+                        cursor: inherit !important;
+                    }
+                    .tile-toolbar {
+                        position: absolute;
+                        top: 8px;
+                        right: 8px;
+                        z-index: 2;
+                    }
+                    .tile-toolbar button {
+                        min-width: 30px;
+                        margin-left: 4px;
+                        padding: 4px 8px;
+                        border: none;
+                        border-radius: 4px;
+                        background: rgba(255, 255, 255, 0.9);
+                        box-shadow: 0 1px 3px rgba(0, 0, 0, 0.2);
+                        cursor: pointer;
+                    }
+                    .tile-viewer-hint {
+                        font-size: 12px;
+                        color: #666;
+                        margin: 6px 0 0 0;
+                    }
+                </style>
+                <script>
+                    var tileViewerGroups = {};
+
+                    function createTileViewer(el) {
+                        var levels = JSON.parse(el.dataset.levels);
+                        var viewer = {
+                            el: el, stage: el.querySelector('.tile-stage'), base: el.dataset.tiles,
+                            format: el.dataset.format, tileSize: parseInt(el.dataset.tileSize, 10),
+                            levels: levels, width: levels[0][0], height: levels[0][1],
+                            group: el.dataset.sync || null, tiles: {}, scale: 0, x: 0, y: 0
+                        };
+
+                        viewer.fitScale = function () {
+                            return el.clientWidth / viewer.width;
+                        };
+
+                        viewer.setView = function (scale, x, y, fromGroup) {
+                            var cw = el.clientWidth, ch = el.clientHeight;
+                            if (!cw || !ch) {
+                                return;
+                            }
+                            var minScale = Math.min(cw / viewer.width, ch / viewer.height, 1);
+                            scale = Math.max(minScale, Math.min(scale, 4));
+                            var viewWidth = cw / scale, viewHeight = ch / scale;
+                            x = viewWidth >= viewer.width ? (viewer.width - viewWidth) / 2 :
+                                Math.max(0, Math.min(x, viewer.width - viewWidth));
+                            y = viewHeight >= viewer.height ? (viewer.height - viewHeight) / 2 :
+                                Math.max(0, Math.min(y, viewer.height - viewHeight));
+                            viewer.scale = scale;
+                            viewer.x = x;
+                            viewer.y = y;
+                            viewer.render();
+                            if (viewer.group && !fromGroup) {
+                                tileViewerGroups[viewer.group].forEach(function (other) {
+                                    if (other !== viewer) {
+                                        other.setView(scale, x, y, true);
+                                    }
+                                });
+                            }
+                        };
+
+                        viewer.render = function () {
+                            var cw = el.clientWidth, ch = el.clientHeight;
+                            // Smallest level that is not enlarged at the current zoom
+                            var level = 0;
+                            while (level + 1 < levels.length && levels[level + 1][0] >= viewer.width * viewer.scale) {
+                                level++;
+                            }
+                            var levelWidth = levels[level][0], levelHeight = levels[level][1];
+                            var fx = viewer.width / levelWidth, fy = viewer.height / levelHeight;
+                            var size = viewer.tileSize;
+                            var col0 = Math.max(0, Math.floor(viewer.x / fx / size));
+                            var col1 = Math.min(Math.ceil(levelWidth / size) - 1, Math.floor((viewer.x + cw / viewer.scale) / fx / size));
+                            var row0 = Math.max(0, Math.floor(viewer.y / fy / size));
+                            var row1 = Math.min(Math.ceil(levelHeight / size) - 1, Math.floor((viewer.y + ch / viewer.scale) / fy / size));
+                            var visible = {};
+                            for (var row = row0; row <= row1; row++) {
+                                for (var col = col0; col <= col1; col++) {
+                                    var key = level + '/' + col + '_' + row;
+                                    var tile = viewer.tiles[key];
+                                    if (!tile) {
+                                        tile = document.createElement('img');
+                                        tile.src = viewer.base + '/' + key + '.' + viewer.format;
+                                        tile.alt = '';
+                                        tile.draggable = false;
+                                        viewer.stage.appendChild(tile);
+                                        viewer.tiles[key] = tile;
+                                    }
+                                    var left = Math.round((col * size * fx - viewer.x) * viewer.scale);
+                                    var top = Math.round((row * size * fy - viewer.y) * viewer.scale);
+                                    var right = Math.round((Math.min((col + 1) * size, levelWidth) * fx - viewer.x) * viewer.scale);
+                                    var bottom = Math.round((Math.min((row + 1) * size, levelHeight) * fy - viewer.y) * viewer.scale);
+                                    tile.style.left = left + 'px';
+                                    tile.style.top = top + 'px';
+                                    tile.style.width = (right - left) + 'px';
+                                    tile.style.height = (bottom - top) + 'px';
+                                    visible[key] = true;
+                                }
+                            }
+                            Object.keys(viewer.tiles).forEach(function (key) {
+                                if (!visible[key]) {
+                                    viewer.stage.removeChild(viewer.tiles[key]);
+                                    delete viewer.tiles[key];
+                                }
+                            });
+                        };
+
+                        viewer.zoomAt = function (px, py, factor) {
+                            var scale = viewer.scale * factor;
+                            viewer.setView(scale, viewer.x + px / viewer.scale - px / scale,
+                                           viewer.y + py / viewer.scale - py / scale);
+                        };
+
+                        el.addEventListener('wheel', function (e) {
+                            e.preventDefault();
+                            var rect = el.getBoundingClientRect();
+                            if (e.ctrlKey || e.metaKey) {
+                                viewer.zoomAt(e.clientX - rect.left, e.clientY - rect.top, Math.exp(-e.deltaY * 0.002));
+                            } else {
+                                viewer.setView(viewer.scale, viewer.x + e.deltaX / viewer.scale, viewer.y + e.deltaY / viewer.scale);
+                            }
+                        }, {passive: false});
+
+                        var drag = null;
+                        el.addEventListener('pointerdown', function (e) {
+                            if (e.target.closest('.tile-toolbar')) {
+                                return;
+                            }
+                            drag = {x: e.clientX, y: e.clientY};
+                            el.setPointerCapture(e.pointerId);
+                            el.classList.add('dragging');
+                        });
+                        el.addEventListener('pointermove', function (e) {
+                            if (drag) {
+                                viewer.setView(viewer.scale, viewer.x - (e.clientX - drag.x) / viewer.scale,
+                                               viewer.y - (e.clientY - drag.y) / viewer.scale);
+                                drag = {x: e.clientX, y: e.clientY};
+                            }
+                        });
+                        ['pointerup', 'pointercancel'].forEach(function (type) {
+                            el.addEventListener(type, function () {
+                                drag = null;
+                                el.classList.remove('dragging');
+                            });
+                        });
+                        el.addEventListener('dblclick', function () {
+                            viewer.setView(viewer.fitScale(), 0, 0);
+                        });
+                        el.querySelectorAll('.tile-toolbar button').forEach(function (button) {
+                            button.addEventListener('click', function () {
+                                var action = button.dataset.zoom;
+                                if (action === 'fit') {
+                                    viewer.setView(viewer.fitScale(), 0, 0);
+                                } else {
+                                    viewer.zoomAt(el.clientWidth / 2, el.clientHeight / 2, action === 'in' ? 1.5 : 1 / 1.5);
+                                }
+                            });
+                        });
+
+                        // Viewers in hidden tabs have no size yet; start once they are laid out
+                        var onResize = function () {
+                            if (!viewer.scale) {
+                                viewer.setView(viewer.fitScale(), 0, 0, true);
+                            } else {
+                                viewer.setView(viewer.scale, viewer.x, viewer.y, true);
+                            }
+                        };
+                        if (window.ResizeObserver) {
+                            new ResizeObserver(onResize).observe(el);
+                        } else {
+                            window.addEventListener('resize', onResize);
+                            onResize();
+                        }
+                        return viewer;
+                    }
+
+                    document.addEventListener('DOMContentLoaded', function () {
+                        document.querySelectorAll('.tile-viewer').forEach(function (el) {
+                            var viewer = createTileViewer(el);
+                            if (viewer.group) {
+                                (tileViewerGroups[viewer.group] = tileViewerGroups[viewer.group] || []).push(viewer);
+                            }
+                        });
+                    });
+                </script>
+"""
@@ -1,33 +1,81 @@
 import os
 import time
+import uuid
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from screenshot_capture import ScreenshotCapture
 from image_comparison import ImageComparison
 from ai_detector import AIDetector
 from report_generator import ReportGenerator
-from wcag_checker import WCAGCompliantChecker
+from wcag_checker import WCAGCompliantChecker, WCAGAuditCancelled
+from wcag_cache import WCAGResultCache
+from artifact_store import ArtifactStore
+
+# Default thresholds for fail-fast gating mode (enabled with config['fail_fast'])
+DEFAULT_GATING_THRESHOLDS = {
+    'max_pixel_difference_percentage': 25.0,  # Fail when more pixels than this differ
+    'min_ssim': 0.70,                         # Fail when SSIM drops below this
+    'max_regions': 100                        # Fail when detectors report more regions than this
+}
+
+
+class AnalysisGateFailure(Exception):
+    """Raised by an analysis stage when a fail-fast gating threshold is crossed"""
+    
+    def __init__(self, stage, metric, value, threshold, results=None):
+        self.stage = stage
+        self.metric = metric
+        self.value = value
+        self.threshold = threshold
+        self.results = results if results is not None else {}
+        super().__init__(f"Gate '{metric}' failed at stage '{stage}': {value} (threshold: {threshold})")
+    
+    def to_dict(self):
+        """Return a JSON-friendly description of the gate failure"""
+        return {
+            'stage': self.stage,
+            'metric': self.metric,
+            'value': float(self.value),
+            'threshold': float(self.threshold),
+            'message': str(self)
+        }
+
+
+class AnalysisRun:
+    """State of a single analysis run.
+    
+    run_analysis and run_image_analysis create one per call and pass it to the
+    stages, so one VisualAIRegression instance can serve concurrent analyses.
+    """
+    
+    def __init__(self):
+        # Unique per run, so concurrent runs never share output directories or report names
+        self.run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.screenshot_capturer = None
+        # Decoded captures at their original size, reused by the WCAG pixel checks
+        self.screenshots = {}
+
 
 class VisualAIRegression:
     def __init__(self):
         self.setup_logging()
-        self.screenshot_capturer = None
         self.image_comparator = ImageComparison()
         self.ai_detector = AIDetector()
-        self.report_generator = ReportGenerator()
+        self.artifact_store = ArtifactStore()
+        self.report_generator = ReportGenerator(artifact_store=self.artifact_store)
         self.wcag_checker = WCAGCompliantChecker()  # Add WCAG checker
+        self.wcag_cache = WCAGResultCache()
         
     def setup_logging(self):
         """Setup logging for the main regression class"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
         self.logger = logging.getLogger(__name__)
     
     def run_analysis(self, config, progress_callback=None):
         """Run complete visual regression analysis"""
         start_time = time.time()  # Start timing
+        run = AnalysisRun()
         try:
             self.logger.info("Starting visual regression analysis...")
             
@@ -41,15 +89,15 @@ class VisualAIRegression:
             
             # Step 2: Initialize screenshot capturer
             progress_callback("Initializing browser...")
-            self.screenshot_capturer = ScreenshotCapture(
+            run.screenshot_capturer = ScreenshotCapture(
                 browser=config.get('browser', 'chrome'),
                 headless=True
             )
-            self.screenshot_capturer.initialize_driver(config.get('resolution', '1920x1080'))
+            run.screenshot_capturer.initialize_driver(config.get('resolution', '1920x1080'))
             
             # Step 3: Capture screenshots
             progress_callback("Capturing screenshots...")
-            screenshot_paths = self._capture_screenshots(config, progress_callback)
+            screenshot_paths = self._capture_screenshots(config, progress_callback, run)
             
             # Step 4: Load and preprocess images
             progress_callback("Loading and preprocessing images...")
@@ -57,11 +105,29 @@ class VisualAIRegression:
                 screenshot_paths['url1'], 
                 screenshot_paths['url2']
             )
+            run.screenshots = {'url1': img1, 'url2': img2}
             img1, img2 = self.image_comparator.resize_images_to_match(img1, img2)
             
             # Step 5: Run comparisons
             progress_callback("Running image analysis...")
-            analysis_results = self._run_comparisons(img1, img2, config, progress_callback)
+            try:
+                analysis_results = self._run_comparisons(img1, img2, config, progress_callback, run)
+            except AnalysisGateFailure as gate_failure:
+                # Fail-fast: skip the remaining stages and emit a minimal failure report
+                result = self._handle_gate_failure(gate_failure, config, screenshot_paths['url1'],
+                                                   screenshot_paths['url2'], start_time, progress_callback)
+                self._cleanup(run)
+                return {
+                    'analysis_results': result['analysis_results'],
+                    'reports': result['reports'],
+                    'screenshot_paths': screenshot_paths,
+                    'summary': result['summary'],
+                    'summary_dict': result['summary_dict'],
+                    'details': result['details'],
+                    'duration': result['analysis_results']['duration'],
+                    'timestamp': result['analysis_results']['timestamp'],
+                    'gate_failure': result['analysis_results']['gate_failure']
+                }
             
             # Step 5.5: Add screenshot paths to analysis results for report generation
             analysis_results['screenshots'] = {
@@ -87,12 +153,12 @@ class VisualAIRegression:
             # Step 7: Generate reports (now with summary_dict included)
             progress_callback("Generating reports...")
             reports = self.report_generator.generate_comprehensive_report(
-                analysis_results, config
+                analysis_results, config, images=run.screenshots
             )
             
             # Step 8: Cleanup
             progress_callback("Cleaning up resources...")
-            self._cleanup()
+            self._cleanup(run)
             
             # Calculate analysis duration
             end_time = time.time()
@@ -118,7 +184,7 @@ class VisualAIRegression:
             
         except Exception as e:
             self.logger.error(f"Analysis failed: {str(e)}")
-            self._cleanup()
+            self._cleanup(run)
             raise
     
     def _validate_config(self, config):
@@ -136,23 +202,24 @@ class VisualAIRegression:
         
         self.logger.info("Configuration validated successfully")
     
-    def _capture_screenshots(self, config, progress_callback):
+    def _capture_screenshots(self, config, progress_callback, run):
         """Capture screenshots of both URLs"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            screenshots_dir = os.path.join("screenshots", timestamp)
+            screenshots_dir = os.path.join("screenshots", run.run_id)
             os.makedirs(screenshots_dir, exist_ok=True)
             
             screenshot_paths = {}
+            save_html = config.get('save_html_snapshot', True)
             
             # Capture first URL
             progress_callback(f"Capturing screenshot of URL 1: {config['url1']}")
             path1 = os.path.join(screenshots_dir, "url1_screenshot.png")
-            self.screenshot_capturer.capture_screenshot(
+            run.screenshot_capturer.capture_screenshot(
                 config['url1'], 
                 path1, 
                 wait_time=3, 
-                full_page=True
+                full_page=True,
+                html_output_path=os.path.join(screenshots_dir, "url1_page.html") if save_html else None
             )
             screenshot_paths['url1'] = path1
             
@@ -162,18 +229,22 @@ class VisualAIRegression:
             # Capture second URL
             progress_callback(f"Capturing screenshot of URL 2: {config['url2']}")
             path2 = os.path.join(screenshots_dir, "url2_screenshot.png")
-            self.screenshot_capturer.capture_screenshot(
+            run.screenshot_capturer.capture_screenshot(
                 config['url2'], 
                 path2, 
                 wait_time=3, 
-                full_page=True
+                full_page=True,
+                html_output_path=os.path.join(screenshots_dir, "url2_page.html") if save_html else None
             )
             screenshot_paths['url2'] = path2
             
+            # Identical captures across runs share one stored file
+            self._intern_artifacts(config, [path1, path2])
+            
             # Get page information
             progress_callback("Gathering page information...")
-            page_info1 = self.screenshot_capturer.get_page_info(config['url1'])
-            page_info2 = self.screenshot_capturer.get_page_info(config['url2'])
+            page_info1 = run.screenshot_capturer.get_page_info(config['url1'])
+            page_info2 = run.screenshot_capturer.get_page_info(config['url2'])
             
             screenshot_paths['page_info'] = {
                 'url1': page_info1,
@@ -187,9 +258,23 @@ class VisualAIRegression:
             self.logger.error(f"Failed to capture screenshots: {str(e)}")
             raise
     
-    def _run_comparisons(self, img1, img2, config, progress_callback):
-        """Run all enabled comparison analyses"""
-        results = {}
+    def _run_comparisons(self, img1, img2, config, progress_callback, run=None):
+        """Run all enabled comparison analyses.
+        
+        With a browser session, the WCAG audits of both URLs start first and run in
+        background threads (url2 on a second driver) while the image detectors run.
+        """
+        run = run or AnalysisRun()
+        results = {'run_id': run.run_id}
+        stage_timings = {}
+        results['stage_timings'] = stage_timings
+        stage_start = time.time()
+        
+        wcag_audits = None
+        if config.get('wcag_analysis', True) and config.get('wcag_concurrent', True) and \
+                run.screenshot_capturer and run.screenshot_capturer.driver:
+            progress_callback("Starting WCAG compliance analysis in the background...")
+            wcag_audits = self._start_wcag_audits(config, progress_callback, run)
         
         try:
             # Comprehensive metrics analysis
@@ -202,12 +287,22 @@ class VisualAIRegression:
             results['pixel_metrics'] = metrics['pixel_metrics']
             results['overall_similarity_percentage'] = metrics['overall_similarity_percentage']
             results['diff_image'] = metrics['ssim_diff_image']
+            results['difference_map'] = metrics['difference_map']
+            stage_start = self._record_stage(stage_timings, 'metrics', stage_start)
+            self._check_gating(results, config, 'metrics')
             
             # Layout shift detection
             if config.get('layout_shift', True):
                 progress_callback("Detecting layout shifts...")
                 layout_shifts = self.image_comparator.detect_layout_shifts(img1, img2)
                 results['layout_shifts'] = layout_shifts
+                
+                # Components moved or duplicated anywhere on the page (opt-in)
+                if config.get('moved_components', False):
+                    progress_callback("Detecting moved components...")
+                    results['moved_components'] = self.image_comparator.detect_moved_components(img1, img2)
+                stage_start = self._record_stage(stage_timings, 'layout_shift', stage_start)
+                self._check_gating(results, config, 'layout_shift')
             
             # Color and font analysis
             if config.get('font_color', True):
@@ -215,6 +310,8 @@ class VisualAIRegression:
                 color_differences, color_diff_img = self.image_comparator.detect_color_differences(img1, img2)
                 results['color_differences'] = color_differences
                 results['color_diff_image'] = color_diff_img
+                stage_start = self._record_stage(stage_timings, 'font_color', stage_start)
+                self._check_gating(results, config, 'font_color')
             
             # Missing/overlapping elements detection
             if config.get('element_detection', True):
@@ -223,23 +320,33 @@ class VisualAIRegression:
                 results['missing_elements'] = missing_elements
                 results['new_elements'] = new_elements
                 results['elements_diff_image'] = elements_diff
+                self._check_gating(results, config, 'element_detection')
                 
                 progress_callback("Detecting overlapping elements...")
                 overlapping_elements = self.image_comparator.detect_overlapping_elements(img1, img2)
                 results['overlapping_elements'] = overlapping_elements
+                stage_start = self._record_stage(stage_timings, 'element_detection', stage_start)
             
             # AI-powered analysis
             if config.get('ai_analysis', True):
                 progress_callback("Running AI-powered analysis...")
-                ai_results = self._run_ai_analysis(img1, img2, progress_callback)
+                ai_results = self._run_ai_analysis(img1, img2, progress_callback, config)
                 results['ai_analysis'] = ai_results
+                stage_start = self._record_stage(stage_timings, 'ai_analysis', stage_start)
             
             # WCAG Compliance Analysis
-            if config.get('wcag_analysis', True):
+            if wcag_audits is not None:
+                progress_callback("Waiting for WCAG compliance analysis...")
+                results['wcag_analysis'] = self._finish_wcag_audits(wcag_audits)
+                stage_start = self._record_stage(stage_timings, 'wcag_wait', stage_start)
+            elif config.get('wcag_analysis', True):
                 try:
                     progress_callback("Running WCAG compliance analysis...")
-                    wcag_results_url1 = self._run_wcag_analysis(config['url1'], progress_callback)
-                    wcag_results_url2 = self._run_wcag_analysis(config['url2'], progress_callback)
+                    wcag_cache = self.wcag_cache if config.get('wcag_cache', True) else None
+                    wcag_results_url1 = self._run_wcag_analysis(config['url1'], progress_callback, run, wcag_cache,
+                                                                run.screenshots.get('url1'))
+                    wcag_results_url2 = self._run_wcag_analysis(config['url2'], progress_callback, run, wcag_cache,
+                                                                run.screenshots.get('url2'))
                     
                     # Always include WCAG analysis even if there are errors
                     results['wcag_analysis'] = {
@@ -256,20 +363,22 @@ class VisualAIRegression:
                         'url2': {'error': str(e), 'compliance_score': 0, 'compliance_level': 'Error'},
                         'comparison': {'assessment': 'Analysis failed', 'error': str(e)}
                     }
+                stage_start = self._record_stage(stage_timings, 'wcag_analysis', stage_start)
 
             # Generate difference visualizations
             progress_callback("Creating difference visualizations...")
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            viz_dir = os.path.join("visualizations", timestamp)
+            viz_dir = os.path.join("visualizations", run.run_id)
             os.makedirs(viz_dir, exist_ok=True)
             
             # Heatmap
             heatmap_path = os.path.join(viz_dir, "difference_heatmap.png")
-            self.image_comparator.create_difference_heatmap(img1, img2, heatmap_path)
+            self.image_comparator.create_difference_heatmap(img1, img2, heatmap_path, results['difference_map'])
             results['heatmap_path'] = heatmap_path
             
             # Annotated comparison
             all_differences = []
+            if 'moved_components' in results:
+                all_differences.extend(results['moved_components'])
             if 'layout_shifts' in results:
                 all_differences.extend(results['layout_shifts'])
             if 'color_differences' in results:
@@ -281,16 +390,118 @@ class VisualAIRegression:
                     img1, img2, all_differences, annotated_path
                 )
                 results['annotated_comparison_path'] = annotated_path
+            self._intern_artifacts(config, [results.get('heatmap_path'), results.get('annotated_comparison_path')])
+            
+            self._record_stage(stage_timings, 'visualizations', stage_start)
             
             self.logger.info("All comparisons completed successfully")
             return results
             
+        except AnalysisGateFailure:
+            raise
         except Exception as e:
             self.logger.error(f"Failed to run comparisons: {str(e)}")
             raise
+        finally:
+            if wcag_audits is not None:
+                # When a stage failed (e.g. a fail-fast gate), cancel the background audits instead
+                # of waiting for them; running ones stop at their next check and close their driver
+                wcag_audits['cancel'].set()
+                wcag_audits['executor'].shutdown(wait=False, cancel_futures=True)
+    
+    def _record_stage(self, stage_timings, stage, stage_start):
+        """Store the duration of a stage and return the start time of the next one"""
+        now = time.time()
+        stage_timings[stage] = now - stage_start
+        return now
+    
+    def _intern_artifacts(self, config, paths):
+        """Deduplicate generated files through the artifact store (config 'artifact_store', default on)"""
+        if not config.get('artifact_store', True):
+            return
+        for path in paths:
+            if not path or not os.path.exists(path):
+                continue
+            try:
+                self.artifact_store.intern(path)
+            except Exception as e:
+                self.logger.warning(f"Could not add {path} to the artifact store: {e}")
+    
+    def _get_gating_thresholds(self, config):
+        """Merge user-supplied gating thresholds with the defaults"""
+        thresholds = dict(DEFAULT_GATING_THRESHOLDS)
+        thresholds.update(config.get('gating_thresholds') or {})
+        return thresholds
+    
+    def _check_gating(self, results, config, stage):
+        """Cooperative fail-fast check run by each stage; raises AnalysisGateFailure when a threshold is crossed"""
+        if not config.get('fail_fast', False):
+            return
+        
+        thresholds = self._get_gating_thresholds(config)
+        
+        # Pixel difference percentage
+        max_pixel_diff = thresholds.get('max_pixel_difference_percentage')
+        pixel_diff = results.get('pixel_metrics', {}).get('pixel_difference_percentage')
+        if max_pixel_diff is not None and pixel_diff is not None and pixel_diff > max_pixel_diff:
+            raise AnalysisGateFailure(stage, 'pixel_difference_percentage', pixel_diff, max_pixel_diff, results)
+        
+        # Structural similarity
+        min_ssim = thresholds.get('min_ssim')
+        ssim_score = results.get('ssim')
+        if min_ssim is not None and ssim_score is not None and ssim_score < min_ssim:
+            raise AnalysisGateFailure(stage, 'ssim', ssim_score, min_ssim, results)
+        
+        # Number of changed regions reported so far
+        max_regions = thresholds.get('max_regions')
+        region_count = self._count_regions(results)
+        if max_regions is not None and region_count > max_regions:
+            raise AnalysisGateFailure(stage, 'regions', region_count, max_regions, results)
+    
+    def _count_regions(self, results):
+        """Count the changed regions reported by the detectors so far"""
+        return (len(results.get('layout_shifts', [])) +
+                len(results.get('moved_components', [])) +
+                len(results.get('color_differences', [])) +
+                len(results.get('missing_elements', [])) +
+                len(results.get('new_elements', [])))
+    
+    def _handle_gate_failure(self, gate_failure, config, image1_path, image2_path, start_time, progress_callback):
+        """Build the minimal result set and failure report for a fail-fast gate failure"""
+        progress_callback(f"Fail-fast gate triggered: {gate_failure} - skipping remaining stages")
+        self.logger.warning(f"Analysis stopped by fail-fast gate: {gate_failure}")
+        
+        analysis_results = gate_failure.results
+        analysis_results['gate_failure'] = gate_failure.to_dict()
+        analysis_results['screenshots'] = {
+            'url1': image1_path,
+            'url2': image2_path
+        }
+        
+        summary_dict = self._generate_summary_dict(analysis_results, config)
+        summary = self._generate_summary(analysis_results, config)
+        details = self._generate_details(analysis_results)
+        analysis_results['summary_dict'] = summary_dict
+        
+        analysis_duration = time.time() - start_time
+        analysis_results['duration'] = f"{analysis_duration:.1f} seconds"
+        analysis_results['analysis_duration'] = analysis_duration
+        analysis_results['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        progress_callback("Generating failure report...")
+        reports = self.report_generator.generate_gate_failure_report(analysis_results, config)
+        
+        return {
+            'analysis_results': analysis_results,
+            'reports': reports,
+            'summary': summary,
+            'summary_dict': summary_dict,
+            'details': details
+        }
     
-    def _run_ai_analysis(self, img1, img2, progress_callback):
+    def _run_ai_analysis(self, img1, img2, progress_callback, config=None):
         """Run AI-powered analysis"""
+        config = config or {}
         try:
             ai_results = {}
             
@@ -300,14 +511,30 @@ class VisualAIRegression:
             features2 = self.ai_detector.extract_features(img2)
             
             if len(features1) > 0 and len(features2) > 0:
-                # Anomaly detection
+                # Anomaly detection: per-page historical model when available, pairwise clustering otherwise
                 progress_callback("Running anomaly detection...")
-                anomaly_results = self.ai_detector.detect_anomalies_clustering(features1, features2)
+                model_path = config.get('anomaly_model_path')
+                page_key = config.get('page_key') or config.get('url1') or config.get('baseline_image')
+                # Run-scoped view of the detector, so concurrent runs keep their own models
+                detector = self.ai_detector.with_model(model_path) if model_path else self.ai_detector
+                
+                if detector.has_page_model(page_key):
+                    anomaly_results = detector.detect_anomalies_history(page_key, features2)
+                else:
+                    anomaly_results = detector.detect_anomalies_clustering(features1, features2)
                 ai_results.update(anomaly_results)
                 
+                # The baseline is an accepted capture; add it to the page history
+                if model_path and config.get('train_anomaly_model', False):
+                    self.ai_detector.update_model_file(model_path, page_key, features1)
+                
                 # Semantic analysis
                 progress_callback("Performing semantic analysis...")
-                semantic_results = self.ai_detector.analyze_semantic_differences(img1, img2)
+                semantic_results = self.ai_detector.analyze_semantic_differences(
+                    img1, img2,
+                    segmentation_mode=config.get('segmentation_mode', 'full'),
+                    time_budget=config.get('segmentation_time_budget')
+                )
                 ai_results['semantic_analysis'] = semantic_results
             else:
                 self.logger.warning("Could not extract features for AI analysis")
@@ -329,33 +556,140 @@ class VisualAIRegression:
                 'error': str(e)
             }
     
-    def _run_wcag_analysis(self, url, progress_callback):
-        """Run WCAG compliance analysis for a single URL"""
+    def _start_wcag_audits(self, config, progress_callback, run):
+        """Start the url1 and url2 WCAG audits in background threads.
+        
+        url1 is audited on the run's driver, url2 on a second driver of the same
+        browser and resolution (falling back to the run's driver, after url1, if it
+        cannot be started). Each audit uses its own checker instance. Setting the
+        returned 'cancel' event stops both audits between checks.
+        """
+        wcag_cache = self.wcag_cache if config.get('wcag_cache', True) else None
+        shared_driver_lock = threading.Lock()
+        cancel = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='wcag')
+        
+        def check_cancelled(url):
+            if cancel.is_set():
+                raise WCAGAuditCancelled(f"WCAG audit of {url} cancelled")
+        
+        def audit_on_shared_driver(url, screenshot):
+            with shared_driver_lock:
+                check_cancelled(url)
+                return self._run_wcag_analysis(url, progress_callback, run, wcag_cache, screenshot,
+                                               checker=self._new_wcag_checker(), cancel_event=cancel)
+        
+        def audit_on_own_driver(url, screenshot):
+            check_cancelled(url)
+            capturer = None
+            driver_start = time.time()
+            try:
+                capturer = ScreenshotCapture(browser=config.get('browser', 'chrome'), headless=True)
+                capturer.initialize_driver(config.get('resolution', '1920x1080'))
+            except Exception as e:
+                self.logger.warning(f"Second browser for WCAG analysis unavailable, sharing the first: {e}")
+                if capturer is not None:
+                    capturer.close()
+                return audit_on_shared_driver(url, screenshot)
+            try:
+                driver_seconds = time.time() - driver_start
+                results = self._run_wcag_analysis(url, progress_callback, run, wcag_cache, screenshot,
+                                                  checker=self._new_wcag_checker(), driver=capturer.driver,
+                                                  cancel_event=cancel)
+                results['driver_startup_seconds'] = driver_seconds
+                return results
+            finally:
+                capturer.close()
+        
+        def timed(audit, url, screenshot):
+            start = time.time()
+            results = audit(url, screenshot)
+            return results, start, time.time()
+        
+        return {
+            'executor': executor,
+            'cancel': cancel,
+            'started': time.time(),
+            'futures': {
+                'url1': executor.submit(timed, audit_on_shared_driver, config['url1'], run.screenshots.get('url1')),
+                'url2': executor.submit(timed, audit_on_own_driver, config['url2'], run.screenshots.get('url2'))
+            }
+        }
+    
+    def _finish_wcag_audits(self, wcag_audits):
+        """Wait for the background WCAG audits and compare them, with overlap timings"""
+        wait_start = time.time()
+        audits = {key: future.result() for key, future in wcag_audits['futures'].items()}
+        finished = time.time()
+        wcag_audits['executor'].shutdown(wait=True)
+        
+        wcag_results = {key: results for key, (results, _, _) in audits.items()}
+        durations = {key: end - start for key, (_, start, end) in audits.items()}
+        busy_seconds = sum(durations.values())
+        wait_seconds = finished - wait_start
+        wcag_results['comparison'] = self._compare_wcag_results(wcag_results['url1'], wcag_results['url2'])
+        wcag_results['timings'] = {
+            'url1_seconds': durations['url1'],
+            'url2_seconds': durations['url2'],
+            'driver_startup_seconds': wcag_results['url2'].get('driver_startup_seconds', 0.0),
+            'wall_seconds': finished - wcag_audits['started'],
+            'sequential_seconds': busy_seconds,
+            'wait_seconds': wait_seconds,
+            # Audit time hidden behind the image detectors and the other audit
+            'overlap_seconds': max(0.0, busy_seconds - wait_seconds)
+        }
+        self.logger.info(f"WCAG audits took {busy_seconds:.1f}s of work, {wait_seconds:.1f}s of waiting")
+        return wcag_results
+    
+    def _new_wcag_checker(self):
+        """Checker for one audit, sharing the (stateless) rule engine and its registered rules"""
+        checker = WCAGCompliantChecker()
+        checker.rule_engine = self.wcag_checker.rule_engine
+        return checker
+    
+    def _run_wcag_analysis(self, url, progress_callback, run, cache=None, screenshot=None, checker=None, driver=None,
+                           cancel_event=None):
+        """Run WCAG compliance analysis for a single URL (reusing cached results when the page is unchanged).
+        
+        Raises WCAGAuditCancelled instead of returning error results once cancel_event is set.
+        """
         try:
             print(f"DEBUG: Starting WCAG analysis for URL: {url}")
             
-            if not self.screenshot_capturer or not self.screenshot_capturer.driver:
-                raise ValueError("WebDriver not initialized")
+            checker = checker or self.wcag_checker
+            if driver is None:
+                if not run.screenshot_capturer or not run.screenshot_capturer.driver:
+                    raise ValueError("WebDriver not initialized")
+                driver = run.screenshot_capturer.driver
             
             # Run WCAG compliance check
-            wcag_results = self.wcag_checker.check_wcag_compliance(
-                self.screenshot_capturer.driver, 
+            wcag_results = checker.check_wcag_compliance(
+                driver, 
                 url, 
-                progress_callback
+                progress_callback,
+                cache=cache,
+                screenshot=screenshot,
+                cancel_event=cancel_event
             )
             
             print(f"DEBUG: WCAG analysis completed for {url}. Score: {wcag_results.get('compliance_score', 'missing')}")
             
             # Generate WCAG report
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            wcag_report_path = os.path.join("reports", f"wcag_report_{timestamp}_{url.replace('://', '_').replace('/', '_')}.json")
+            wcag_report_path = os.path.join("reports", f"wcag_report_{run.run_id}_{url.replace('://', '_').replace('/', '_')}.json")
             os.makedirs("reports", exist_ok=True)
-            self.wcag_checker.generate_wcag_report(wcag_report_path)
+            checker.generate_wcag_report(wcag_report_path, wcag_results)
             wcag_results['report_path'] = wcag_report_path
             
             return wcag_results
             
+        except WCAGAuditCancelled:
+            self.logger.info(f"WCAG analysis cancelled for {url}")
+            raise
         except Exception as e:
+            if cancel_event is not None and cancel_event.is_set():
+                # The run's driver may be closed under a cancelled audit
+                self.logger.info(f"WCAG analysis cancelled for {url}")
+                raise WCAGAuditCancelled(f"WCAG audit of {url} cancelled") from e
             self.logger.error(f"WCAG analysis failed for {url}: {str(e)}")
             print(f"DEBUG: WCAG analysis failed for {url}: {str(e)}")
             return {
@@ -392,7 +726,8 @@ class VisualAIRegression:
                     'url2_critical': wcag2.get('critical_issues', 0),
                     'difference': wcag2.get('critical_issues', 0) - wcag1.get('critical_issues', 0)
                 },
-                'category_comparison': {}
+                'category_comparison': {},
+                'issue_changes': self._diff_wcag_issues(wcag1, wcag2)
             }
             
             # Compare categories
@@ -419,6 +754,29 @@ class VisualAIRegression:
             self.logger.error(f"WCAG comparison failed: {str(e)}")
             return {'error': str(e)}
 
+    def _diff_wcag_issues(self, wcag1, wcag2, max_listed=20):
+        """New and resolved issues between two audits, matched by guideline, description and element fingerprint"""
+        def issues_by_key(results):
+            keyed = {}
+            for data in results.get('categories', {}).values():
+                for issue in data.get('issues', []):
+                    key = (issue.get('guideline'), issue.get('description'),
+                           issue.get('fingerprint') or issue.get('element'))
+                    keyed.setdefault(key, issue)
+            return keyed
+        
+        issues1, issues2 = issues_by_key(wcag1), issues_by_key(wcag2)
+        summarize = lambda issue: {key: issue.get(key) for key in ('guideline', 'description', 'element', 'selector')}
+        new = [issues2[key] for key in issues2 if key not in issues1]
+        resolved = [issues1[key] for key in issues1 if key not in issues2]
+        return {
+            'new': len(new),
+            'resolved': len(resolved),
+            'unchanged': len(issues2) - len(new),
+            'new_issues': [summarize(issue) for issue in new[:max_listed]],
+            'resolved_issues': [summarize(issue) for issue in resolved[:max_listed]]
+        }
+
     def _generate_summary(self, results, config):
         """Generate a text summary of results based on enabled analysis types"""
         summary_lines = []
@@ -443,6 +801,12 @@ class VisualAIRegression:
         else:
             summary_lines.append("✗ Images have significant differences")
         
+        # Fail-fast gate (only present when the analysis was stopped early)
+        if 'gate_failure' in results:
+            gate = results['gate_failure']
+            summary_lines.append(f"⛔ Fail-fast gate triggered at '{gate['stage']}': "
+                                 f"{gate['metric']} = {gate['value']:.2f} (threshold: {gate['threshold']:.2f})")
+        
         # Layout shifts (only if enabled)
         if config.get('layout_shift', True) and 'layout_shifts' in results:
             layout_shifts = len(results.get('layout_shifts', []))
@@ -451,6 +815,11 @@ class VisualAIRegression:
             else:
                 summary_lines.append("✓ No layout shifts detected")
         
+        if results.get('moved_components'):
+            moved = sum(1 for c in results['moved_components'] if c['type'] == 'moved')
+            duplicated = len(results['moved_components']) - moved
+            summary_lines.append(f"⚠ {moved} moved and {duplicated} duplicated components detected")
+        
         # Color differences (only if enabled)
         if config.get('font_color', True) and 'color_differences' in results:
             color_diffs = len(results.get('color_differences', []))
@@ -510,6 +879,7 @@ class VisualAIRegression:
         if config.get('layout_shift', True) and 'layout_shifts' in results:
             layout_shifts = len(results.get('layout_shifts', []))
             summary_dict['layout_differences'] = layout_shifts
+            summary_dict['moved_components'] = len(results.get('moved_components', []))
         
         # Color differences (only if enabled)
         if config.get('font_color', True) and 'color_differences' in results:
@@ -549,7 +919,12 @@ class VisualAIRegression:
             summary_dict['wcag_url1_level'] = wcag.get('url1', {}).get('compliance_level', 'Unknown')
             summary_dict['wcag_url2_level'] = wcag.get('url2', {}).get('compliance_level', 'Unknown')
             summary_dict['wcag_url1_issues'] = wcag.get('url1', {}).get('total_issues', 0)
-            summary_dict['wcag_url2_issues'] = wcag.get('url2', {}).get('total_issues', 0)        
+            summary_dict['wcag_url2_issues'] = wcag.get('url2', {}).get('total_issues', 0)
+        
+        # Fail-fast gate status
+        if 'gate_failure' in results:
+            summary_dict['gate_failed'] = True
+            summary_dict['gate_failure'] = results['gate_failure']
         return summary_dict
 
     def _generate_details(self, results):
@@ -559,6 +934,10 @@ class VisualAIRegression:
         # Similarity details
         details['Structural Similarity (SSIM)'] = f"Score: {results.get('similarity_score', 0):.4f}"
         
+        # Fail-fast gate details
+        if 'gate_failure' in results:
+            details['Fail-Fast Gate'] = results['gate_failure']['message']
+        
         # Layout shifts details
         if 'layout_shifts' in results and results['layout_shifts']:
             shift_details = []
@@ -566,6 +945,15 @@ class VisualAIRegression:
                 shift_details.append(f"Shift {i+1}: {shift.get('distance', 0):.1f}px movement")
             details['Layout Shifts'] = "\\n".join(shift_details)
         
+        # Moved components details
+        if results.get('moved_components'):
+            move_details = []
+            for i, move in enumerate(results['moved_components'][:5]):  # Top 5
+                x1, y1 = move['original_position'][:2]
+                x2, y2 = move['new_position'][:2]
+                move_details.append(f"Component {i+1} {move['type']}: ({x1}, {y1}) → ({x2}, {y2}), {move['distance']:.1f}px")
+            details['Moved Components'] = "\\n".join(move_details)
+        
         # Color differences details
         if 'color_differences' in results and results['color_differences']:
             color_details = []
@@ -606,6 +994,7 @@ class VisualAIRegression:
     def run_image_analysis(self, config, progress_callback=None):
         """Run analysis on pre-existing image files"""
         start_time = time.time()
+        run = AnalysisRun()
         try:
             self.logger.info("Starting image analysis...")
             
@@ -618,6 +1007,11 @@ class VisualAIRegression:
             if 'baseline_image' not in config or 'current_image' not in config:
                 raise ValueError("Both baseline_image and current_image paths are required")
             
+            # Pick the most similar historical capture as baseline
+            if config['baseline_image'] == 'auto':
+                progress_callback("Selecting baseline from screenshot index...")
+                config = {**config, 'baseline_image': self._auto_select_baseline(config)}
+            
             if not os.path.exists(config['baseline_image']):
                 raise FileNotFoundError(f"Baseline image not found: {config['baseline_image']}")
             
@@ -634,7 +1028,24 @@ class VisualAIRegression:
             
             # Step 3: Run comparisons
             progress_callback("Running image analysis...")
-            analysis_results = self._run_comparisons(img1, img2, config, progress_callback)
+            try:
+                analysis_results = self._run_comparisons(img1, img2, config, progress_callback, run)
+            except AnalysisGateFailure as gate_failure:
+                # Fail-fast: skip the remaining stages and emit a minimal failure report
+                result = self._handle_gate_failure(gate_failure, config, config['baseline_image'],
+                                                   config['current_image'], start_time, progress_callback)
+                gate_results = result['analysis_results']
+                return {
+                    'similarity_score': gate_results.get('ssim', 0),
+                    'differences_count': self._count_regions(gate_results),
+                    'analysis_duration': gate_results['analysis_duration'],
+                    'difference_image_path': None,
+                    'summary': result['summary'],
+                    'details': result['details'],
+                    'reports': result['reports'],
+                    'timestamp': gate_results['timestamp'],
+                    'gate_failure': gate_results['gate_failure']
+                }
             
             # Step 4: Add image paths to analysis results
             analysis_results['screenshots'] = {
@@ -688,12 +1099,29 @@ class VisualAIRegression:
             self.logger.error(f"Image analysis failed: {str(e)}")
             raise
     
-    def _cleanup(self):
-        """Cleanup resources"""
+    def _auto_select_baseline(self, config):
+        """Return the nearest historical screenshot to config['current_image'] from the screenshot index"""
+        from screenshot_index import load_shared_index
+        
+        # Loaded once per process and reused until the index file changes
+        index = load_shared_index(config.get('screenshot_index_path', os.path.join("models", "screenshot_index.pkl")),
+                                  ai_detector=self.ai_detector)
+        if index is None:
+            raise ValueError("baseline_image is 'auto' but no screenshot index is available")
+        
+        matches = index.query(config['current_image'], k=1)
+        if not matches:
+            raise ValueError("Screenshot index returned no baseline candidates")
+        
+        self.logger.info(f"Auto-selected baseline {matches[0]['path']} (distance {matches[0]['distance']:.3f})")
+        return matches[0]['path']
+    
+    def _cleanup(self, run):
+        """Cleanup the run's resources"""
         try:
-            if self.screenshot_capturer:
-                self.screenshot_capturer.close()
-                self.screenshot_capturer = None
+            if run.screenshot_capturer:
+                run.screenshot_capturer.close()
+                run.screenshot_capturer = None
             self.logger.info("Cleanup completed")
         except Exception as e:
             self.logger.error(f"Cleanup failed: {str(e)}")
@@ -0,0 +1,185 @@
+"""
+WCAG Result Cache Module
+Caches WCAG audit results by normalized DOM hash for skipped and incremental rechecks
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from bs4 import Tag, NavigableString, Comment, Doctype, Declaration, ProcessingInstruction
+
+# Bump when checks change in a way that invalidates cached results
+WCAG_CHECKER_VERSION = '2.2.6'
+
+# Attributes that change between loads without changing the page
+VOLATILE_ATTRIBUTES = frozenset(['nonce', 'data-reactid', 'data-csrf', 'csrf-token'])
+IGNORED_NODES = (Comment, Doctype, Declaration, ProcessingInstruction)
+
+
+def _digest(parts):
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(part.encode('utf-8', 'surrogatepass'))
+        hasher.update(b'\x00')
+    return hasher.hexdigest()
+
+
+def normalized_markup(root, substitutes=None):
+    """Normalized markup tokens of a subtree.
+
+    Comments and doctypes are dropped, whitespace in text is collapsed,
+    attributes are sorted and volatile ones removed, and inline script bodies
+    are ignored (their effect is already in the rendered DOM). Elements whose
+    id() is in substitutes are replaced by the given hash token.
+    """
+    substitutes = substitutes or {}
+    parts = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, tuple):
+            parts.append(f"</{node[0]}>")
+        elif isinstance(node, IGNORED_NODES):
+            continue
+        elif isinstance(node, NavigableString):
+            text = ' '.join(node.split())
+            if text:
+                parts.append(text)
+        elif isinstance(node, Tag):
+            if id(node) in substitutes:
+                parts.append(f"#{substitutes[id(node)]}")
+                continue
+            attributes = sorted((name, ' '.join(value) if isinstance(value, list) else str(value))
+                                for name, value in node.attrs.items() if name not in VOLATILE_ATTRIBUTES)
+            parts.append(f"<{node.name}" + ''.join(f' {name}="{value}"' for name, value in attributes) + ">")
+            stack.append((node.name,))
+            if node.name != 'script':
+                stack.extend(reversed(node.contents))
+    return parts
+
+
+def dom_fingerprint(soup):
+    """Hash a parsed page as a whole and per top-level content subtree.
+
+    Returns {'document': hash, 'units': {hash: element}} where the units are the
+    element children of <body>. The document hash is built from the unit hashes,
+    so the page is traversed once.
+    """
+    body = soup.body
+    roots = [child for child in body.children if isinstance(child, Tag)] if body is not None else []
+    unit_hashes = {id(root): _digest(normalized_markup(root)) for root in roots}
+    return {
+        'document': _digest(normalized_markup(soup, substitutes=unit_hashes)),
+        'units': {unit_hashes[id(root)]: root for root in roots}
+    }
+
+
+class WCAGResultCache:
+    """On-disk cache of WCAG audit results.
+
+    Full results are stored by a key built from the normalized DOM hash, the
+    stylesheets, the viewport and the checker version; an identical page is not
+    audited again. The stylesheets are part of the key because the contrast,
+    target size and heatmap results depend on layout and pixels, which a
+    CSS-only change alters without touching the DOM.
+    For every URL and viewport the per-subtree issues of the latest audit are
+    kept as well, so a page that changed in some subtrees only reruns the static
+    rules for those.
+    """
+
+    def __init__(self, cache_dir=os.path.join("cache", "wcag"), max_entries=500):
+        self.setup_logging()
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def setup_logging(self):
+        """Setup logging for the WCAG result cache"""
+        self.logger = logging.getLogger(__name__)
+
+    def key(self, document_hash, viewport, rule_names=(), stylesheets=()):
+        """Cache key for a page state; registered rule names are part of the checker version.
+
+        stylesheets holds [href, media, css text] per stylesheet of the page (css text
+        is None for cross-origin sheets, which are identified by their URL alone).
+        """
+        version = f"{WCAG_CHECKER_VERSION}:{','.join(sorted(rule_names))}"
+        style_hash = _digest(str(part) for sheet in stylesheets for part in sheet)
+        return _digest([version, f"{viewport[0]}x{viewport[1]}", document_hash, style_hash])
+
+    def page_key(self, url, viewport, rule_names=()):
+        """Key of the latest audit of a URL, the base for incremental rechecks"""
+        version = f"{WCAG_CHECKER_VERSION}:{','.join(sorted(rule_names))}"
+        return _digest([version, f"{viewport[0]}x{viewport[1]}", url])
+
+    def _path(self, kind, key):
+        return os.path.join(self.cache_dir, kind, f"{key}.json")
+
+    def _read(self, kind, key):
+        path = self._path(kind, key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable WCAG cache entry {path}: {e}")
+            return None
+
+    def _write(self, kind, key, data):
+        path = self._path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, default=str)
+        os.replace(temp_path, path)
+
+    def get(self, key):
+        """Cached results for a page state, or None"""
+        return self._read('results', key)
+
+    def get_page_units(self, page_key):
+        """Per-subtree rule issues of the latest audit of a URL ({} when there is none)"""
+        entry = self._read('pages', page_key)
+        return entry['units'] if entry else {}
+
+    def put(self, key, results, page_key=None, unit_issues=None):
+        """Store results (and the per-subtree issues of the page) for later audits.
+
+        Without a key (the page state could not be fully identified) only the
+        subtree issues are kept.
+        """
+        try:
+            with self._lock:
+                if key is not None:
+                    self._write('results', key, results)
+                    self._prune('results')
+                if page_key is not None and unit_issues is not None:
+                    self._write('pages', page_key, {'key': key, 'units': unit_issues})
+                    self._prune('pages')
+        except Exception as e:
+            self.logger.warning(f"Failed to write WCAG cache entry: {e}")
+
+    def _prune(self, kind):
+        """Drop the oldest entries beyond max_entries"""
+        directory = os.path.join(self.cache_dir, kind)
+        entries = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.json')]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove all cached results"""
+        with self._lock:
+            for kind in ('results', 'pages'):
+                directory = os.path.join(self.cache_dir, kind)
+                if os.path.isdir(directory):
+                    for name in os.listdir(directory):
+                        os.remove(os.path.join(directory, name))
@@ -4,50 +4,341 @@ Comprehensive Web Content Accessibility Guidelines (WCAG) 2.1 & 2.2 compliance t
 """
 
 import os
-import json
 import logging
-import io
+import time
+import uuid
+import threading
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from bs4 import BeautifulSoup
 import requests
-from PIL import Image, ImageDraw, ImageFont
+from PIL import ImageDraw, ImageFont
 import cv2
 import numpy as np
 from collections import defaultdict
 import re
 import colorsys
+from wcag_rules import DOMRuleEngine
+from wcag_cache import dom_fingerprint
+from report_serializer import ReportSerializer
+
+# Positional XPath of an element, in the format of wcag_rules.element_xpath
+XPATH_FUNCTION_SCRIPT = """
+const xpathOf = (el) => {
+    const parts = [];
+    for (; el && el.nodeType === 1; el = el.parentElement) {
+        let index = 1;
+        for (let sibling = el.previousElementSibling; sibling; sibling = sibling.previousElementSibling) {
+            if (sibling.localName === el.localName) index++;
+        }
+        parts.unshift(el.localName + '[' + index + ']');
+    }
+    return '/' + parts.join('/');
+};
+"""
+
+# Collects, in one round trip, the computed text color, effective background (alpha-composited
+# through ancestors), font size/weight and page rect of every element with visible text.
+# Each row: [tag, text, r, g, b, a, bg_r, bg_g, bg_b, font_size_px, font_weight, x, y, w, h, bg_image, xpath]
+TEXT_STYLE_HARVEST_SCRIPT = XPATH_FUNCTION_SCRIPT + """
+const parseColor = (value) => {
+    const match = value && value.match(/rgba?\\(([^)]+)\\)/);
+    if (!match) return null;
+    const parts = match[1].split(/[\\s,\\/]+/).filter(Boolean).map(parseFloat);
+    return [parts[0], parts[1], parts[2], parts.length > 3 ? parts[3] : 1];
+};
+const backgrounds = new Map();
+const background = (el) => {
+    if (!el || el.nodeType !== 1) return {color: [255, 255, 255], image: false};
+    if (backgrounds.has(el)) return backgrounds.get(el);
+    const style = getComputedStyle(el);
+    const own = parseColor(style.backgroundColor) || [0, 0, 0, 0];
+    const image = style.backgroundImage !== 'none';
+    let result;
+    if (own[3] >= 1) {
+        result = {color: own.slice(0, 3), image: image};
+    } else {
+        const parent = background(el.parentElement);
+        const alpha = own[3];
+        result = {
+            color: [0, 1, 2].map(i => own[i] * alpha + parent.color[i] * (1 - alpha)),
+            image: image || parent.image
+        };
+    }
+    backgrounds.set(el, result);
+    return result;
+};
+const skipped = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE', 'OPTION']);
+const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+const seen = new Set();
+const rows = [];
+while (walker.nextNode()) {
+    const text = walker.currentNode.nodeValue.trim();
+    const el = walker.currentNode.parentElement;
+    if (!text || !el || seen.has(el) || skipped.has(el.tagName)) continue;
+    seen.add(el);
+    const rect = el.getBoundingClientRect();
+    if (rect.width === 0 || rect.height === 0) continue;
+    const style = getComputedStyle(el);
+    if (style.visibility !== 'visible' || parseFloat(style.opacity) === 0) continue;
+    const color = parseColor(style.color);
+    if (!color) continue;
+    const bg = background(el);
+    rows.push([el.tagName.toLowerCase(), text.slice(0, 60)].concat(
+        color, bg.color,
+        [parseFloat(style.fontSize) || 16, parseInt(style.fontWeight, 10) || 400,
+         rect.left + window.scrollX, rect.top + window.scrollY, rect.width, rect.height,
+         bg.image ? 1 : 0, xpathOf(el)]));
+}
+return rows;
+"""
+
+CLICKABLE_SELECTOR = ("a, button, input[type='button'], input[type='submit'], input[type='reset'], "
+                      "[role='button'], [tabindex], [onclick]")
+
+# Elements with a hit area of their own; [tabindex] and [onclick] may also mark containers
+TARGET_SELECTOR = "a, button, input, [role='button']"
+
+# Page rects of all visible clickable targets in one round trip. Targets nested in a
+# TARGET_SELECTOR element are skipped (they share its hit area), and so are focusable or
+# scripted containers of other targets (a <main tabindex="-1"> skip-link destination, a
+# <div onclick> wrapper), whose own targets are checked instead. Links inside a run of text
+# are flagged as inline, which 2.5.8 exempts. Each row: [tag, label, x, y, w, h, inline, xpath]
+TARGET_RECT_SCRIPT = XPATH_FUNCTION_SCRIPT + """
+const selector = arguments[0];
+const targetSelector = arguments[1];
+const rows = [];
+for (const el of document.querySelectorAll(selector)) {
+    if (el.parentElement && el.parentElement.closest(targetSelector)) continue;
+    if (!el.matches(targetSelector) && el.querySelector(selector)) continue;
+    const rect = el.getBoundingClientRect();
+    if (rect.width === 0 || rect.height === 0) continue;
+    const style = getComputedStyle(el);
+    if (style.visibility !== 'visible') continue;
+    const label = (el.getAttribute('aria-label') || el.textContent || el.value || '').trim();
+    const parent = el.parentElement;
+    const inline = style.display === 'inline' && parent !== null &&
+        parent.textContent.trim().length > label.length;
+    rows.push([el.tagName.toLowerCase(), label.slice(0, 40),
+               rect.left + window.scrollX, rect.top + window.scrollY, rect.width, rect.height,
+               inline ? 1 : 0, xpathOf(el)]);
+}
+return rows;
+"""
+
+# Href, media and rule text of every stylesheet, part of the result cache key. Rules of
+# cross-origin sheets cannot be read; their URL stands in for the content
+STYLESHEET_SCRIPT = """
+return Array.from(document.styleSheets, (sheet) => {
+    let text = null;
+    try {
+        text = Array.from(sheet.cssRules, (rule) => rule.cssText).join('\\n');
+    } catch (e) {
+        // Cross-origin sheet
+    }
+    return [sheet.href || '', sheet.media ? sheet.media.mediaText : '', text];
+});
+"""
+
+# Page rects of the elements at the given XPaths (null when missing or not rendered),
+# with the viewport width to map CSS pixels onto the screenshot. Returns [width, rects]
+ISSUE_RECT_SCRIPT = """
+const rects = arguments[0].map((xpath) => {
+    let el = null;
+    try {
+        el = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    } catch (e) {
+        return null;
+    }
+    if (!el || !el.getBoundingClientRect) return null;
+    const rect = el.getBoundingClientRect();
+    if (rect.width === 0 || rect.height === 0) return null;
+    return [rect.left + window.scrollX, rect.top + window.scrollY, rect.width, rect.height];
+});
+return [window.innerWidth, rects];
+"""
+
+# Heatmap overlay colors (RGB) by issue impact, least to most severe; a pixel covered by
+# several issues takes the color of the most severe one
+IMPACT_LEVELS = ['minor', 'moderate', 'major', 'critical']
+IMPACT_COLORS = np.array([[59, 130, 246], [250, 204, 21], [245, 124, 0], [220, 38, 38]], dtype=np.float32)
+# Rows blended at a time by the heatmap overlay (bounds its buffers on full-page captures)
+OVERLAY_BAND_ROWS = 512
+# Locators of page-level issues, which are not marked on the heatmap
+PAGE_LEVEL_LOCATORS = ('/html[1]', '/html[1]/head[1]', '/html[1]/body[1]')
+
+# Checks that need a rendered page and are skipped by the offline (saved HTML) mode
+OFFLINE_SKIPPED_CHECKS = [
+    {'guideline': '1.4.3', 'check': 'Text color contrast (AA)', 'requires': 'computed styles'},
+    {'guideline': '1.4.6', 'check': 'Text color contrast (AAA)', 'requires': 'computed styles'},
+    {'guideline': '1.4.3', 'check': 'Overall page contrast', 'requires': 'screenshot'},
+    {'guideline': '1.4.1', 'check': 'Color blindness simulation', 'requires': 'screenshot'},
+    {'guideline': '2.5.8', 'check': 'Target size and spacing', 'requires': 'layout'},
+    {'guideline': None, 'check': 'Accessibility heatmap', 'requires': 'screenshot'}
+]
+
+# WCAG "large scale" text: at least 18pt (24px), or 14pt (18.66px) bold
+LARGE_TEXT_SIZE_PX = 24.0
+LARGE_BOLD_TEXT_SIZE_PX = 18.66
+
+
+# Color vision deficiency simulation matrices in linear RGB (Machado, Oliveira & Fernandes
+# 2009, severity 1.0). Partial severities are interpolated towards the identity.
+CVD_MATRICES = {
+    'protanopia': np.array([[0.152286, 1.052583, -0.204868],
+                            [0.114503, 0.786281, 0.099216],
+                            [-0.003882, -0.048116, 1.051998]]),
+    'deuteranopia': np.array([[0.367322, 0.860646, -0.227968],
+                              [0.280085, 0.672501, 0.047413],
+                              [-0.011820, 0.042940, 0.968881]]),
+    'tritanopia': np.array([[1.255528, -0.076749, -0.178779],
+                            [-0.078411, 0.930809, 0.147602],
+                            [0.004733, 0.691367, 0.303900]])
+}
+
+# sRGB (0-255) to linear RGB lookup table
+SRGB_TO_LINEAR_LUT = np.where(np.arange(256) / 255.0 <= 0.04045, np.arange(256) / 255.0 / 12.92,
+                              ((np.arange(256) / 255.0 + 0.055) / 1.055) ** 2.4)
+
+
+def srgb_to_linear(rgb):
+    """Linear RGB (0-1) of 0-255 sRGB values; uint8 input uses the lookup table"""
+    rgb = np.asarray(rgb)
+    if rgb.dtype == np.uint8:
+        return SRGB_TO_LINEAR_LUT[rgb]
+    channels = rgb.astype(np.float64) / 255.0
+    return np.where(channels <= 0.04045, channels / 12.92, ((channels + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(linear):
+    """0-255 sRGB of linear RGB (0-1) values"""
+    linear = np.clip(linear, 0.0, 1.0)
+    return 255.0 * np.where(linear <= 0.0031308, linear * 12.92, 1.055 * linear ** (1 / 2.4) - 0.055)
+
+
+def cvd_matrix(deficiency, severity=1.0):
+    """Simulation matrix for a deficiency at a severity between 0 (normal vision) and 1"""
+    severity = float(np.clip(severity, 0.0, 1.0))
+    return (1.0 - severity) * np.eye(3) + severity * CVD_MATRICES[deficiency]
+
+
+def simulate_cvd(rgb, deficiencies=tuple(CVD_MATRICES), severity=1.0):
+    """Simulate color vision deficiencies on (..., 3) sRGB values.
+    
+    All deficiencies are applied with one matrix multiply in linear RGB; the
+    result has a leading axis per deficiency and 0-255 float values.
+    """
+    linear = srgb_to_linear(rgb)
+    matrices = np.stack([cvd_matrix(deficiency, severity) for deficiency in deficiencies])
+    # (..., 3) x (k, 3, 3) -> (k, ..., 3)
+    simulated = np.einsum('...j,kij->k...i', linear, matrices)
+    return linear_to_srgb(simulated)
+
+
+def relative_luminance(rgb):
+    """WCAG relative luminance of an (..., 3) array of 0-255 sRGB values"""
+    channels = np.asarray(rgb, dtype=np.float64) / 255.0
+    channels = np.where(channels <= 0.03928, channels / 12.92, ((channels + 0.055) / 1.055) ** 2.4)
+    return channels @ np.array([0.2126, 0.7152, 0.0722])
+
+
+def contrast_ratios(foreground, background):
+    """WCAG contrast ratios between matching rows of two (n, 3) RGB arrays"""
+    l1 = relative_luminance(foreground)
+    l2 = relative_luminance(background)
+    return (np.maximum(l1, l2) + 0.05) / (np.minimum(l1, l2) + 0.05)
+
+
+class WCAGAuditCancelled(Exception):
+    """Raised between checks when an audit's cancel event is set"""
+
+
+class WCAGAuditContext:
+    """State of a single WCAG audit.
+    
+    check_wcag_compliance creates one context per call and passes it to every
+    check, so one WCAGCompliantChecker can run audits concurrently.
+    """
+    
+    def __init__(self, driver, url, soup=None, screenshot=None):
+        self.driver = driver
+        self.url = url
+        self.soup = soup
+        # Decoded RGB screenshot shared by all pixel-based checks (captured on first use)
+        self.screenshot = screenshot
+        self.screenshot_error = None
+        # Issues of the static DOM rules, by guideline group (and by subtree hash when cached)
+        self.rule_issues = {}
+        self.unit_issues = {}
+        self.audit_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.compliance_score = 0
+        self.results = {
+            'url': url,
+            'timestamp': datetime.now().isoformat(),
+            'wcag_version': '2.2',  # Updated to include 2.2
+            'compliance_level': 'AAA',  # Will be downgraded based on violations
+            'total_issues': 0,
+            'critical_issues': 0,
+            'compliance_score': 0,  # Initialize compliance score
+            'categories': {
+                'perceivable': {'score': 100, 'issues': []},
+                'operable': {'score': 100, 'issues': []},
+                'understandable': {'score': 100, 'issues': []},
+                'robust': {'score': 100, 'issues': []}
+            },
+            'detailed_analysis': {},
+            'wcag_22_features': {  # New WCAG 2.2 specific checks
+                'target_size_compliant': True,
+                'focus_appearance_score': 100,
+                'dragging_alternative_score': 100
+            }
+        }
 
 
 class WCAGCompliantChecker:
     def __init__(self):
         self.setup_logging()
+        # Results of the most recently completed audit (convenience for single-threaded callers;
+        # concurrent callers should use the value returned by check_wcag_compliance)
         self.wcag_results = {}
-        self.accessibility_issues = []
         self.compliance_score = 0
+        self._last_results_lock = threading.Lock()
         # WCAG 2.2 minimum target sizes (in CSS pixels) - AA standard only
         self.min_target_size = 24  # WCAG 2.2 AA requirement
+        # Static (markup-only) checks, evaluated in a single walk over the parsed page
+        self.rule_engine = DOMRuleEngine()
         
     def setup_logging(self):
         """Setup logging for WCAG checker"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
         self.logger = logging.getLogger(__name__)
     
-    def check_wcag_compliance(self, driver, url, progress_callback=None):
+    def check_wcag_compliance(self, driver, url, progress_callback=None, cache=None, screenshot=None,
+                              cancel_event=None):
         """
         Comprehensive WCAG 2.1 & 2.2 compliance check
         Returns detailed accessibility analysis
+        
+        With a WCAGResultCache, an unchanged page (same normalized DOM, viewport and
+        checker version) returns the cached results without auditing, and a page
+        that changed in some subtrees reruns the static rules for those only.
+        
+        screenshot is an optional RGB array of the page (e.g. from the capture stage);
+        otherwise one screenshot is taken and shared by all pixel-based checks.
+        
+        When cancel_event (a threading.Event) is set, the audit stops before its next
+        group of checks and raises WCAGAuditCancelled.
         """
+        def checkpoint(message=None):
+            if cancel_event is not None and cancel_event.is_set():
+                raise WCAGAuditCancelled(f"WCAG audit of {url} cancelled")
+            if progress_callback and message:
+                progress_callback(message)
+        
         try:
-            if progress_callback:
-                progress_callback("Starting WCAG 2.1/2.2 compliance analysis...")
+            checkpoint("Starting WCAG 2.1/2.2 compliance analysis...")
             
             self.logger.info(f"Starting WCAG compliance check for: {url}")
             
@@ -57,491 +348,325 @@ class WCAGCompliantChecker:
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
             )
             
-            # Get page source for analysis
-            page_source = driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            # Initialize results structure
-            self.wcag_results = {
-                'url': url,
-                'timestamp': datetime.now().isoformat(),
-                'wcag_version': '2.2',  # Updated to include 2.2
-                'compliance_level': 'AAA',  # Will be downgraded based on violations
-                'total_issues': 0,
-                'critical_issues': 0,
-                'compliance_score': 0,  # Initialize compliance score
-                'categories': {
-                    'perceivable': {'score': 100, 'issues': []},
-                    'operable': {'score': 100, 'issues': []},
-                    'understandable': {'score': 100, 'issues': []},
-                    'robust': {'score': 100, 'issues': []}
-                },
-                'detailed_analysis': {},
-                'wcag_22_features': {  # New WCAG 2.2 specific checks
-                    'target_size_compliant': True,
-                    'focus_appearance_score': 100,
-                    'dragging_alternative_score': 100
-                }
-            }
+            parse_start = time.time()
+            soup = self.rule_engine.parse(driver.page_source)
+            parse_ms = (time.time() - parse_start) * 1000
+            
+            cache_entry = None
+            if cache is not None:
+                cache_entry = self._lookup_cache(cache, driver, url, soup)
+                if cache_entry['results'] is not None:
+                    return self._cached_results(cache_entry, url)
+            
+            # Per-audit state; nothing run-specific is stored on the checker itself
+            checkpoint()
+            audit = self._prepare_audit(driver, url, soup, parse_ms, cache_entry, screenshot)
             
             # Principle 1: Perceivable
-            if progress_callback:
-                progress_callback("Checking Principle 1: Perceivable...")
-            self._check_perceivable(driver, soup)
+            checkpoint("Checking Principle 1: Perceivable...")
+            self._check_perceivable(audit)
             
             # Principle 2: Operable (including WCAG 2.2 enhancements)
-            if progress_callback:
-                progress_callback("Checking Principle 2: Operable (including WCAG 2.2)...")
-            self._check_operable(driver, soup)
+            checkpoint("Checking Principle 2: Operable (including WCAG 2.2)...")
+            self._check_operable(audit)
             
             # Principle 3: Understandable
-            if progress_callback:
-                progress_callback("Checking Principle 3: Understandable...")
-            self._check_understandable(driver, soup)
+            checkpoint("Checking Principle 3: Understandable...")
+            self._check_understandable(audit)
             
             # Principle 4: Robust
-            if progress_callback:
-                progress_callback("Checking Principle 4: Robust...")
-            self._check_robust(driver, soup)
+            checkpoint("Checking Principle 4: Robust...")
+            self._check_robust(audit)
             
             # WCAG 2.2 Specific Checks
-            if progress_callback:
-                progress_callback("Running WCAG 2.2 specific checks...")
-            self._check_wcag_22_features(driver, soup)
+            checkpoint("Running WCAG 2.2 specific checks...")
+            self._check_wcag_22_features(audit)
             
             # Enhanced Color Analysis
-            if progress_callback:
-                progress_callback("Performing enhanced color contrast analysis...")
-            self._enhanced_color_analysis(driver, soup)
+            checkpoint("Performing enhanced color contrast analysis...")
+            self._enhanced_color_analysis(audit)
             
             # Calculate overall compliance score
-            if progress_callback:
-                progress_callback("Calculating compliance score...")
-            self._calculate_compliance_score()
+            checkpoint("Calculating compliance score...")
+            self._calculate_compliance_score(audit)
             
             # Generate accessibility heatmap
-            if progress_callback:
-                progress_callback("Generating accessibility heatmap...")
-            self._generate_accessibility_heatmap(driver)
+            checkpoint("Generating accessibility heatmap...")
+            self._generate_accessibility_heatmap(audit)
+            
+            if cache_entry is not None:
+                cache.put(cache_entry['key'], audit.results, cache_entry['page_key'], audit.unit_issues)
             
-            self.logger.info(f"WCAG compliance check completed. Score: {self.compliance_score}%")
-            return self.wcag_results
+            with self._last_results_lock:
+                self.wcag_results = audit.results
+                self.compliance_score = audit.compliance_score
             
+            self.logger.info(f"WCAG compliance check completed. Score: {audit.compliance_score}%")
+            return audit.results
+            
+        except WCAGAuditCancelled:
+            self.logger.info(f"WCAG compliance check cancelled for: {url}")
+            raise
         except Exception as e:
             self.logger.error(f"WCAG compliance check failed: {str(e)}")
             raise
     
-    def _check_perceivable(self, driver, soup):
+    def check_html_compliance(self, html, source):
+        """
+        Offline WCAG check of saved page markup, without a browser.
+        Runs the static rules only; checks needing layout or pixels are listed
+        under 'skipped_checks' instead of being reported as passing or failing.
+        """
+        try:
+            parse_start = time.time()
+            soup = self.rule_engine.parse(html)
+            audit = self._prepare_audit(None, source, soup, (time.time() - parse_start) * 1000)
+            audit.results['mode'] = 'offline'
+            
+            self._check_perceivable(audit)
+            self._check_operable(audit)
+            self._check_understandable(audit)
+            self._check_robust(audit)
+            self._check_wcag_22_features(audit)
+            self._calculate_compliance_score(audit)
+            
+            audit.results['skipped_checks'] = [dict(check) for check in OFFLINE_SKIPPED_CHECKS]
+            return audit.results
+            
+        except Exception as e:
+            self.logger.error(f"Offline WCAG check failed for {source}: {str(e)}")
+            raise
+    
+    def _lookup_cache(self, cache, driver, url, soup):
+        """Fingerprint the page and look up cached results and subtree issues.
+        
+        Full results are only reused when the stylesheets could be read as well;
+        otherwise the page is audited, reusing the static rule issues of unchanged subtrees.
+        """
+        fingerprint = dom_fingerprint(soup)
+        viewport = self._get_viewport(driver)
+        rule_names = [rule.name for rule in self.rule_engine.rules]
+        stylesheets = self._get_stylesheets(driver)
+        key = cache.key(fingerprint['document'], viewport, rule_names, stylesheets) if stylesheets is not None else None
+        page_key = cache.page_key(url, viewport, rule_names)
+        results = cache.get(key) if key is not None else None
+        return {
+            'key': key,
+            'page_key': page_key,
+            'units': fingerprint['units'],
+            'results': results,
+            'cached_units': cache.get_page_units(page_key) if results is None else {}
+        }
+    
+    def _cached_results(self, cache_entry, url):
+        """Results of an identical earlier audit"""
+        results = cache_entry['results']
+        results['cache'] = {'status': 'hit', 'key': cache_entry['key'], 'audited_at': results.get('timestamp')}
+        results['url'] = url
+        with self._last_results_lock:
+            self.wcag_results = results
+            self.compliance_score = results.get('compliance_score', 0)
+        self.logger.info(f"WCAG results for {url} served from cache. Score: {results.get('compliance_score')}%")
+        return results
+    
+    def _get_stylesheets(self, driver):
+        """[href, media, css text] of every stylesheet of the page, or None if they cannot be read"""
+        try:
+            return [list(sheet) for sheet in driver.execute_script(STYLESHEET_SCRIPT)]
+        except Exception as e:
+            self.logger.warning(f"Could not read stylesheets for the WCAG cache key: {e}")
+            return None
+    
+    def _get_viewport(self, driver):
+        """Viewport size in CSS pixels, part of the cache key"""
+        try:
+            return tuple(driver.execute_script("return [window.innerWidth, window.innerHeight];"))
+        except Exception:
+            size = driver.get_window_size()
+            return size['width'], size['height']
+    
+    def _prepare_audit(self, driver, url, soup, parse_ms, cache_entry=None, screenshot=None):
+        """Evaluate all static DOM rules of a parsed page for a new audit"""
+        audit = WCAGAuditContext(driver, url, soup, screenshot)
+        
+        # Static rules for all principles in one pass over the document; with a cache,
+        # subtree issues are computed per top-level subtree and reused when unchanged
+        if cache_entry is not None:
+            rule_run = self.rule_engine.run_partitioned(soup, cache_entry['units'], cache_entry['cached_units'])
+            audit.unit_issues = rule_run['unit_issues']
+            audit.results['cache'] = {
+                'status': 'partial' if rule_run['units_reused'] else 'miss',
+                'key': cache_entry['key'],
+                'units_rechecked': rule_run['units_rechecked'],
+                'units_reused': rule_run['units_reused']
+            }
+        else:
+            rule_run = self.rule_engine.run(soup)
+        audit.rule_issues = rule_run['issues']
+        audit.results['detailed_analysis']['dom_rules'] = {
+            'parser': soup.builder.NAME,
+            'parse_ms': parse_ms,
+            'walk_ms': rule_run['walk_ms'],
+            'elements': rule_run['nodes'],
+            'rule_timings_ms': rule_run['rule_timings_ms']
+        }
+        return audit
+    
+    def _check_perceivable(self, audit):
         """Check Principle 1: Perceivable"""
+        rules = audit.rule_issues
         issues = []
         
         # 1.1 Text Alternatives
-        issues.extend(self._check_text_alternatives(soup))
+        issues.extend(rules['text_alternatives'])
         
         # 1.2 Time-based Media (basic checks)
-        issues.extend(self._check_time_based_media(soup))
+        issues.extend(rules['time_based_media'])
         
         # 1.3 Adaptable
-        issues.extend(self._check_adaptable(soup))
+        issues.extend(rules['adaptable'])
         
         # 1.4 Distinguishable
-        issues.extend(self._check_distinguishable(driver, soup))
+        issues.extend(self._check_distinguishable(audit))
         
-        self.wcag_results['categories']['perceivable']['issues'] = issues
-        self.wcag_results['categories']['perceivable']['score'] = max(0, 100 - len(issues) * 10)
+        audit.results['categories']['perceivable']['issues'] = issues
+        audit.results['categories']['perceivable']['score'] = max(0, 100 - len(issues) * 10)
     
-    def _check_operable(self, driver, soup):
+    def _check_operable(self, audit):
         """Check Principle 2: Operable"""
+        rules = audit.rule_issues
         issues = []
         
         # 2.1 Keyboard Accessible
-        issues.extend(self._check_keyboard_accessible(driver, soup))
+        issues.extend(rules['keyboard_accessible'])
         
         # 2.2 Enough Time
-        issues.extend(self._check_enough_time(soup))
+        issues.extend(rules['enough_time'])
         
         # 2.3 Seizures and Physical Reactions
-        issues.extend(self._check_seizures(soup))
+        issues.extend(rules['seizures'])
         
         # 2.4 Navigable
-        issues.extend(self._check_navigable(soup))
+        issues.extend(rules['navigable'])
         
         # 2.5 Input Modalities
-        issues.extend(self._check_input_modalities(soup))
+        issues.extend(rules['input_modalities'])
         
-        self.wcag_results['categories']['operable']['issues'] = issues
-        self.wcag_results['categories']['operable']['score'] = max(0, 100 - len(issues) * 10)
+        audit.results['categories']['operable']['issues'] = issues
+        audit.results['categories']['operable']['score'] = max(0, 100 - len(issues) * 10)
     
-    def _check_understandable(self, driver, soup):
+    def _check_understandable(self, audit):
         """Check Principle 3: Understandable"""
+        rules = audit.rule_issues
         issues = []
         
         # 3.1 Readable
-        issues.extend(self._check_readable(soup))
+        issues.extend(rules['readable'])
         
         # 3.2 Predictable
-        issues.extend(self._check_predictable(soup))
+        issues.extend(rules['predictable'])
         
         # 3.3 Input Assistance
-        issues.extend(self._check_input_assistance(soup))
+        issues.extend(rules['input_assistance'])
         
-        self.wcag_results['categories']['understandable']['issues'] = issues
-        self.wcag_results['categories']['understandable']['score'] = max(0, 100 - len(issues) * 10)
+        audit.results['categories']['understandable']['issues'] = issues
+        audit.results['categories']['understandable']['score'] = max(0, 100 - len(issues) * 10)
     
-    def _check_robust(self, driver, soup):
+    def _check_robust(self, audit):
         """Check Principle 4: Robust"""
         issues = []
         
         # 4.1 Compatible
-        issues.extend(self._check_compatible(soup))
+        issues.extend(audit.rule_issues['compatible'])
         
-        self.wcag_results['categories']['robust']['issues'] = issues
-        self.wcag_results['categories']['robust']['score'] = max(0, 100 - len(issues) * 10)
+        audit.results['categories']['robust']['issues'] = issues
+        audit.results['categories']['robust']['score'] = max(0, 100 - len(issues) * 10)
     
-    def _check_text_alternatives(self, soup):
-        """1.1 Text Alternatives"""
+    def _check_distinguishable(self, audit):
+        """1.4 Distinguishable"""
         issues = []
         
-        # Check images without alt text
-        images = soup.find_all('img')
-        for img in images:
-            if not img.get('alt') and not img.get('aria-label') and not img.get('aria-labelledby'):
-                if not img.get('role') == 'presentation' and not img.get('aria-hidden') == 'true':
-                    issues.append({
-                        'guideline': '1.1.1',
-                        'level': 'A',
-                        'description': 'Image missing alt text',
-                        'element': str(img)[:100] + '...',
-                        'impact': 'critical'
-                    })
-        
-        # Check input elements without labels
-        inputs = soup.find_all(['input', 'textarea', 'select'])
-        for input_elem in inputs:
-            input_type = input_elem.get('type', '').lower()
-            if input_type not in ['hidden', 'submit', 'button', 'reset']:
-                if not input_elem.get('aria-label') and not input_elem.get('aria-labelledby'):
-                    # Check for associated label
-                    input_id = input_elem.get('id')
-                    if not input_id or not soup.find('label', {'for': input_id}):
-                        issues.append({
-                            'guideline': '1.1.1',
-                            'level': 'A',
-                            'description': 'Form control missing label',
-                            'element': str(input_elem)[:100] + '...',
-                            'impact': 'critical'
-                        })
+        # Check color contrast (basic detection; needs a rendered page)
+        if audit.driver is not None:
+            img_array = self._audit_screenshot(audit)
+            if img_array is not None:
+                self._analyze_color_contrast(img_array, issues)
+        
+        # Check for color-only information
+        issues.extend(audit.rule_issues['distinguishable'])
         
         return issues
     
+    def _run_rule_group(self, soup, group):
+        """Evaluate a single guideline group of the DOM rules on a parsed page"""
+        return self.rule_engine.run(soup, groups=[group])['issues'][group]
+    
+    def _check_text_alternatives(self, soup):
+        """1.1 Text Alternatives"""
+        return self._run_rule_group(soup, 'text_alternatives')
+    
     def _check_time_based_media(self, soup):
         """1.2 Time-based Media"""
-        issues = []
-        
-        # Check for video/audio elements without captions/transcripts
-        media_elements = soup.find_all(['video', 'audio'])
-        for media in media_elements:
-            if not media.find('track'):
-                issues.append({
-                    'guideline': '1.2.1',
-                    'level': 'A',
-                    'description': 'Media element missing captions/transcript',
-                    'element': str(media)[:100] + '...',
-                    'impact': 'major'
-                })
-        
-        return issues
+        return self._run_rule_group(soup, 'time_based_media')
     
     def _check_adaptable(self, soup):
         """1.3 Adaptable"""
-        issues = []
-        
-        # Check heading structure
-        headings = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-        if headings:
-            # Check if page starts with h1
-            first_heading = headings[0]
-            if first_heading.name != 'h1':
-                issues.append({
-                    'guideline': '1.3.1',
-                    'level': 'A',
-                    'description': 'Page should start with h1 heading',
-                    'element': str(first_heading)[:100] + '...',
-                    'impact': 'moderate'
-                })
-            
-            # Check for heading level skipping
-            prev_level = 0
-            for heading in headings:
-                level = int(heading.name[1])
-                if level > prev_level + 1:
-                    issues.append({
-                        'guideline': '1.3.1',
-                        'level': 'A',
-                        'description': f'Heading level skipped: {heading.name} after h{prev_level}',
-                        'element': str(heading)[:100] + '...',
-                        'impact': 'moderate'
-                    })
-                prev_level = level
-        
-        # Check table headers
-        tables = soup.find_all('table')
-        for table in tables:
-            if not table.find('th') and not table.get('role') == 'presentation':
-                issues.append({
-                    'guideline': '1.3.1',
-                    'level': 'A',
-                    'description': 'Data table missing header cells',
-                    'element': str(table)[:100] + '...',
-                    'impact': 'major'
-                })
-        
-        return issues
-    
-    def _check_distinguishable(self, driver, soup):
-        """1.4 Distinguishable"""
-        issues = []
-        
-        # Check color contrast (basic detection)
-        try:
-            # Take screenshot for color analysis
-            screenshot = driver.get_screenshot_as_png()
-            self._analyze_color_contrast(screenshot, issues)
-        except Exception as e:
-            self.logger.warning(f"Color contrast analysis failed: {e}")
-        
-        # Check for color-only information
-        elements_with_color_styles = soup.find_all(style=re.compile(r'color\s*:', re.I))
-        for elem in elements_with_color_styles:
-            if not elem.get_text().strip():
-                issues.append({
-                    'guideline': '1.4.1',
-                    'level': 'A',
-                    'description': 'Information might be conveyed through color only',
-                    'element': str(elem)[:100] + '...',
-                    'impact': 'moderate'
-                })
-        
-        return issues
+        return self._run_rule_group(soup, 'adaptable')
     
-    def _check_keyboard_accessible(self, driver, soup):
+    def _check_keyboard_accessible(self, soup):
         """2.1 Keyboard Accessible"""
-        issues = []
-        
-        # Check for keyboard traps
-        focusable_elements = soup.find_all(['a', 'button', 'input', 'select', 'textarea'])
-        for elem in focusable_elements:
-            if elem.get('tabindex') == '-1' and not elem.get('aria-hidden') == 'true':
-                issues.append({
-                    'guideline': '2.1.1',
-                    'level': 'A',
-                    'description': 'Interactive element not keyboard accessible',
-                    'element': str(elem)[:100] + '...',
-                    'impact': 'critical'
-                })
-        
-        # Check for missing skip links
-        skip_links = soup.find_all('a', href=re.compile(r'^#'))
-        if not skip_links:
-            issues.append({
-                'guideline': '2.4.1',
-                'level': 'A',
-                'description': 'Page missing skip navigation links',
-                'element': 'Page structure',
-                'impact': 'moderate'
-            })
-        
-        return issues
+        return self._run_rule_group(soup, 'keyboard_accessible')
     
     def _check_enough_time(self, soup):
         """2.2 Enough Time"""
-        issues = []
-        
-        # Check for auto-refresh/redirect
-        meta_refresh = soup.find('meta', {'http-equiv': 'refresh'})
-        if meta_refresh:
-            content = meta_refresh.get('content', '')
-            if content and not content.startswith('0;'):
-                issues.append({
-                    'guideline': '2.2.1',
-                    'level': 'A',
-                    'description': 'Page has auto-refresh without user control',
-                    'element': str(meta_refresh),
-                    'impact': 'major'
-                })
-        
-        return issues
+        return self._run_rule_group(soup, 'enough_time')
     
     def _check_seizures(self, soup):
         """2.3 Seizures and Physical Reactions"""
-        issues = []
-        
-        # Check for potentially seizure-inducing elements
-        animations = soup.find_all(style=re.compile(r'animation|transition', re.I))
-        for anim in animations:
-            issues.append({
-                'guideline': '2.3.1',
-                'level': 'A',
-                'description': 'Animation detected - verify it does not flash more than 3 times per second',
-                'element': str(anim)[:100] + '...',
-                'impact': 'critical'
-            })
-        
-        return issues
+        return self._run_rule_group(soup, 'seizures')
     
     def _check_navigable(self, soup):
         """2.4 Navigable"""
-        issues = []
-        
-        # Check page title
-        title = soup.find('title')
-        if not title or not title.get_text().strip():
-            issues.append({
-                'guideline': '2.4.2',
-                'level': 'A',
-                'description': 'Page missing descriptive title',
-                'element': 'Document head',
-                'impact': 'major'
-            })
-        
-        # Check focus order (basic)
-        focusable = soup.find_all(['a', 'button', 'input', 'select', 'textarea'])
-        tabindex_elements = [elem for elem in focusable if elem.get('tabindex')]
-        if tabindex_elements:
-            for elem in tabindex_elements:
-                try:
-                    tabindex = int(elem.get('tabindex', 0))
-                    if tabindex > 0:
-                        issues.append({
-                            'guideline': '2.4.3',
-                            'level': 'A',
-                            'description': 'Positive tabindex may disrupt natural focus order',
-                            'element': str(elem)[:100] + '...',
-                            'impact': 'moderate'
-                        })
-                except ValueError:
-                    pass
-        
-        return issues
+        return self._run_rule_group(soup, 'navigable')
     
     def _check_input_modalities(self, soup):
         """2.5 Input Modalities"""
-        issues = []
-        
-        # Check for click handlers on non-interactive elements
-        elements_with_onclick = soup.find_all(onclick=True)
-        for elem in elements_with_onclick:
-            if elem.name not in ['a', 'button', 'input', 'select', 'textarea']:
-                issues.append({
-                    'guideline': '2.5.1',
-                    'level': 'A',
-                    'description': 'Non-interactive element has click handler',
-                    'element': str(elem)[:100] + '...',
-                    'impact': 'moderate'
-                })
-        
-        return issues
+        return self._run_rule_group(soup, 'input_modalities')
     
     def _check_readable(self, soup):
         """3.1 Readable"""
-        issues = []
-        
-        # Check language declaration
-        html_tag = soup.find('html')
-        if not html_tag or not html_tag.get('lang'):
-            issues.append({
-                'guideline': '3.1.1',
-                'level': 'A',
-                'description': 'Page missing language declaration',
-                'element': 'HTML element',
-                'impact': 'major'
-            })
-        
-        return issues
+        return self._run_rule_group(soup, 'readable')
     
     def _check_predictable(self, soup):
         """3.2 Predictable"""
-        issues = []
-        
-        # Check for form auto-submission
-        forms = soup.find_all('form')
-        for form in forms:
-            if form.get('onchange') or form.get('onsubmit'):
-                issues.append({
-                    'guideline': '3.2.2',
-                    'level': 'A',
-                    'description': 'Form may change context automatically',
-                    'element': str(form)[:100] + '...',
-                    'impact': 'moderate'
-                })
-        
-        return issues
+        return self._run_rule_group(soup, 'predictable')
     
     def _check_input_assistance(self, soup):
         """3.3 Input Assistance"""
-        issues = []
-        
-        # Check required fields
-        required_inputs = soup.find_all(['input', 'textarea', 'select'], required=True)
-        for inp in required_inputs:
-            if not inp.get('aria-required') and not inp.get('aria-invalid'):
-                # Check for visual indicators
-                parent = inp.parent
-                if parent and '*' not in parent.get_text():
-                    issues.append({
-                        'guideline': '3.3.2',
-                        'level': 'A',
-                        'description': 'Required field missing clear indicator',
-                        'element': str(inp)[:100] + '...',
-                        'impact': 'major'
-                    })
-        
-        return issues
+        return self._run_rule_group(soup, 'input_assistance')
     
     def _check_compatible(self, soup):
         """4.1 Compatible"""
-        issues = []
-        
-        # Check for valid HTML (basic)
-        # Check for duplicate IDs
-        ids = []
-        elements_with_ids = soup.find_all(id=True)
-        for elem in elements_with_ids:
-            elem_id = elem.get('id')
-            if elem_id in ids:
-                issues.append({
-                    'guideline': '4.1.1',
-                    'level': 'A',
-                    'description': f'Duplicate ID found: {elem_id}',
-                    'element': str(elem)[:100] + '...',
-                    'impact': 'major'
-                })
-            else:
-                ids.append(elem_id)
-        
-        # Check ARIA usage
-        aria_elements = soup.find_all(attrs={"aria-labelledby": True})
-        for elem in aria_elements:
-            labelledby_id = elem.get('aria-labelledby')
-            if not soup.find(id=labelledby_id):
-                issues.append({
-                    'guideline': '4.1.2',
-                    'level': 'A',
-                    'description': f'aria-labelledby references non-existent ID: {labelledby_id}',
-                    'element': str(elem)[:100] + '...',
-                    'impact': 'major'
-                })
-        
-        return issues
+        return self._run_rule_group(soup, 'compatible')
     
-    def _analyze_color_contrast(self, screenshot_data, issues):
-        """Analyze color contrast from screenshot"""
+    def _audit_screenshot(self, audit):
+        """RGB screenshot of the audited page, captured and decoded once per audit"""
+        if audit.screenshot is None and audit.screenshot_error is None and audit.driver is not None:
+            try:
+                png = np.frombuffer(audit.driver.get_screenshot_as_png(), dtype=np.uint8)
+                image = cv2.imdecode(png, cv2.IMREAD_COLOR)
+                if image is None:
+                    raise ValueError("Screenshot could not be decoded")
+                audit.screenshot = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            except Exception as e:
+                # Do not retry for every pixel-based check
+                audit.screenshot_error = str(e)
+                self.logger.warning(f"Screenshot capture failed: {e}")
+        return audit.screenshot
+    
+    def _analyze_color_contrast(self, img_array, issues):
+        """Analyze color contrast from the RGB screenshot"""
         try:
-            # Convert screenshot to image
-            import io
-            image = Image.open(io.BytesIO(screenshot_data))
-            img_array = np.array(image)
-            
             # Simple contrast analysis (this is a basic implementation)
             # In a production environment, you'd want more sophisticated analysis
             gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
@@ -559,54 +684,179 @@ class WCAGCompliantChecker:
         except Exception as e:
             self.logger.warning(f"Color contrast analysis failed: {e}")
     
-    def _calculate_compliance_score(self):
-        """Calculate overall WCAG compliance score"""
+    def _calculate_compliance_score(self, audit=None):
+        """Calculate overall WCAG compliance score (of the last completed audit when audit is None)"""
+        results = audit.results if audit is not None else self.wcag_results
         total_score = 0
         category_count = 0
         
-        for category, data in self.wcag_results['categories'].items():
+        for category, data in results['categories'].items():
             total_score += data['score']
             category_count += 1
             
             # Count critical issues
             critical_count = sum(1 for issue in data['issues'] if issue.get('impact') == 'critical')
-            self.wcag_results['critical_issues'] += critical_count
-            self.wcag_results['total_issues'] += len(data['issues'])
+            results['critical_issues'] += critical_count
+            results['total_issues'] += len(data['issues'])
         
-        self.compliance_score = total_score / category_count if category_count > 0 else 0
-        self.wcag_results['compliance_score'] = self.compliance_score
+        compliance_score = total_score / category_count if category_count > 0 else 0
+        results['compliance_score'] = compliance_score
+        if audit is not None:
+            audit.compliance_score = compliance_score
+        else:
+            self.compliance_score = compliance_score
         
         # Determine compliance level - Only AA standard analysis
-        if self.compliance_score >= 85:
-            self.wcag_results['compliance_level'] = 'AA'
+        if compliance_score >= 85:
+            results['compliance_level'] = 'AA'
         else:
-            self.wcag_results['compliance_level'] = 'Non-compliant'
+            results['compliance_level'] = 'Non-compliant'
     
-    def _generate_accessibility_heatmap(self, driver):
-        """Generate visual heatmap of accessibility issues"""
+    def _generate_accessibility_heatmap(self, audit):
+        """Generate visual heatmap of accessibility issues.
+        
+        Issues without a rect are located through their XPath in one script call,
+        then all issue rects are blended onto the audit screenshot in one pass,
+        colored by impact.
+        """
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            viz_dir = os.path.join("visualizations", timestamp)
+            start = time.time()
+            viz_dir = os.path.join("visualizations", audit.audit_id)
             os.makedirs(viz_dir, exist_ok=True)
             
-            # Take screenshot
-            screenshot = driver.get_screenshot_as_png()
+            # Shared audit screenshot
+            img_array = self._audit_screenshot(audit)
+            if img_array is None:
+                return
+            
+            issues = [issue for data in audit.results['categories'].values() for issue in data['issues']]
+            viewport_width = self._resolve_issue_rects(audit, issues)
+            scale = img_array.shape[1] / viewport_width if viewport_width else 1.0
+            
+            rects, impacts = [], []
+            for issue in issues:
+                for rect in issue.get('occurrence_rects') or ([issue['rect']] if issue.get('rect') else []):
+                    rects.append(rect)
+                    impacts.append(issue.get('impact'))
+            overlay = self._render_issue_overlay(img_array, np.array(rects, dtype=np.float64).reshape(-1, 4) * scale,
+                                                 impacts)
             
             # Save accessibility heatmap
             heatmap_path = os.path.join(viz_dir, "accessibility_heatmap.png")
+            cv2.imwrite(heatmap_path, cv2.cvtColor(overlay, cv2.COLOR_RGB2BGR))
             
-            # For now, save the screenshot (in production, overlay issue markers)
-            with open(heatmap_path, 'wb') as f:
-                f.write(screenshot)
-            
-            self.wcag_results['accessibility_heatmap'] = heatmap_path
+            audit.results['accessibility_heatmap'] = heatmap_path
+            audit.results['detailed_analysis']['heatmap'] = {
+                'issues': len(issues),
+                'located_issues': sum(1 for issue in issues if issue.get('rect')),
+                'markers': len(rects),
+                'scale': scale,
+                'duration_ms': (time.time() - start) * 1000
+            }
             
         except Exception as e:
             self.logger.error(f"Failed to generate accessibility heatmap: {e}")
     
-    def generate_wcag_report(self, output_path):
-        """Generate detailed WCAG compliance report"""
+    def _resolve_issue_rects(self, audit, issues):
+        """Set 'rect' on element issues located only by XPath, with one script call.
+        
+        Returns the viewport width in CSS pixels (None if the call failed).
+        """
+        locators = list(dict.fromkeys(issue['locator'] for issue in issues
+                                      if not issue.get('rect') and issue.get('locator')
+                                      and issue['locator'] not in PAGE_LEVEL_LOCATORS))
         try:
+            viewport_width, rects = audit.driver.execute_script(ISSUE_RECT_SCRIPT, locators)
+            by_locator = dict(zip(locators, rects or []))
+        except Exception as e:
+            self.logger.warning(f"Could not resolve issue locations: {e}")
+            return None
+        
+        for issue in issues:
+            rect = by_locator.get(issue.get('locator')) if not issue.get('rect') else None
+            if rect:
+                issue['rect'] = [float(v) for v in rect]
+        return viewport_width
+    
+    def _render_issue_overlay(self, img_array, rects, impacts, opacity=0.35):
+        """Blend issue rects (image pixels, x/y/w/h) onto a copy of an RGB image.
+        
+        Coverage per impact level is rasterized with a 2D difference array (four
+        scattered corner updates per rect and two cumulative sums), so the cost
+        does not depend on how many rects overlap. Each pixel takes the color of the
+        most severe issue covering it; opacity grows with the number of issues and
+        region borders are drawn almost opaque. Only the bounding box of the issues
+        is blended, OVERLAY_BAND_ROWS rows at a time, so the working buffers stay
+        small on full-page captures.
+        """
+        overlay = img_array[:, :, :3].copy()
+        height, width = overlay.shape[:2]
+        if len(rects) == 0:
+            return overlay
+        
+        x0 = np.clip(np.floor(rects[:, 0]), 0, width).astype(np.intp)
+        y0 = np.clip(np.floor(rects[:, 1]), 0, height).astype(np.intp)
+        x1 = np.clip(np.ceil(rects[:, 0] + rects[:, 2]), 0, width).astype(np.intp)
+        y1 = np.clip(np.ceil(rects[:, 1] + rects[:, 3]), 0, height).astype(np.intp)
+        levels = np.array([IMPACT_LEVELS.index(impact) if impact in IMPACT_LEVELS else 0 for impact in impacts])
+        visible = (x1 > x0) & (y1 > y0)
+        if not visible.any():
+            return overlay
+        x0, y0, x1, y1, levels = x0[visible], y0[visible], x1[visible], y1[visible], levels[visible]
+        
+        # Bounding box of the issues, with one pixel of margin for the border test
+        left, right = max(int(x0.min()) - 1, 0), min(int(x1.max()) + 1, width)
+        top, bottom = max(int(y0.min()) - 1, 0), min(int(y1.max()) + 1, height)
+        
+        # Opacity by overlap count (lookup table), near-opaque on region borders
+        alpha_lut = (1.0 - (1.0 - opacity) ** np.arange(5)).astype(np.float32)
+        palette = np.vstack([np.zeros((1, 3), np.float32), IMPACT_COLORS])
+        for band_top in range(top, bottom, OVERLAY_BAND_ROWS):
+            band_bottom = min(band_top + OVERLAY_BAND_ROWS, bottom)
+            # One row of context on either side, so borders at band edges match the full image
+            context_top, context_bottom = max(band_top - 1, 0), min(band_bottom + 1, height)
+            level_map, count = self._rasterize_issue_band(
+                x0 - left, np.clip(y0 - context_top, 0, context_bottom - context_top),
+                x1 - left, np.clip(y1 - context_top, 0, context_bottom - context_top),
+                levels, context_bottom - context_top, right - left)
+            border = (cv2.morphologyEx(level_map, cv2.MORPH_GRADIENT, np.ones((3, 3), np.uint8)) > 0) & (level_map > 0)
+            
+            rows = slice(band_top - context_top, band_bottom - context_top)
+            alpha = alpha_lut[np.minimum(count[rows], 4)]
+            alpha[border[rows]] = 0.9
+            region = overlay[band_top:band_bottom, left:right]
+            blended = region + (palette[level_map[rows]] - region) * alpha[:, :, None]
+            region[:] = np.rint(blended, out=blended)
+        return overlay
+    
+    def _rasterize_issue_band(self, x0, y0, x1, y1, levels, height, width):
+        """Per-pixel most severe level (0: no issue, else level + 1) and issue count of one band"""
+        level_map = np.zeros((height, width), dtype=np.uint8)
+        count = np.zeros((height, width), dtype=np.int32)
+        inside = (y1 > y0)
+        for level in np.unique(levels[inside]):
+            selected = inside & (levels == level)
+            coverage = np.zeros((height + 1, width + 1), dtype=np.int32)
+            for ys, xs, sign in ((y0, x0, 1), (y0, x1, -1), (y1, x0, -1), (y1, x1, 1)):
+                np.add.at(coverage, (ys[selected], xs[selected]), sign)
+            np.cumsum(coverage, axis=0, out=coverage)
+            np.cumsum(coverage, axis=1, out=coverage)
+            coverage = coverage[:height, :width]
+            level_map[coverage > 0] = level + 1
+            count += coverage
+        return level_map, count
+    
+    def generate_wcag_report(self, output_path, wcag_results=None):
+        """Generate detailed WCAG compliance report.
+        
+        wcag_results is the dict returned by check_wcag_compliance; it defaults to
+        the most recently completed audit.
+        """
+        try:
+            if wcag_results is None:
+                with self._last_results_lock:
+                    wcag_results = self.wcag_results
+            
             report_data = {
                 'metadata': {
                     'generated_at': datetime.now().isoformat(),
@@ -614,19 +864,18 @@ class WCAGCompliantChecker:
                     'wcag_version': '2.1',
                     'generator': 'Visual AI Regression Module - WCAG Checker'
                 },
-                'wcag_analysis': self.wcag_results,
-                'recommendations': self._generate_recommendations(),
+                'wcag_analysis': wcag_results,
+                'recommendations': self._generate_recommendations(wcag_results),
                 'summary': {
-                    'compliance_score': self.compliance_score,
-                    'compliance_level': self.wcag_results.get('compliance_level', 'Unknown'),
-                    'total_issues': self.wcag_results.get('total_issues', 0),
-                    'critical_issues': self.wcag_results.get('critical_issues', 0),
-                    'needs_immediate_attention': self.wcag_results.get('critical_issues', 0) > 0
+                    'compliance_score': wcag_results.get('compliance_score', 0),
+                    'compliance_level': wcag_results.get('compliance_level', 'Unknown'),
+                    'total_issues': wcag_results.get('total_issues', 0),
+                    'critical_issues': wcag_results.get('critical_issues', 0),
+                    'needs_immediate_attention': wcag_results.get('critical_issues', 0) > 0
                 }
             }
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(report_data, f, indent=2, default=str)
+            ReportSerializer().dump(report_data, output_path)
             
             self.logger.info(f"WCAG report saved to: {output_path}")
             return output_path
@@ -635,25 +884,26 @@ class WCAGCompliantChecker:
             self.logger.error(f"Failed to generate WCAG report: {e}")
             raise
     
-    def _generate_recommendations(self):
+    def _generate_recommendations(self, wcag_results):
         """Generate accessibility improvement recommendations"""
         recommendations = []
+        compliance_score = wcag_results.get('compliance_score', 0)
         
-        if self.wcag_results.get('critical_issues', 0) > 0:
+        if wcag_results.get('critical_issues', 0) > 0:
             recommendations.append({
                 'priority': 'Critical',
                 'action': 'Address all critical accessibility issues immediately',
                 'impact': 'High - Prevents users with disabilities from accessing content'
             })
         
-        if self.compliance_score < 70:
+        if compliance_score < 70:
             recommendations.append({
                 'priority': 'High',
                 'action': 'Implement comprehensive accessibility audit and remediation',
                 'impact': 'High - Current compliance level may violate accessibility laws'
             })
         
-        if self.compliance_score < 85:
+        if compliance_score < 85:
             recommendations.append({
                 'priority': 'Medium',
                 'action': 'Focus on achieving WCAG AA compliance',
@@ -661,7 +911,7 @@ class WCAGCompliantChecker:
             })
         
         # Category-specific recommendations
-        for category, data in self.wcag_results.get('categories', {}).items():
+        for category, data in wcag_results.get('categories', {}).items():
             if data['score'] < 80:
                 recommendations.append({
                     'priority': 'Medium',
@@ -671,246 +921,275 @@ class WCAGCompliantChecker:
         
         return recommendations
     
-    def _check_wcag_22_features(self, driver, soup):
+    def _check_wcag_22_features(self, audit):
         """Check WCAG 2.2 specific requirements"""
+        rules = audit.rule_issues
         issues = []
         
-        # 2.5.8 Target Size (Minimum) - WCAG 2.2 AA
-        target_size_issues = self._check_target_size(driver, soup)
-        issues.extend(target_size_issues)
+        # 2.5.8 Target Size (Minimum) - WCAG 2.2 AA (needs layout)
+        target_size_issues = self._check_target_size(audit) if audit.driver is not None else None
+        issues.extend(target_size_issues or [])
         
         # 3.2.6 Consistent Help - WCAG 2.2 A
-        help_consistency_issues = self._check_consistent_help(soup)
+        help_consistency_issues = rules['consistent_help']
         issues.extend(help_consistency_issues)
         
         # 3.3.7 Redundant Entry - WCAG 2.2 A
-        redundant_entry_issues = self._check_redundant_entry(soup)
+        redundant_entry_issues = rules['redundant_entry']
         issues.extend(redundant_entry_issues)
         
         # 3.3.8 Accessible Authentication (Minimum) - WCAG 2.2 AA
-        auth_issues = self._check_accessible_authentication(soup)
+        auth_issues = rules['accessible_authentication']
         issues.extend(auth_issues)
         
         # Update WCAG 2.2 compliance flags
-        self.wcag_results['wcag_22_features']['target_size_compliant'] = len(target_size_issues) == 0
+        audit.results['wcag_22_features']['target_size_compliant'] = \
+            len(target_size_issues) == 0 if target_size_issues is not None else None
         
         # Add to operable category (most 2.2 features are operable)
-        self.wcag_results['categories']['operable']['issues'].extend(issues)
+        audit.results['categories']['operable']['issues'].extend(issues)
+        
+    def _check_target_size(self, audit):
+        """Check WCAG 2.2 Target Size (Minimum) for all clickable targets.
         
-    def _check_target_size(self, driver, soup):
-        """Check WCAG 2.2 Target Size requirements"""
+        Target rects are collected with one script call. An undersized target passes
+        when a 24px circle centered on it intersects neither another target nor the
+        circle of another undersized target (the 2.5.8 spacing exception).
+        """
         issues = []
         
         try:
-            # Get all clickable elements
-            clickable_elements = driver.find_elements(By.CSS_SELECTOR, 
-                "a, button, input[type='button'], input[type='submit'], input[type='reset'], "
-                "[role='button'], [tabindex], [onclick]")
-            
-            for element in clickable_elements:
-                try:
-                    size = element.size
-                    width, height = size['width'], size['height']
-                    
-                    # Check minimum target size (24x24 CSS pixels for AA)
-                    if width < self.min_target_size or height < self.min_target_size:
-                        # Check if element has sufficient spacing
-                        location = element.location
-                        if not self._has_sufficient_spacing(driver, element, location):
-                            issues.append({
-                                'guideline': '2.5.8',
-                                'level': 'AA',
-                                'description': f'Target size too small: {width}x{height}px (minimum: {self.min_target_size}x{self.min_target_size}px)',
-                                'element': element.tag_name,
-                                'impact': 'major'
-                            })
-                except Exception:
-                    continue
+            start = time.time()
+            rows = audit.driver.execute_script(TARGET_RECT_SCRIPT, CLICKABLE_SELECTOR, TARGET_SELECTOR) or []
+            rects = np.array([row[2:6] for row in rows], dtype=np.float64).reshape(-1, 4)
+            inline = np.array([bool(row[6]) for row in rows], dtype=bool)
+            
+            undersized = ((rects[:, 2] < self.min_target_size) | (rects[:, 3] < self.min_target_size)) & ~inline
+            crowded = self._find_crowded_targets(rects, undersized)
+            
+            for index in crowded:
+                tag, label = rows[index][0], rows[index][1]
+                width, height = rects[index, 2], rects[index, 3]
+                issues.append({
+                    'guideline': '2.5.8',
+                    'level': 'AA',
+                    'description': f'Target size too small: {width:.0f}x{height:.0f}px (minimum: {self.min_target_size}x{self.min_target_size}px) '
+                                   f'without sufficient spacing',
+                    'element': f"{tag}: {label}" if label else tag,
+                    'impact': 'major',
+                    'locator': rows[index][7] if len(rows[index]) > 7 else None,
+                    'rect': [float(v) for v in rects[index]]
+                })
+            
+            audit.results['detailed_analysis']['target_size'] = {
+                'targets_checked': len(rows),
+                'undersized_targets': int(undersized.sum()),
+                'insufficient_spacing': len(crowded),
+                'duration_ms': (time.time() - start) * 1000
+            }
                     
         except Exception as e:
             self.logger.warning(f"Target size check failed: {e}")
             
         return issues
     
-    def _has_sufficient_spacing(self, driver, element, location):
-        """Check if element has sufficient spacing around it"""
-        try:
-            # Simple spacing check - look for nearby clickable elements
-            nearby_elements = driver.find_elements(By.CSS_SELECTOR, 
-                "a, button, input[type='button'], input[type='submit'], input[type='reset']")
+    def _find_crowded_targets(self, rects, undersized):
+        """Indices of undersized targets failing the 2.5.8 spacing test.
+        
+        rects is an (n, 4) array of x, y, width, height. Targets are bucketed into a
+        grid of circle-diameter cells so each circle is only tested against targets
+        in the cells it covers.
+        """
+        radius = self.min_target_size / 2.0
+        cell = float(self.min_target_size)
+        centers = rects[:, :2] + rects[:, 2:] / 2.0
+        
+        grid = {}
+        first_cells = np.floor(rects[:, :2] / cell).astype(int)
+        last_cells = np.floor((rects[:, :2] + rects[:, 2:]) / cell).astype(int)
+        for index in range(len(rects)):
+            for gx in range(first_cells[index, 0], last_cells[index, 0] + 1):
+                for gy in range(first_cells[index, 1], last_cells[index, 1] + 1):
+                    grid.setdefault((gx, gy), []).append(index)
+        
+        crowded = []
+        for index in np.flatnonzero(undersized):
+            # Undersized neighbours have circles of their own, so look one circle further
+            reach = 2 * radius
+            low = np.floor((centers[index] - reach) / cell).astype(int)
+            high = np.floor((centers[index] + reach) / cell).astype(int)
+            candidates = {other
+                          for gx in range(low[0], high[0] + 1)
+                          for gy in range(low[1], high[1] + 1)
+                          for other in grid.get((gx, gy), ())}
+            candidates.discard(index)
+            if not candidates:
+                continue
             
-            for nearby in nearby_elements:
-                if nearby == element:
-                    continue
-                
-                nearby_location = nearby.location
-                distance = abs(location['x'] - nearby_location['x']) + abs(location['y'] - nearby_location['y'])
-                
-                if distance < self.min_target_size:
-                    return False
-                    
-            return True
-        except Exception:
-            return True  # Assume sufficient spacing if check fails
+            candidates = np.fromiter(candidates, dtype=int)
+            x, y, w, h = rects[candidates].T
+            # Distance from this circle's center to each candidate rect
+            dx = np.maximum(np.maximum(x - centers[index, 0], 0), centers[index, 0] - (x + w))
+            dy = np.maximum(np.maximum(y - centers[index, 1], 0), centers[index, 1] - (y + h))
+            hits_target = np.hypot(dx, dy) < radius
+            hits_circle = undersized[candidates] & \
+                (np.hypot(*(centers[candidates] - centers[index]).T) < 2 * radius)
+            if np.any(hits_target | hits_circle):
+                crowded.append(int(index))
+        
+        return crowded
     
     def _check_consistent_help(self, soup):
         """Check WCAG 2.2 Consistent Help requirements"""
-        issues = []
-        
-        # Look for help-related elements
-        help_elements = soup.find_all(['a', 'button'], string=re.compile(r'help|support|contact|faq', re.I))
-        help_links = soup.find_all('a', href=re.compile(r'help|support|contact|faq', re.I))
-        
-        # Basic check - if help is provided, it should be consistent
-        if help_elements or help_links:
-            # This is a simplified check - in practice, you'd need to check across multiple pages
-            help_positions = set()
-            for elem in help_elements + help_links:
-                # Get relative position (simplified)
-                parent = elem.parent
-                if parent:
-                    siblings = parent.find_all()
-                    position = siblings.index(elem) if elem in siblings else 0
-                    help_positions.add(position)
-            
-            if len(help_positions) > 2:  # Too much variation in help placement
-                issues.append({
-                    'guideline': '3.2.6',
-                    'level': 'A',
-                    'description': 'Help placement may not be consistent across pages',
-                    'element': 'Help elements',
-                    'impact': 'moderate'
-                })
-        
-        return issues
+        return self._run_rule_group(soup, 'consistent_help')
     
     def _check_redundant_entry(self, soup):
         """Check WCAG 2.2 Redundant Entry requirements"""
-        issues = []
-        
-        # Look for forms that might require redundant information
-        forms = soup.find_all('form')
-        for form in forms:
-            inputs = form.find_all(['input', 'textarea', 'select'])
-            input_types = [inp.get('type', 'text').lower() for inp in inputs]
-            
-            # Check for password confirmation fields without autocomplete
-            password_fields = [inp for inp in inputs if inp.get('type') == 'password']
-            if len(password_fields) > 1:
-                for pwd_field in password_fields:
-                    if not pwd_field.get('autocomplete'):
-                        issues.append({
-                            'guideline': '3.3.7',
-                            'level': 'A',
-                            'description': 'Password field may require redundant entry - consider autocomplete',
-                            'element': str(pwd_field)[:100] + '...',
-                            'impact': 'moderate'
-                        })
-        
-        return issues
+        return self._run_rule_group(soup, 'redundant_entry')
     
     def _check_accessible_authentication(self, soup):
         """Check WCAG 2.2 Accessible Authentication requirements"""
-        issues = []
-        
-        # Look for authentication forms
-        auth_forms = soup.find_all('form')
-        for form in auth_forms:
-            inputs = form.find_all('input')
-            has_password = any(inp.get('type') == 'password' for inp in inputs)
-            
-            if has_password:
-                # Check for cognitive barriers
-                has_captcha = any('captcha' in str(inp).lower() for inp in inputs)
-                has_security_questions = any('security' in str(inp).lower() for inp in inputs)
-                
-                if has_captcha:
-                    # Check if alternative is provided
-                    alt_methods = form.find_all(string=re.compile(r'audio|alternative|accessibility', re.I))
-                    if not alt_methods:
-                        issues.append({
-                            'guideline': '3.3.8',
-                            'level': 'AA',
-                            'description': 'CAPTCHA without accessible alternative detected',
-                            'element': 'Authentication form',
-                            'impact': 'critical'
-                        })
-                
-                if has_security_questions:
-                    issues.append({
-                        'guideline': '3.3.8',
-                        'level': 'AA',
-                        'description': 'Security questions may create cognitive barriers',
-                        'element': 'Authentication form',
-                        'impact': 'major'
-                    })
-        
-        return issues
+        return self._run_rule_group(soup, 'accessible_authentication')
     
-    def _enhanced_color_analysis(self, driver, soup):
+    def _enhanced_color_analysis(self, audit):
         """Enhanced color contrast analysis with WCAG 2.2 considerations"""
+        driver = audit.driver
         try:
-            # Take screenshot for color analysis
-            screenshot = driver.get_screenshot_as_png()
-            img = Image.open(io.BytesIO(screenshot))
-            img_array = np.array(img)
+            # Shared audit screenshot (None when it could not be taken)
+            img_array = self._audit_screenshot(audit)
+            
+            # Text styles of the whole page, shared by the contrast and color vision checks
+            try:
+                styles = self._harvest_text_styles(driver)
+            except Exception as e:
+                self.logger.warning(f"Text style harvest failed: {e}")
+                return
             
             # Analyze color contrast ratios
-            contrast_issues = self._analyze_color_contrast_enhanced(img_array, driver)
+            contrast_issues = self._analyze_color_contrast_enhanced(audit, styles)
             
             # Add to perceivable category
-            self.wcag_results['categories']['perceivable']['issues'].extend(contrast_issues)
+            audit.results['categories']['perceivable']['issues'].extend(contrast_issues)
             
             # Color blindness simulation
-            colorblind_issues = self._check_colorblind_accessibility(img_array)
-            self.wcag_results['categories']['perceivable']['issues'].extend(colorblind_issues)
+            colorblind_issues = self._check_colorblind_accessibility(img_array, styles, audit)
+            audit.results['categories']['perceivable']['issues'].extend(colorblind_issues)
             
         except Exception as e:
             self.logger.warning(f"Enhanced color analysis failed: {e}")
     
-    def _analyze_color_contrast_enhanced(self, img_array, driver):
-        """Analyze color contrast ratios using image analysis"""
+    def _harvest_text_styles(self, driver):
+        """Collect the text styles of every visible text element with a single script call.
+        
+        Returns a columnar table (dict of arrays) with tag, text, locator (XPath),
+        color (n, 4 RGBA), background (n, 3), font_size, font_weight, rect (n, 4 page
+        x/y/w/h) and background_image (bool: an image lies behind the text).
+        """
+        rows = driver.execute_script(TEXT_STYLE_HARVEST_SCRIPT) or []
+        values = np.array([row[2:16] for row in rows], dtype=np.float64).reshape(-1, 14)
+        return {
+            'tag': [row[0] for row in rows],
+            'text': [row[1] for row in rows],
+            'locator': [row[16] if len(row) > 16 else None for row in rows],
+            'color': values[:, 0:4],
+            'background': values[:, 4:7],
+            'font_size': values[:, 7],
+            'font_weight': values[:, 8],
+            'rect': values[:, 9:13],
+            'background_image': values[:, 13] > 0
+        }
+    
+    def _text_contrast(self, styles):
+        """Composited text colors, contrast ratios and large-text flags of harvested styles"""
+        # Semi-transparent text is blended over its background
+        alpha = styles['color'][:, 3:4]
+        foreground = styles['color'][:, :3] * alpha + styles['background'] * (1 - alpha)
+        ratios = contrast_ratios(foreground, styles['background'])
+        large = (styles['font_size'] >= LARGE_TEXT_SIZE_PX) | \
+            ((styles['font_size'] >= LARGE_BOLD_TEXT_SIZE_PX) & (styles['font_weight'] >= 700))
+        return foreground, ratios, large
+    
+    def _analyze_color_contrast_enhanced(self, audit, styles=None):
+        """Check 1.4.3 (AA) and 1.4.6 (AAA) contrast for every visible text element.
+        
+        Styles come from one harvest script call; ratios and thresholds are computed
+        for all elements at once. Failures are grouped by color pair and text size,
+        with the number of affected elements in 'occurrences'.
+        """
         issues = []
         
         try:
-            # Get text elements and their colors
-            text_elements = driver.find_elements(By.CSS_SELECTOR, "p, h1, h2, h3, h4, h5, h6, span, div, a, button")
-            
-            for element in text_elements[:10]:  # Limit for performance
-                try:
-                    # Get element colors
-                    color = element.value_of_css_property('color')
-                    background_color = element.value_of_css_property('background-color')
-                    
-                    if color and background_color:
-                        contrast_ratio = self._calculate_contrast_ratio(color, background_color)
-                        
-                        # Check against WCAG requirements
-                        if contrast_ratio < 4.5:  # AA requirement for normal text
-                            issues.append({
-                                'guideline': '1.4.3',
-                                'level': 'AA',
-                                'description': f'Low color contrast ratio: {contrast_ratio:.2f}:1 (minimum: 4.5:1)',
-                                'element': element.tag_name,
-                                'impact': 'major'
-                            })
-                        elif contrast_ratio < 7.0:  # AAA requirement
-                            issues.append({
-                                'guideline': '1.4.6',
-                                'level': 'AAA',
-                                'description': f'Color contrast below AAA standard: {contrast_ratio:.2f}:1 (recommended: 7:1)',
-                                'element': element.tag_name,
-                                'impact': 'moderate'
-                            })
-                            
-                except Exception:
-                    continue
+            start = time.time()
+            if styles is None:
+                styles = self._harvest_text_styles(audit.driver)
+            
+            foreground, ratios, large = self._text_contrast(styles)
+            aa_minimum = np.where(large, 3.0, 4.5)
+            aaa_minimum = np.where(large, 4.5, 7.0)
+            
+            # Text over background images cannot be judged from computed styles
+            checkable = ~styles['background_image']
+            aa_failures = checkable & (ratios < aa_minimum)
+            aaa_failures = checkable & ~aa_failures & (ratios < aaa_minimum)
+            
+            issues.extend(self._group_contrast_failures(
+                styles, ratios, foreground, large, aa_failures, aa_minimum,
+                guideline='1.4.3', level='AA', impact='major',
+                description='Low color contrast ratio: {ratio:.2f}:1 (minimum: {minimum:g}:1)'))
+            issues.extend(self._group_contrast_failures(
+                styles, ratios, foreground, large, aaa_failures, aaa_minimum,
+                guideline='1.4.6', level='AAA', impact='moderate',
+                description='Color contrast below AAA standard: {ratio:.2f}:1 (recommended: {minimum:g}:1)'))
+            
+            audit.results['detailed_analysis']['color_contrast'] = {
+                'elements_checked': int(checkable.sum()),
+                'elements_over_background_image': int((~checkable).sum()),
+                'aa_failures': int(aa_failures.sum()),
+                'aaa_failures': int(aaa_failures.sum()),
+                'min_contrast_ratio': float(ratios[checkable].min()) if checkable.any() else None,
+                'duration_ms': (time.time() - start) * 1000
+            }
+            self.logger.info(f"Contrast checked for {int(checkable.sum())} text elements: "
+                             f"{int(aa_failures.sum())} AA and {int(aaa_failures.sum())} AAA failures")
                     
         except Exception as e:
             self.logger.warning(f"Color contrast analysis failed: {e}")
             
         return issues
     
+    def _group_contrast_failures(self, styles, ratios, foreground, large, failures, minimum,
+                                 guideline, level, impact, description):
+        """Build one issue per failing color pair and text size"""
+        issues = []
+        indices = np.flatnonzero(failures)
+        if len(indices) == 0:
+            return issues
+        
+        keys = np.column_stack([np.round(foreground[indices]), np.round(styles['background'][indices]),
+                                large[indices]])
+        _, first, inverse, counts = np.unique(keys, axis=0, return_index=True,
+                                              return_inverse=True, return_counts=True)
+        
+        for group in np.argsort(first):
+            members = indices[inverse.ravel() == group]
+            example = members[0]
+            issue_description = description.format(ratio=ratios[example], minimum=minimum[example])
+            if counts[group] > 1:
+                issue_description += f" on {counts[group]} elements"
+            issues.append({
+                'guideline': guideline,
+                'level': level,
+                'description': issue_description,
+                'element': f"{styles['tag'][example]}: {styles['text'][example]}",
+                'impact': impact,
+                'locator': styles['locator'][example],
+                'contrast_ratio': float(ratios[example]),
+                'occurrences': int(counts[group]),
+                'rect': [float(v) for v in styles['rect'][example]],
+                'occurrence_rects': np.round(styles['rect'][members]).astype(int).tolist()
+            })
+        return issues
+    
     def _calculate_contrast_ratio(self, color1, color2):
         """Calculate WCAG color contrast ratio"""
         try:
@@ -941,55 +1220,131 @@ class WCAGCompliantChecker:
         except Exception:
             return 4.5  # Return passing ratio if calculation fails
     
-    def _check_colorblind_accessibility(self, img_array):
-        """Check accessibility for color-blind users"""
+    def _check_colorblind_accessibility(self, img_array, styles=None, audit=None, severity=1.0):
+        """Check 1.4.1 for users with color vision deficiencies.
+        
+        Text elements whose contrast meets the AA minimum for normal vision but
+        falls below it under protanopia, deuteranopia or tritanopia simulation are
+        reported, one issue per deficiency. Contrast is computed from the harvested
+        text and background colors; for text over background images it is measured
+        in the element's rect on a downscaled, simulated proxy of the screenshot.
+        """
         issues = []
         
         try:
-            # Simulate different types of color blindness
-            colorblind_simulations = ['protanopia', 'deuteranopia', 'tritanopia']
+            start = time.time()
+            if styles is None or len(styles['text']) == 0:
+                return issues
+            deficiencies = list(CVD_MATRICES)
             
-            for simulation in colorblind_simulations:
-                simulated_img = self._simulate_colorblindness(img_array, simulation)
-                
-                # Check if important information is still distinguishable
-                # This is a simplified check - in practice, you'd analyze specific UI elements
-                original_contrast = self._calculate_image_contrast(img_array)
-                simulated_contrast = self._calculate_image_contrast(simulated_img)
-                
-                contrast_loss = (original_contrast - simulated_contrast) / original_contrast
+            foreground, ratios, large = self._text_contrast(styles)
+            aa_minimum = np.where(large, 3.0, 4.5)
+            
+            # Simulated text and background colors for all elements and deficiencies at once
+            simulated_fg = simulate_cvd(foreground, deficiencies, severity)
+            simulated_bg = simulate_cvd(styles['background'], deficiencies, severity)
+            simulated_ratios = np.stack([contrast_ratios(fg, bg) for fg, bg in zip(simulated_fg, simulated_bg)])
+            
+            # Text over background images: measure pixels inside the element rects
+            over_image = np.flatnonzero(styles['background_image'])
+            proxy_shape = None
+            if len(over_image):
+                ratios[over_image] = np.nan
+                simulated_ratios[:, over_image] = np.nan
+                if img_array is not None:
+                    proxy, scale = self._colorblind_proxy(img_array, audit.driver if audit else None)
+                    proxy_shape = list(proxy.shape[:2])
+                    pixel_ratios = self._rect_contrast_ratios(proxy, styles['rect'][over_image] * scale,
+                                                              deficiencies, severity)
+                    ratios[over_image] = pixel_ratios[0]
+                    simulated_ratios[:, over_image] = pixel_ratios[1:]
+            
+            measured = ~np.isnan(ratios)
+            passes = measured & (np.nan_to_num(ratios) >= aa_minimum)
+            summary = {}
+            for index, deficiency in enumerate(deficiencies):
+                loss = np.where(measured, 1.0 - simulated_ratios[index] / np.where(measured, ratios, 1.0), 0.0)
+                affected = np.flatnonzero(passes & (np.nan_to_num(simulated_ratios[index]) < aa_minimum))
+                summary[deficiency] = {
+                    'elements_affected': len(affected),
+                    'max_contrast_loss': float(loss.max(initial=0.0))
+                }
+                if len(affected) == 0:
+                    continue
                 
-                if contrast_loss > 0.3:  # More than 30% contrast loss
-                    issues.append({
-                        'guideline': '1.4.1',
-                        'level': 'A',
-                        'description': f'Significant contrast loss for {simulation} users: {contrast_loss*100:.1f}%',
-                        'element': 'Color-dependent content',
-                        'impact': 'major'
-                    })
+                worst = affected[np.argmax(loss[affected])]
+                description = (f'Text contrast drops below {aa_minimum[worst]:g}:1 for {deficiency} users '
+                               f'({ratios[worst]:.2f}:1 to {simulated_ratios[index, worst]:.2f}:1, '
+                               f'{loss[worst] * 100:.1f}% loss)')
+                if len(affected) > 1:
+                    description += f' on {len(affected)} elements'
+                issues.append({
+                    'guideline': '1.4.1',
+                    'level': 'A',
+                    'description': description,
+                    'element': f"{styles['tag'][worst]}: {styles['text'][worst]}",
+                    'impact': 'major',
+                    'locator': styles['locator'][worst],
+                    'occurrences': int(len(affected)),
+                    'rect': [float(v) for v in styles['rect'][worst]],
+                    'occurrence_rects': np.round(styles['rect'][affected]).astype(int).tolist()
+                })
+            
+            if audit is not None:
+                audit.results['detailed_analysis']['color_vision'] = {
+                    'severity': severity,
+                    'elements_checked': int(measured.sum()),
+                    'deficiencies': summary,
+                    'proxy_shape': proxy_shape,
+                    'duration_ms': (time.time() - start) * 1000
+                }
                     
         except Exception as e:
             self.logger.warning(f"Colorblind accessibility check failed: {e}")
             
         return issues
     
-    def _simulate_colorblindness(self, img_array, type_):
-        """Simulate color blindness on image"""
-        # Simplified color blindness simulation
-        # In practice, you'd use more sophisticated color transformation matrices
-        img = img_array.copy()
-        
-        if type_ == 'protanopia':
-            # Red-blind: reduce red channel
-            img[:, :, 0] = img[:, :, 0] * 0.1
-        elif type_ == 'deuteranopia':
-            # Green-blind: reduce green channel
-            img[:, :, 1] = img[:, :, 1] * 0.1
-        elif type_ == 'tritanopia':
-            # Blue-blind: reduce blue channel
-            img[:, :, 2] = img[:, :, 2] * 0.1
-            
-        return img
+    def _colorblind_proxy(self, img_array, driver=None, max_width=960):
+        """Downscaled RGB proxy of the screenshot and the CSS-pixel to proxy scale"""
+        device_pixel_ratio = 1.0
+        if driver is not None:
+            try:
+                device_pixel_ratio = float(driver.execute_script("return window.devicePixelRatio;") or 1.0)
+            except Exception:
+                pass
+        
+        img = np.ascontiguousarray(img_array[:, :, :3])
+        factor = min(1.0, max_width / img.shape[1])
+        if factor < 1.0:
+            img = cv2.resize(img, (max(1, int(img.shape[1] * factor)), max(1, int(img.shape[0] * factor))),
+                             interpolation=cv2.INTER_AREA)
+        return img, device_pixel_ratio * factor
+    
+    def _rect_contrast_ratios(self, proxy, rects, deficiencies, severity=1.0):
+        """Contrast between the darkest and lightest pixels in each rect.
+        
+        Returns a (1 + len(deficiencies), n) array: normal vision first, then
+        one row per deficiency; rects outside the proxy give NaN.
+        """
+        # Luminance of the proxy for normal vision and every simulation (one LUT + matmul)
+        simulated = simulate_cvd(proxy, deficiencies, severity)
+        luminance = np.concatenate([relative_luminance(proxy)[None], relative_luminance(simulated)])
+        
+        height, width = proxy.shape[:2]
+        ratios = np.full((luminance.shape[0], len(rects)), np.nan)
+        for index, (x, y, w, h) in enumerate(rects):
+            x0, y0 = max(0, int(x)), max(0, int(y))
+            x1, y1 = min(width, int(np.ceil(x + w))), min(height, int(np.ceil(y + h)))
+            if x1 <= x0 or y1 <= y0:
+                continue
+            crop = luminance[:, y0:y1, x0:x1].reshape(luminance.shape[0], -1)
+            low, high = np.percentile(crop, [5, 95], axis=1)
+            ratios[:, index] = (high + 0.05) / (low + 0.05)
+        return ratios
+    
+    def _simulate_colorblindness(self, img_array, type_, severity=1.0):
+        """Simulate a color vision deficiency on an RGB image"""
+        return np.round(simulate_cvd(img_array[:, :, :3], [type_], severity)[0]).astype(np.uint8)
     
     def _calculate_image_contrast(self, img_array):
         """Calculate overall image contrast"""
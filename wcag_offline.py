@@ -0,0 +1,163 @@
+"""
+Offline WCAG Analysis Module
+Static WCAG checks over saved HTML snapshots, parallel across files, without a browser
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from wcag_checker import WCAGCompliantChecker, OFFLINE_SKIPPED_CHECKS
+
+HTML_EXTENSIONS = ('.html', '.htm')
+
+# One checker per worker process, created by the pool initializer
+_worker_checker = None
+
+
+def _init_worker():
+    global _worker_checker
+    _worker_checker = WCAGCompliantChecker()
+
+
+def _audit_file(path):
+    """Audit one saved page (runs in a worker process)"""
+    checker = _worker_checker or WCAGCompliantChecker()
+    start = time.time()
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            html = f.read()
+        results = checker.check_html_compliance(html, path)
+        results['duration_ms'] = (time.time() - start) * 1000
+        return results
+    except Exception as e:
+        return {'url': path, 'mode': 'offline', 'error': str(e)}
+
+
+class OfflineWCAGAuditor:
+    """Runs the static WCAG rule subset on saved HTML files in a process pool.
+
+    Inputs can be files or directories (for example a capture session folder
+    under screenshots/, which holds the url1_page.html/url2_page.html snapshots);
+    directories are searched recursively for .html/.htm files.
+    """
+
+    def __init__(self, max_workers=None):
+        self.setup_logging()
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def setup_logging(self):
+        """Setup logging for the offline auditor"""
+        self.logger = logging.getLogger(__name__)
+
+    def collect_files(self, paths):
+        """Expand files and directories into a sorted list of HTML files"""
+        if isinstance(paths, str):
+            paths = [paths]
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, filenames in os.walk(path):
+                    files.extend(os.path.join(root, name) for name in filenames
+                                 if name.lower().endswith(HTML_EXTENSIONS))
+            elif os.path.isfile(path):
+                files.append(path)
+            else:
+                self.logger.warning(f"Skipping missing path: {path}")
+        return sorted(dict.fromkeys(os.path.normpath(f) for f in files))
+
+    def audit(self, paths, progress_callback=None):
+        """Audit all HTML files under paths; returns per-file results and a summary"""
+        start = time.time()
+        files = self.collect_files(paths)
+        workers = max(1, min(self.max_workers, len(files)))
+        self.logger.info(f"Offline WCAG analysis of {len(files)} files with {workers} workers")
+
+        results = []
+        if workers == 1:
+            for path in files:
+                results.append(_audit_file(path))
+                if progress_callback:
+                    progress_callback(f"Audited {len(results)}/{len(files)}: {path}")
+        else:
+            chunksize = max(1, len(files) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                for result in pool.map(_audit_file, files, chunksize=chunksize):
+                    results.append(result)
+                    if progress_callback:
+                        progress_callback(f"Audited {len(results)}/{len(files)}: {result['url']}")
+
+        return {
+            'mode': 'offline',
+            'timestamp': datetime.now().isoformat(),
+            'files': results,
+            'skipped_checks': [dict(check) for check in OFFLINE_SKIPPED_CHECKS],
+            'summary': self._summarize(results, time.time() - start, workers)
+        }
+
+    def _summarize(self, results, elapsed, workers):
+        audited = [r for r in results if 'error' not in r]
+        scores = [r['compliance_score'] for r in audited]
+        return {
+            'files': len(results),
+            'audited': len(audited),
+            'errors': len(results) - len(audited),
+            'total_issues': sum(r['total_issues'] for r in audited),
+            'critical_issues': sum(r['critical_issues'] for r in audited),
+            'average_score': sum(scores) / len(scores) if scores else 0,
+            'min_score': min(scores) if scores else None,
+            'workers': workers,
+            'duration_seconds': elapsed
+        }
+
+    def save_results(self, results, output_path):
+        """Write audit results to a JSON file"""
+        try:
+            directory = os.path.dirname(output_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, default=str)
+            self.logger.info(f"Offline WCAG results saved to: {output_path}")
+            return output_path
+        except Exception as e:
+            self.logger.error(f"Failed to save offline WCAG results: {str(e)}")
+            raise
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline WCAG analysis of saved HTML snapshots")
+    parser.add_argument('paths', nargs='+', help="HTML files or directories to audit")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--output', default=os.path.join("reports", "offline_wcag_results.json"),
+                        help="JSON results file")
+    parser.add_argument('--min-score', type=float, default=None,
+                        help="Exit with status 1 if any page scores below this")
+    args = parser.parse_args(argv)
+
+    auditor = OfflineWCAGAuditor(max_workers=args.workers)
+    results = auditor.audit(args.paths)
+    auditor.save_results(results, args.output)
+
+    summary = results['summary']
+    print(f"Audited {summary['audited']}/{summary['files']} files in {summary['duration_seconds']:.1f}s "
+          f"({summary['workers']} workers)")
+    print(f"Issues: {summary['total_issues']} ({summary['critical_issues']} critical), "
+          f"average score {summary['average_score']:.1f}%")
+    print(f"Skipped (need a browser): {', '.join(check['check'] for check in results['skipped_checks'])}")
+
+    failing = [r['url'] for r in results['files']
+               if 'error' in r or (args.min_score is not None and r['compliance_score'] < args.min_score)]
+    if failing:
+        print(f"{len(failing)} pages failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,777 @@
+"""
+WCAG DOM Rule Engine Module
+Single-pass evaluation of the static (markup-only) WCAG checks
+"""
+
+import re
+import time
+import hashlib
+import logging
+from collections import defaultdict
+from bs4 import BeautifulSoup, FeatureNotFound, Tag, NavigableString, Comment
+
+INTERACTIVE_TAGS = ('a', 'button', 'input', 'select', 'textarea')
+FORM_CONTROL_TAGS = ('input', 'textarea', 'select')
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+COLOR_STYLE_PATTERN = re.compile(r'color\s*:', re.I)
+ANIMATION_STYLE_PATTERN = re.compile(r'animation|transition', re.I)
+SKIP_LINK_PATTERN = re.compile(r'^#')
+HELP_PATTERN = re.compile(r'help|support|contact|faq', re.I)
+ALTERNATIVE_PATTERN = re.compile(r'audio|alternative|accessibility', re.I)
+
+# Locators of page-level issues (not tied to one element)
+DOCUMENT_LOCATOR = '/html[1]'
+PAGE_LOCATOR = '/html[1]/body[1]'
+
+# Issue snippets: attributes shown in the opening tag, and the size limits
+SNIPPET_ATTRIBUTES = ('id', 'class', 'name', 'type', 'role', 'href', 'src', 'alt', 'for', 'tabindex',
+                      'aria-label', 'aria-labelledby', 'onclick', 'style', 'http-equiv', 'content')
+SNIPPET_ATTRIBUTE_LENGTH = 40
+SNIPPET_TEXT_LENGTH = 60
+# Descendant nodes visited at most when collecting snippet text
+SNIPPET_NODE_LIMIT = 200
+
+
+def parse_html(html):
+    """Parse a page with lxml, falling back to the pure-Python parser if lxml is not installed"""
+    try:
+        return BeautifulSoup(html, 'lxml')
+    except FeatureNotFound:
+        return BeautifulSoup(html, 'html.parser')
+
+
+def element_xpath(elem):
+    """Positional XPath of an element (e.g. /html[1]/body[1]/div[2]), resolvable in the browser"""
+    parts = []
+    while elem is not None and elem.parent is not None:
+        index = 1 + sum(1 for sibling in elem.previous_siblings
+                        if isinstance(sibling, Tag) and sibling.name == elem.name)
+        parts.append(f"{elem.name}[{index}]")
+        elem = elem.parent
+    return '/' + '/'.join(reversed(parts))
+
+
+def _issue(guideline, description, element, impact, level='A', locator=None):
+    return {
+        'guideline': guideline,
+        'level': level,
+        'description': description,
+        'element': element,
+        'impact': impact,
+        'locator': locator
+    }
+
+
+def _clip(text, length):
+    return text if len(text) <= length else text[:length] + '...'
+
+
+def _text_prefix(elem, length=SNIPPET_TEXT_LENGTH):
+    """Leading text of an element, visiting a bounded number of descendants"""
+    parts = []
+    collected = 0
+    for visited, node in enumerate(elem.descendants):
+        if visited >= SNIPPET_NODE_LIMIT or collected > length:
+            # Text (possibly) continues beyond what was collected
+            parts.append('...')
+            break
+        if isinstance(node, NavigableString) and not isinstance(node, Comment) \
+                and node.parent.name not in ('script', 'style'):
+            text = ' '.join(node.split())
+            if text:
+                parts.append(text)
+                collected += len(text) + 1
+    return _clip(' '.join(parts), length)
+
+
+def css_path(elem):
+    """CSS selector of an element, anchored at the nearest ancestor with an id"""
+    parts = []
+    while elem is not None and elem.parent is not None:
+        if elem.get('id'):
+            parts.append(f"#{elem['id']}")
+            break
+        segment = elem.name + ''.join(f".{name}" for name in elem.get('class', [])[:2])
+        previous = sum(1 for sibling in elem.previous_siblings
+                       if isinstance(sibling, Tag) and sibling.name == elem.name)
+        if previous or any(isinstance(sibling, Tag) and sibling.name == elem.name for sibling in elem.next_siblings):
+            segment += f":nth-of-type({previous + 1})"
+        parts.append(segment)
+        elem = elem.parent
+    return ' > '.join(reversed(parts))
+
+
+def element_snippet(elem):
+    """Opening tag with its key attributes and the leading text, without serializing the subtree"""
+    attributes = []
+    for name in SNIPPET_ATTRIBUTES:
+        value = elem.get(name)
+        if value is not None:
+            value = ' '.join(value) if isinstance(value, list) else str(value)
+            attributes.append(f' {name}="{_clip(value, SNIPPET_ATTRIBUTE_LENGTH)}"')
+    return f"<{elem.name}{''.join(attributes)}>{_text_prefix(elem)}"
+
+
+def element_fingerprint(elem):
+    """Stable id of an element for diffing issues between runs.
+
+    Built from the tag, its key attributes, the ancestor chain (tags, ids and
+    classes without sibling positions) and the leading text, so inserting
+    content elsewhere on the page does not change it.
+    """
+    chain = []
+    for node in [elem] + list(elem.parents):
+        if node.parent is None:
+            break
+        chain.append(node.name + (f"#{node['id']}" if node.get('id') else '') +
+                     ''.join(f".{name}" for name in node.get('class', [])))
+        if node.get('id'):
+            break
+    attributes = [f"{name}={elem.get(name)}" for name in SNIPPET_ATTRIBUTES if elem.get(name) is not None]
+    digest = hashlib.sha1('\x00'.join([' < '.join(chain)] + attributes + [_text_prefix(elem)]).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def _element_issue(guideline, description, elem, impact, level='A'):
+    """Issue for a specific element, located by its XPath and CSS path"""
+    issue = _issue(guideline, description, element_snippet(elem), impact, level, element_xpath(elem))
+    issue['selector'] = css_path(elem)
+    issue['fingerprint'] = element_fingerprint(elem)
+    return issue
+
+
+def _relocate(rule_issues, old_root, new_root):
+    """Copy of per-rule issues with locators and selectors under old_root moved under new_root.
+
+    Roots are (xpath, css path) pairs; ('', '') stands for a position-independent
+    root, the form in which issues of cached subtrees are stored.
+    """
+    (old_xpath, old_css), (new_xpath, new_css) = old_root, new_root
+    moved = {}
+    for name, issues in rule_issues.items():
+        moved[name] = []
+        for issue in issues:
+            locator, selector = issue.get('locator'), issue.get('selector')
+            if locator is not None and locator.startswith(old_xpath):
+                issue = dict(issue, locator=new_xpath + locator[len(old_xpath):])
+                # Selectors anchored at an id inside the subtree do not depend on its position
+                if selector is not None and (selector == old_css or selector.startswith(old_css + ' > ')):
+                    issue['selector'] = new_css + selector[len(old_css):]
+            moved[name].append(issue)
+    return moved
+
+
+class DOMRule:
+    """A WCAG check evaluated during the engine's single walk over the document.
+
+    The engine calls visit() for every element whose tag is in `tags` or that
+    carries one of `attributes`, then finish() once the walk is complete. Rules
+    keep per-run data in the state returned by start(), never on the instance,
+    so one engine can serve concurrent audits.
+
+    Rules whose findings for an element depend only on that element's subtree
+    declare scope = 'subtree'; their issues can be cached per subtree and
+    reused when only other parts of the page change.
+    """
+
+    name = ''
+    group = ''
+    scope = 'document'
+    tags = ()
+    attributes = ()
+
+    def start(self):
+        return {'issues': []}
+
+    def visit(self, elem, state):
+        pass
+
+    def finish(self, state, soup):
+        return state['issues']
+
+
+class ImageAltRule(DOMRule):
+    name = 'image_alt'
+    group = 'text_alternatives'
+    scope = 'subtree'
+    tags = ('img',)
+
+    def visit(self, img, state):
+        if not img.get('alt') and not img.get('aria-label') and not img.get('aria-labelledby'):
+            if not img.get('role') == 'presentation' and not img.get('aria-hidden') == 'true':
+                state['issues'].append(_element_issue('1.1.1', 'Image missing alt text', img, 'critical'))
+
+
+class FormLabelRule(DOMRule):
+    name = 'form_label'
+    group = 'text_alternatives'
+    tags = FORM_CONTROL_TAGS + ('label',)
+
+    def start(self):
+        return {'controls': [], 'labelled_ids': set()}
+
+    def visit(self, elem, state):
+        if elem.name == 'label':
+            if elem.get('for'):
+                state['labelled_ids'].add(elem.get('for'))
+            return
+        input_type = elem.get('type', '').lower()
+        if input_type not in ['hidden', 'submit', 'button', 'reset']:
+            if not elem.get('aria-label') and not elem.get('aria-labelledby'):
+                state['controls'].append(elem)
+
+    def finish(self, state, soup):
+        # Labels may follow their control, so associations are resolved after the walk
+        return [_element_issue('1.1.1', 'Form control missing label', control, 'critical')
+                for control in state['controls']
+                if not control.get('id') or control.get('id') not in state['labelled_ids']]
+
+
+class MediaCaptionRule(DOMRule):
+    name = 'media_captions'
+    group = 'time_based_media'
+    scope = 'subtree'
+    tags = ('video', 'audio', 'track')
+
+    def start(self):
+        return {'media': [], 'captioned': set()}
+
+    def visit(self, elem, state):
+        if elem.name == 'track':
+            state['captioned'].update(id(media) for media in elem.find_parents(['video', 'audio']))
+        else:
+            state['media'].append(elem)
+
+    def finish(self, state, soup):
+        return [_element_issue('1.2.1', 'Media element missing captions/transcript', media, 'major')
+                for media in state['media'] if id(media) not in state['captioned']]
+
+
+class HeadingStructureRule(DOMRule):
+    name = 'heading_structure'
+    group = 'adaptable'
+    tags = HEADING_TAGS
+
+    def start(self):
+        return {'issues': [], 'prev_level': None}
+
+    def visit(self, heading, state):
+        if state['prev_level'] is None:
+            state['prev_level'] = 0
+            if heading.name != 'h1':
+                state['issues'].append(_element_issue('1.3.1', 'Page should start with h1 heading',
+                                                      heading, 'moderate'))
+
+        level = int(heading.name[1])
+        if level > state['prev_level'] + 1:
+            state['issues'].append(_element_issue('1.3.1', f'Heading level skipped: {heading.name} after h{state["prev_level"]}',
+                                                  heading, 'moderate'))
+        state['prev_level'] = level
+
+
+class TableHeaderRule(DOMRule):
+    name = 'table_headers'
+    group = 'adaptable'
+    scope = 'subtree'
+    tags = ('table', 'th')
+
+    def start(self):
+        return {'tables': [], 'with_headers': set()}
+
+    def visit(self, elem, state):
+        if elem.name == 'th':
+            state['with_headers'].update(id(table) for table in elem.find_parents('table'))
+        else:
+            state['tables'].append(elem)
+
+    def finish(self, state, soup):
+        return [_element_issue('1.3.1', 'Data table missing header cells', table, 'major')
+                for table in state['tables']
+                if id(table) not in state['with_headers'] and not table.get('role') == 'presentation']
+
+
+class ColorOnlyRule(DOMRule):
+    name = 'color_only'
+    group = 'distinguishable'
+    scope = 'subtree'
+    attributes = ('style',)
+
+    def visit(self, elem, state):
+        if COLOR_STYLE_PATTERN.search(elem['style']) and not elem.get_text().strip():
+            state['issues'].append(_element_issue('1.4.1', 'Information might be conveyed through color only',
+                                                  elem, 'moderate'))
+
+
+class KeyboardFocusRule(DOMRule):
+    name = 'keyboard_focus'
+    group = 'keyboard_accessible'
+    scope = 'subtree'
+    attributes = ('tabindex',)
+
+    def visit(self, elem, state):
+        if elem.name in INTERACTIVE_TAGS and elem.get('tabindex') == '-1' and not elem.get('aria-hidden') == 'true':
+            state['issues'].append(_element_issue('2.1.1', 'Interactive element not keyboard accessible',
+                                                  elem, 'critical'))
+
+
+class SkipLinkRule(DOMRule):
+    name = 'skip_link'
+    group = 'keyboard_accessible'
+    tags = ('a',)
+
+    def start(self):
+        return {'found': False}
+
+    def visit(self, link, state):
+        if not state['found'] and link.get('href') is not None and SKIP_LINK_PATTERN.search(link['href']):
+            state['found'] = True
+
+    def finish(self, state, soup):
+        if state['found']:
+            return []
+        return [_issue('2.4.1', 'Page missing skip navigation links', 'Page structure', 'moderate',
+                       locator=PAGE_LOCATOR)]
+
+
+class MetaRefreshRule(DOMRule):
+    name = 'meta_refresh'
+    group = 'enough_time'
+    tags = ('meta',)
+
+    def start(self):
+        return {'meta': None}
+
+    def visit(self, meta, state):
+        if state['meta'] is None and meta.get('http-equiv') == 'refresh':
+            state['meta'] = meta
+
+    def finish(self, state, soup):
+        meta = state['meta']
+        content = meta.get('content', '') if meta is not None else ''
+        if content and not content.startswith('0;'):
+            return [_element_issue('2.2.1', 'Page has auto-refresh without user control', meta, 'major')]
+        return []
+
+
+class AnimationRule(DOMRule):
+    name = 'animation'
+    group = 'seizures'
+    scope = 'subtree'
+    attributes = ('style',)
+
+    def visit(self, elem, state):
+        if ANIMATION_STYLE_PATTERN.search(elem['style']):
+            state['issues'].append(_element_issue('2.3.1', 'Animation detected - verify it does not flash more than 3 times per second',
+                                                  elem, 'critical'))
+
+
+class PageTitleRule(DOMRule):
+    name = 'page_title'
+    group = 'navigable'
+    tags = ('title',)
+
+    def start(self):
+        return {'title': None}
+
+    def visit(self, title, state):
+        if state['title'] is None:
+            state['title'] = title
+
+    def finish(self, state, soup):
+        if state['title'] is None or not state['title'].get_text().strip():
+            return [_issue('2.4.2', 'Page missing descriptive title', 'Document head', 'major',
+                           locator=DOCUMENT_LOCATOR)]
+        return []
+
+
+class PositiveTabindexRule(DOMRule):
+    name = 'positive_tabindex'
+    group = 'navigable'
+    scope = 'subtree'
+    attributes = ('tabindex',)
+
+    def visit(self, elem, state):
+        if elem.name not in INTERACTIVE_TAGS or not elem.get('tabindex'):
+            return
+        try:
+            if int(elem['tabindex']) > 0:
+                state['issues'].append(_element_issue('2.4.3', 'Positive tabindex may disrupt natural focus order',
+                                                      elem, 'moderate'))
+        except ValueError:
+            pass
+
+
+class ClickHandlerRule(DOMRule):
+    name = 'click_handler'
+    group = 'input_modalities'
+    scope = 'subtree'
+    attributes = ('onclick',)
+
+    def visit(self, elem, state):
+        if elem.name not in INTERACTIVE_TAGS:
+            state['issues'].append(_element_issue('2.5.1', 'Non-interactive element has click handler',
+                                                  elem, 'moderate'))
+
+
+class LanguageRule(DOMRule):
+    name = 'language'
+    group = 'readable'
+    tags = ('html',)
+
+    def start(self):
+        return {'html': None}
+
+    def visit(self, html, state):
+        if state['html'] is None:
+            state['html'] = html
+
+    def finish(self, state, soup):
+        if state['html'] is None or not state['html'].get('lang'):
+            return [_issue('3.1.1', 'Page missing language declaration', 'HTML element', 'major',
+                           locator=DOCUMENT_LOCATOR)]
+        return []
+
+
+class FormContextChangeRule(DOMRule):
+    name = 'form_context_change'
+    group = 'predictable'
+    scope = 'subtree'
+    tags = ('form',)
+
+    def visit(self, form, state):
+        if form.get('onchange') or form.get('onsubmit'):
+            state['issues'].append(_element_issue('3.2.2', 'Form may change context automatically', form, 'moderate'))
+
+
+class RequiredFieldRule(DOMRule):
+    name = 'required_field'
+    group = 'input_assistance'
+    attributes = ('required',)
+
+    def visit(self, inp, state):
+        if inp.name not in FORM_CONTROL_TAGS:
+            return
+        if not inp.get('aria-required') and not inp.get('aria-invalid'):
+            # Check for visual indicators
+            parent = inp.parent
+            if parent and '*' not in parent.get_text():
+                state['issues'].append(_element_issue('3.3.2', 'Required field missing clear indicator', inp, 'major'))
+
+
+class DuplicateIdRule(DOMRule):
+    name = 'duplicate_id'
+    group = 'compatible'
+    attributes = ('id',)
+
+    def start(self):
+        return {'issues': [], 'ids': set()}
+
+    def visit(self, elem, state):
+        elem_id = elem['id']
+        if elem_id in state['ids']:
+            state['issues'].append(_element_issue('4.1.1', f'Duplicate ID found: {elem_id}', elem, 'major'))
+        else:
+            state['ids'].add(elem_id)
+
+
+class AriaLabelledbyRule(DOMRule):
+    name = 'aria_labelledby'
+    group = 'compatible'
+    attributes = ('id', 'aria-labelledby')
+
+    def start(self):
+        return {'ids': set(), 'references': []}
+
+    def visit(self, elem, state):
+        if elem.has_attr('id'):
+            state['ids'].add(elem['id'])
+        if elem.has_attr('aria-labelledby'):
+            state['references'].append(elem)
+
+    def finish(self, state, soup):
+        issues = []
+        for elem in state['references']:
+            labelledby_id = elem.get('aria-labelledby')
+            if labelledby_id not in state['ids']:
+                issues.append(_element_issue('4.1.2', f'aria-labelledby references non-existent ID: {labelledby_id}',
+                                             elem, 'major'))
+        return issues
+
+
+class ConsistentHelpRule(DOMRule):
+    name = 'consistent_help'
+    group = 'consistent_help'
+    tags = ('a', 'button')
+
+    def start(self):
+        return {'labelled': [], 'linked': []}
+
+    def visit(self, elem, state):
+        if elem.string is not None and HELP_PATTERN.search(elem.string):
+            state['labelled'].append(elem)
+        if elem.name == 'a' and elem.get('href') is not None and HELP_PATTERN.search(elem['href']):
+            state['linked'].append(elem)
+
+    def finish(self, state, soup):
+        help_positions = set()
+        for elem in state['labelled'] + state['linked']:
+            # Get relative position (simplified)
+            parent = elem.parent
+            if parent:
+                siblings = parent.find_all()
+                position = siblings.index(elem) if elem in siblings else 0
+                help_positions.add(position)
+
+        if len(help_positions) > 2:  # Too much variation in help placement
+            return [_issue('3.2.6', 'Help placement may not be consistent across pages', 'Help elements', 'moderate',
+                           locator=PAGE_LOCATOR)]
+        return []
+
+
+class RedundantEntryRule(DOMRule):
+    name = 'redundant_entry'
+    group = 'redundant_entry'
+    scope = 'subtree'
+    tags = ('form',) + FORM_CONTROL_TAGS
+
+    def start(self):
+        return {'forms': [], 'password_fields': defaultdict(list)}
+
+    def visit(self, elem, state):
+        if elem.name == 'form':
+            state['forms'].append(elem)
+        elif elem.get('type') == 'password':
+            for form in elem.find_parents('form'):
+                state['password_fields'][id(form)].append(elem)
+
+    def finish(self, state, soup):
+        issues = []
+        for form in state['forms']:
+            password_fields = state['password_fields'][id(form)]
+            # Check for password confirmation fields without autocomplete
+            if len(password_fields) > 1:
+                for pwd_field in password_fields:
+                    if not pwd_field.get('autocomplete'):
+                        issues.append(_element_issue('3.3.7', 'Password field may require redundant entry - consider autocomplete',
+                                                     pwd_field, 'moderate'))
+        return issues
+
+
+class AccessibleAuthenticationRule(DOMRule):
+    name = 'accessible_authentication'
+    group = 'accessible_authentication'
+    scope = 'subtree'
+    tags = ('form', 'input')
+
+    def start(self):
+        return {'forms': [], 'inputs': defaultdict(list)}
+
+    def visit(self, elem, state):
+        if elem.name == 'form':
+            state['forms'].append(elem)
+        else:
+            for form in elem.find_parents('form'):
+                state['inputs'][id(form)].append(elem)
+
+    def finish(self, state, soup):
+        issues = []
+        for form in state['forms']:
+            inputs = state['inputs'][id(form)]
+            if not any(inp.get('type') == 'password' for inp in inputs):
+                continue
+
+            # Check for cognitive barriers
+            has_captcha = any('captcha' in str(inp).lower() for inp in inputs)
+            has_security_questions = any('security' in str(inp).lower() for inp in inputs)
+
+            if has_captcha and not form.find_all(string=ALTERNATIVE_PATTERN):
+                issues.append(_issue('3.3.8', 'CAPTCHA without accessible alternative detected',
+                                     'Authentication form', 'critical', level='AA', locator=element_xpath(form)))
+
+            if has_security_questions:
+                issues.append(_issue('3.3.8', 'Security questions may create cognitive barriers',
+                                     'Authentication form', 'major', level='AA', locator=element_xpath(form)))
+        return issues
+
+
+def iter_elements(root, skip=()):
+    """Elements under root in document order, without descending into the elements in skip"""
+    skip_ids = {id(elem) for elem in skip}
+    stack = list(reversed(root.contents))
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, Tag) or id(node) in skip_ids:
+            continue
+        yield node
+        stack.extend(reversed(node.contents))
+
+
+def default_rules():
+    """The static WCAG rules, in report order"""
+    return [
+        # Perceivable
+        ImageAltRule(), FormLabelRule(), MediaCaptionRule(), HeadingStructureRule(), TableHeaderRule(),
+        ColorOnlyRule(),
+        # Operable
+        KeyboardFocusRule(), SkipLinkRule(), MetaRefreshRule(), AnimationRule(), PageTitleRule(),
+        PositiveTabindexRule(), ClickHandlerRule(),
+        # Understandable
+        LanguageRule(), FormContextChangeRule(), RequiredFieldRule(),
+        # Robust
+        DuplicateIdRule(), AriaLabelledbyRule(),
+        # WCAG 2.2
+        ConsistentHelpRule(), RedundantEntryRule(), AccessibleAuthenticationRule()
+    ]
+
+
+class DOMRuleEngine:
+    """Runs registered DOMRules over a parsed page in one document walk.
+
+    Rules are indexed by tag and attribute name; each element is dispatched only
+    to the rules that asked for it.
+    """
+
+    def __init__(self, rules=None):
+        self.setup_logging()
+        self.rules = []
+        self._rules_by_tag = defaultdict(list)
+        self._rules_by_attribute = defaultdict(list)
+        for rule in (default_rules() if rules is None else rules):
+            self.register(rule)
+
+    def setup_logging(self):
+        """Setup logging for the rule engine"""
+        self.logger = logging.getLogger(__name__)
+
+    def register(self, rule):
+        """Add a rule; names must be unique"""
+        if any(existing.name == rule.name for existing in self.rules):
+            raise ValueError(f"Rule already registered: {rule.name}")
+        self.rules.append(rule)
+        for tag in rule.tags:
+            self._rules_by_tag[tag].append(rule)
+        for attribute in rule.attributes:
+            self._rules_by_attribute[attribute].append(rule)
+
+    @property
+    def groups(self):
+        return list(dict.fromkeys(rule.group for rule in self.rules))
+
+    def parse(self, html):
+        """Parse page source once for all rules"""
+        return parse_html(html)
+
+    def run(self, soup, groups=None, rules=None, elements=None):
+        """Walk the document once and evaluate the rules (optionally only those in groups).
+
+        rules restricts the run to a subset of the registered rules and elements to
+        a subset of the document (default: every element).
+
+        Returns a dict with 'issues' (group -> issue list, in rule order),
+        'rule_issues' (rule name -> issue list), 'rule_timings_ms' (rule name ->
+        time spent in the rule), 'nodes' and 'walk_ms'.
+        """
+        rules = [rule for rule in (self.rules if rules is None else rules)
+                 if groups is None or rule.group in groups]
+        states = {rule.name: rule.start() for rule in rules}
+        elapsed = dict.fromkeys(states, 0.0)
+        clock = time.perf_counter
+
+        walk_start = clock()
+        nodes = 0
+        for elem in (soup.find_all(True) if elements is None else elements):
+            nodes += 1
+            matched = self._rules_by_tag.get(elem.name, [])
+            for attribute in elem.attrs:
+                if attribute in self._rules_by_attribute:
+                    matched = matched + self._rules_by_attribute[attribute]
+
+            for rule in dict.fromkeys(matched):
+                state = states.get(rule.name)
+                if state is None:
+                    continue
+                rule_start = clock()
+                rule.visit(elem, state)
+                elapsed[rule.name] += clock() - rule_start
+
+        rule_issues = {}
+        for rule in rules:
+            rule_start = clock()
+            rule_issues[rule.name] = rule.finish(states[rule.name], soup)
+            elapsed[rule.name] += clock() - rule_start
+        walk_ms = (clock() - walk_start) * 1000
+
+        self.logger.debug(f"DOM rules evaluated over {nodes} elements in {walk_ms:.1f} ms")
+        return {
+            'issues': self._group_issues(rules, rule_issues, groups),
+            'rule_issues': rule_issues,
+            'rule_timings_ms': {name: seconds * 1000 for name, seconds in elapsed.items()},
+            'nodes': nodes,
+            'walk_ms': walk_ms
+        }
+
+    def run_partitioned(self, soup, units, cached_units=None):
+        """Run all rules with subtree-scoped issues computed per unit.
+
+        units maps a content hash to a subtree root (typically the children of
+        <body>). Subtree rules are only evaluated for units whose hash is not in
+        cached_units (hash -> {rule name: issues}) and reuse the cached issues
+        otherwise; document rules always see the whole page. Returns the same
+        dict as run(), plus 'unit_issues' for caching and the rechecked/reused
+        unit counts.
+        """
+        cached_units = cached_units or {}
+        clock = time.perf_counter
+        walk_start = clock()
+        subtree_rules = [rule for rule in self.rules if rule.scope == 'subtree']
+        document_rules = [rule for rule in self.rules if rule.scope != 'subtree']
+
+        document_run = self.run(soup, rules=document_rules)
+        timings = dict(document_run['rule_timings_ms'])
+        nodes = document_run['nodes']
+
+        # Elements outside the units (html, head, body itself) are always rechecked
+        roots = list(units.values())
+        outside_run = self.run(soup, rules=subtree_rules, elements=iter_elements(soup, skip=roots))
+        parts = [outside_run['rule_issues']]
+        for name, ms in outside_run['rule_timings_ms'].items():
+            timings[name] = timings.get(name, 0.0) + ms
+
+        # Unit issues are kept with locators relative to the unit root, since an unchanged
+        # subtree can move to another position (or repeat) in a later version of the page
+        unit_issues = {}
+        rechecked = 0
+        for unit_hash, root in units.items():
+            prefix = (element_xpath(root), css_path(root))
+            if unit_hash not in unit_issues:
+                if unit_hash in cached_units:
+                    unit_issues[unit_hash] = cached_units[unit_hash]
+                else:
+                    unit_run = self.run(soup, rules=subtree_rules, elements=[root] + root.find_all(True))
+                    unit_issues[unit_hash] = _relocate(unit_run['rule_issues'], prefix, ('', ''))
+                    for name, ms in unit_run['rule_timings_ms'].items():
+                        timings[name] += ms
+                    rechecked += 1
+            parts.append(_relocate(unit_issues[unit_hash], ('', ''), prefix))
+
+        rule_issues = dict(document_run['rule_issues'])
+        for rule in subtree_rules:
+            rule_issues[rule.name] = [issue for part in parts for issue in part.get(rule.name, [])]
+
+        return {
+            'issues': self._group_issues(self.rules, rule_issues),
+            'rule_issues': rule_issues,
+            'rule_timings_ms': timings,
+            'nodes': nodes,
+            'walk_ms': (clock() - walk_start) * 1000,
+            'unit_issues': unit_issues,
+            'units_rechecked': rechecked,
+            'units_reused': len(unit_issues) - rechecked
+        }
+
+    def _group_issues(self, rules, rule_issues, groups=None):
+        issues = {group: [] for group in (groups or self.groups)}
+        for rule in rules:
+            issues.setdefault(rule.group, []).extend(rule_issues[rule.name])
+        return issues